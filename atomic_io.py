@@ -0,0 +1,20 @@
+"""原子写入：先写同目录下的临时文件，再用os.replace替换，读取方不会看到写了一半的文件"""
+import os
+import json
+import numpy as np
+
+
+def atomic_save_array(path, array):
+    """把数组以.npy格式原子写入path"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def atomic_save_json(path, data, **kwargs):
+    """把data以UTF-8 JSON原子写入path，kwargs传给json.dump"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, **kwargs)
+    os.replace(tmp_path, path)
@@ -0,0 +1,738 @@
+"""性能基准测试
+
+用法:
+    python benchmarks.py            # 运行全部基准
+    python benchmarks.py taxel ...  # 只运行名称中包含指定关键字的基准
+"""
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from config import CONFIG
+
+BENCHMARKS = []
+
+def benchmark(func):
+    """注册基准测试函数"""
+    BENCHMARKS.append(func)
+    return func
+
+
+def best_time(func, repeat=5, number=1):
+    """多次重复取最短单次耗时（秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def report(title, baseline, optimized, unit='ms'):
+    scale = 1e3 if unit == 'ms' else 1e6
+    print(f"  {title}: {baseline * scale:.3f}{unit} -> {optimized * scale:.3f}{unit} "
+          f"（加速 {baseline / optimized:.1f}x）")
+
+
+def sample_files():
+    """基准测试使用的数据文件"""
+    return sorted(
+        os.path.join(CONFIG['DATA_DIR'], f)
+        for f in os.listdir(CONFIG['DATA_DIR']) if f.endswith('.csv')
+    )
+
+
+@benchmark
+def bench_taxel_features():
+    """触点统计特征：逐单元格pandas路径 vs 向量化路径"""
+    from scipy import stats
+    from trial_data import load_trial
+    from taxel_features import taxel_statistics, frame_taxel_statistics
+
+    file_path = sample_files()[0]
+    df = pd.read_csv(file_path, header=None,
+                     names=[f'col_{i}' for i in range(CONFIG['NUM_COLUMNS'])],
+                     low_memory=False)
+    trial = load_trial(file_path)
+
+    def per_cell(peak_index):
+        # 原实现：逐个触点构造列名并对单元格调用pd.to_numeric
+        paxini_values = []
+        for contact_idx in range(CONFIG['PAXINI_NUM_POINTS']):
+            paxini_col = f'col_{CONFIG["PAXINI_START_INDEX"] + contact_idx}'
+            value = pd.to_numeric(df.loc[peak_index, paxini_col], errors='coerce')
+            if not np.isnan(value):
+                paxini_values.append(value)
+        paxini_array = np.array(paxini_values)
+        return (np.mean(paxini_array), np.std(paxini_array), np.max(paxini_array),
+                np.min(paxini_array), np.ptp(paxini_array), np.median(paxini_array),
+                np.percentile(paxini_array, 25), np.percentile(paxini_array, 75),
+                stats.skew(paxini_array), stats.kurtosis(paxini_array))
+
+    peak_index = df['col_2'].idxmin()
+    baseline = best_time(lambda: per_cell(peak_index))
+    optimized = best_time(lambda: taxel_statistics(trial.peak_paxini()), number=100)
+    report('峰值帧', baseline, optimized)
+
+    num_frames = trial.num_frames
+    baseline_all = best_time(lambda: [per_cell(i) for i in range(num_frames)], repeat=1)
+    optimized_all = best_time(lambda: frame_taxel_statistics(trial.paxini), number=10)
+    report(f'全部 {num_frames} 帧', baseline_all, optimized_all)
+
+
+@benchmark
+def bench_grid_operator():
+    """9x11硬度网格：逐次griddata vs 预计算稀疏插值算子"""
+    from scipy.interpolate import griddata
+    from core_processor import HardnessProcessor
+    from trial_data import load_trial
+    from grid_interpolation import grid_sample_points, apply_grid_operator
+
+    processor = HardnessProcessor()
+    processor.load_coordinates()
+    trial = load_trial(sample_files()[0])
+    points = processor.coordinates[:, :2]
+    sample_points = grid_sample_points(points)
+
+    def per_call(values):
+        return griddata(points, values, sample_points, method='linear', fill_value=np.mean(values))
+
+    values = trial.peak_paxini()
+    baseline = best_time(lambda: per_call(values))
+    optimized = best_time(lambda: apply_grid_operator(processor.grid_operator, values), number=100)
+    report('单帧', baseline, optimized)
+
+    frames = np.asarray(trial.paxini, dtype=np.float64)
+    baseline_all = best_time(lambda: [per_call(v) for v in frames], repeat=1)
+    optimized_all = best_time(lambda: apply_grid_operator(processor.grid_operator, frames), number=10)
+    report(f'全部 {len(frames)} 帧', baseline_all, optimized_all)
+
+
+@benchmark
+def bench_auto_push_parser():
+    """AA 56自动回传帧解析：逐字节LRC + 字典解析 vs memoryview零拷贝解析器（合成921600波特率数据流）"""
+    from gen3_protocol import AUTO_PUSH_HEAD, encode_auto_push_frame, payload_length
+    from gen3_acquisition import Gen3SensorReader
+
+    rng = np.random.default_rng(0)
+    num_frames = 2000
+    length = payload_length(CONFIG['PAXINI_NUM_POINTS'])
+    frames = [encode_auto_push_frame(rng.integers(0, 256, length, dtype=np.uint8).tobytes())
+              for _ in range(num_frames)]
+    stream = b"".join(frames)
+    chunk = 4096  # 单次串口读取的字节数
+
+    def legacy_lrc(data):
+        lrc_sum = 0
+        for byte in data:
+            lrc_sum = (lrc_sum + byte) & 0xFF
+        return ((~lrc_sum) + 1) & 0xFF
+
+    def legacy_parse(data):
+        # 原示例程序：切片bytes、逐帧构造字典、纯Python逐字节LRC
+        parsed = {
+            "head": data[:2].hex(),
+            "reserved": data[2],
+            "valid_frame_len": int.from_bytes(data[3:5], "little"),
+            "error_code": data[5],
+            "lrc_recv": data[-1],
+        }
+        parsed["valid_data_len"] = parsed["valid_frame_len"] - 1
+        parsed["valid_data"] = data[6:6 + parsed["valid_data_len"]]
+        parsed["lrc_valid"] = legacy_lrc(data[:-1]) == parsed["lrc_recv"]
+        return parsed
+
+    def legacy():
+        buffer = b""
+        for i in range(0, len(stream), chunk):
+            buffer += stream[i:i + chunk]
+            while True:
+                start = buffer.find(AUTO_PUSH_HEAD)
+                if start < 0 or len(buffer) - start < 7:
+                    break
+                frame_length = int.from_bytes(buffer[start + 3:start + 5], "little") + 6
+                if len(buffer) - start < frame_length:
+                    break
+                legacy_parse(buffer[start:start + frame_length])
+                buffer = buffer[start + frame_length:]
+
+    reader = Gen3SensorReader(port='bench', capacity=num_frames)
+
+    def optimized():
+        for i in range(0, len(stream), chunk):
+            reader.feed(stream[i:i + chunk])
+
+    line_rate = CONFIG['SENSOR_BAUDRATE'] / 10 / len(frames[0])
+    baseline = best_time(legacy, repeat=3)
+    fast = best_time(optimized, repeat=3)
+    assert reader.frames_received == 3 * num_frames
+    print(f"  串口线速率: {line_rate:.0f} 帧/秒")
+    print(f"  解析吞吐: {num_frames / baseline:.0f} 帧/秒 -> {num_frames / fast:.0f} 帧/秒 "
+          f"（加速 {baseline / fast:.1f}x）")
+
+
+@benchmark
+def bench_taxel_decode():
+    """分布力数据解码：十六进制字符串 + 逐字节循环 vs np.frombuffer结构化视图（单帧与批量）"""
+    from gen3_protocol import (
+        AutoPushDecoder, encode_auto_push_frame, payload_length, taxel_view, taxel_values,
+    )
+
+    rng = np.random.default_rng(0)
+    num_points = CONFIG['PAXINI_NUM_POINTS']
+    payload = rng.integers(0, 256, num_points * 3, dtype=np.uint8).tobytes()
+
+    def legacy(data):
+        # 原示例程序：转为十六进制文本再转回字节，逐个测点转换符号
+        bytes_data = bytes.fromhex(data.hex())
+        points = []
+        for i in range(0, len(bytes_data), 3):
+            x, y, z = bytes_data[i], bytes_data[i + 1], bytes_data[i + 2]
+            points.append([x if x < 128 else x - 256, y if y < 128 else y - 256, z])
+        return points
+
+    assert np.array_equal(np.array(legacy(payload)), taxel_values(taxel_view(payload, num_points)))
+    baseline = best_time(lambda: legacy(payload), number=100)
+    optimized = best_time(lambda: taxel_values(taxel_view(payload, num_points)), number=1000)
+    report(f'单帧 {num_points} 测点', baseline, optimized, unit='us')
+
+    num_frames = 1000
+    decoder = AutoPushDecoder(num_points)
+    length = payload_length(num_points)
+    stream = b"".join(encode_auto_push_frame(rng.integers(0, 256, length, dtype=np.uint8).tobytes())
+                      for _ in range(num_frames))
+    data = np.frombuffer(stream, dtype=np.uint8)
+
+    def per_frame():
+        for i in range(num_frames):
+            decoder.decode(data, i * decoder.frame_length)
+
+    baseline_all = best_time(per_frame, repeat=3)
+    optimized_all = best_time(lambda: decoder.decode(data, 0, num_frames), number=10)
+    report(f'{num_frames} 帧逐帧解码 vs 批量解码', baseline_all, optimized_all)
+
+
+@benchmark
+def bench_capture():
+    """原始采集文件：与CSV的存储空间对比，以及最快速度回放到解码器的吞吐"""
+    import tempfile
+    from trial_data import load_trial
+    from fake_sensor import frames_from_trial
+    from gen3_acquisition import Gen3SensorReader
+    from raw_capture import CaptureWriter, replay_capture
+
+    file_path = sample_files()[0]
+    frames = frames_from_trial(load_trial(file_path))
+    interval_ns = int(len(frames[0]) * 10 / CONFIG['SENSOR_BAUDRATE'] * 1e9)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        capture_path = os.path.join(tmp, 'bench.gen3cap')
+        with CaptureWriter(capture_path) as capture:
+            for i, frame in enumerate(frames):
+                capture.write(frame, timestamp_ns=i * interval_ns)
+
+        csv_size = os.path.getsize(file_path)
+        capture_size = os.path.getsize(capture_path)
+        print(f"  {len(frames)} 帧: CSV {csv_size / 1024:.0f}KB -> 采集文件 {capture_size / 1024:.0f}KB "
+              f"（{capture_size / csv_size:.0%}）")
+
+        reader = Gen3SensorReader(port='bench', capacity=len(frames))
+        elapsed = best_time(lambda: replay_capture(capture_path, reader.feed, speed=None), repeat=3)
+        print(f"  最快速度回放: {len(frames) / elapsed:.0f} 帧/秒"
+              f"（原始时长 {len(frames) * interval_ns / 1e9:.2f}s，回放 {elapsed * 1e3:.1f}ms）")
+
+
+@benchmark
+def bench_transport():
+    """设备初始化与寄存器轮询：每条指令固定休眠 vs 响应驱动 + 流水线读取（pty模拟传感器）"""
+    import serial
+    from fake_sensor import FakeGen3Sensor
+    from gen3_transport import Gen3Transport
+    from gen3_protocol import (
+        FUNC_READ, FUNC_WRITE, VERSION_REG, VERSION_DATA_LEN, SENSOR_COMBINATION_REG,
+        SENSOR_COMBINATION_LEN, POINT_COUNT_REG, POINT_COUNT_LEN, DATA_TYPE_REG,
+        build_request_frame,
+    )
+
+    # 合力寄存器（协议示例中的0x0500）与一段分布力数据区；模拟器对任意地址应答
+    poll_requests = [(0x0500, 6), (0x1000, 360)]
+    polls = 5
+
+    def legacy(port):
+        # 原示例程序：每条指令发送后固定休眠0.2秒再读取全部可用字节
+        with serial.Serial(port, CONFIG['SENSOR_BAUDRATE'], timeout=1) as ser:
+            def command(func_code, reg_addr, length, data=b""):
+                ser.write(build_request_frame(func_code, reg_addr, length, data))
+                time.sleep(0.2)
+                return ser.read_all()
+
+            start = time.perf_counter()
+            command(FUNC_READ, VERSION_REG, VERSION_DATA_LEN)
+            command(FUNC_READ, SENSOR_COMBINATION_REG, SENSOR_COMBINATION_LEN)
+            command(FUNC_READ, POINT_COUNT_REG, POINT_COUNT_LEN)
+            command(FUNC_WRITE, DATA_TYPE_REG, 1, bytes([CONFIG['SENSOR_DATA_TYPE']]))
+            init = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for _ in range(polls):
+                for reg_addr, length in poll_requests:
+                    command(FUNC_READ, reg_addr, length)
+            return init, (time.perf_counter() - start) / polls
+
+    def optimized(port):
+        transport = Gen3Transport(port)
+        transport.open()
+        try:
+            start = time.perf_counter()
+            assert transport.initialize() is not None
+            init = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for _ in range(polls):
+                assert all(data is not None for data in transport.read_registers(poll_requests))
+            return init, (time.perf_counter() - start) / polls
+        finally:
+            transport.close()
+
+    with FakeGen3Sensor([]) as fake:
+        legacy_init, legacy_poll = legacy(fake.port)
+        fast_init, fast_poll = optimized(fake.port)
+    report('设备初始化', legacy_init, fast_init)
+    report('单次轮询（合力 + 分布力）', legacy_poll, fast_poll)
+
+
+@benchmark
+def bench_multi_sensor():
+    """多传感器并发采集：4个pty模拟传感器同时按921600波特率回放，各自的接收帧率"""
+    from trial_data import load_trial
+    from fake_sensor import FakeGen3Sensor, frames_from_trial
+    from multi_sensor import MultiSensorAcquisition
+
+    duration = 2.0
+    frames = [frames_from_trial(load_trial(path)) for path in sample_files()[:4]]
+    fakes = [FakeGen3Sensor(f).start() for f in frames]
+    try:
+        manager = MultiSensorAcquisition({f"sensor{i}": fake.port for i, fake in enumerate(fakes)})
+        start = time.perf_counter()
+        manager.start()
+        time.sleep(duration)
+        manager.stop()
+        elapsed = time.perf_counter() - start
+        line_rate = CONFIG['SENSOR_BAUDRATE'] / 10 / len(frames[0][0])
+        for name, counters in manager.counters().items():
+            print(f"  {name}: {counters['frames'] / elapsed:.0f} 帧/秒（线速率 {line_rate:.0f}），"
+                  f"LRC错误 {counters['lrc_failures']}，丢弃 {counters['bytes_discarded']} 字节")
+    finally:
+        for fake in fakes:
+            fake.close()
+
+
+@benchmark
+def bench_early_exit():
+    """在线预测：每次更新都对已采集数据完整预测 vs 增量特征 + 提前判定（每次更新10帧）"""
+    import logging
+    from core_processor import HardnessProcessor
+    from online_predictor import OnlinePredictor
+    from trial_data import load_trial, TrialData
+
+    # 采集初期触点数据为常数时完整预测会报错，测试期间屏蔽日志
+    logging.disable(logging.ERROR)
+    processor = HardnessProcessor()
+    processor.process_all_files()
+    processor.train_clustering_model()
+
+    step = 10
+    trials = [load_trial(path) for path in sample_files()]
+
+    def full_repredict(trial):
+        # 原实现：每次更新对已采集的全部帧重新提取特征并预测
+        for end in range(step, trial.num_frames + step, step):
+            label, _, _ = processor.predict_trial(
+                TrialData(trial.file_path, trial.header[:end], trial.taxels[:end]))
+        return label
+
+    def online(trial):
+        predictor = OnlinePredictor(processor)
+        for start in range(0, trial.num_frames, step):
+            estimate = predictor.update(trial.header[start:start + step], trial.taxels[start:start + step])
+            if estimate is not None and estimate.decided:
+                break
+        return estimate
+
+    baseline = best_time(lambda: [full_repredict(t) for t in trials], repeat=1)
+    optimized = best_time(lambda: [online(t) for t in trials], repeat=3)
+    report(f'{len(trials)} 个文件逐次更新', baseline, optimized)
+
+    frames_needed, frames_total, agree, decided = 0, 0, 0, 0
+    for trial in trials:
+        final_label = processor.predict_trial(trial)[0]
+        estimate = online(trial)
+        frames_needed += estimate.num_frames
+        frames_total += trial.num_frames
+        decided += estimate.decided
+        agree += estimate.label == final_label
+    logging.disable(logging.NOTSET)
+    print(f"  提前判定 {decided}/{len(trials)} 个文件，平均所需帧数 {frames_needed / frames_total:.0%}，"
+          f"与完整记录预测一致 {agree}/{len(trials)}")
+
+
+@benchmark
+def bench_press_segmentation():
+    """按压周期分割：逐帧状态机 vs 向量化滞回分割（样本文件拼接为连续记录）"""
+    from trial_data import load_trial
+    from press_segmentation import find_press_cycles, PressSegmenter
+
+    # 每个文件后补一段松开后的空闲数据，拼接成包含多次按压的长记录
+    pieces = []
+    for path in sample_files():
+        force_z = np.asarray(load_trial(path).force_z)
+        pieces.append(np.concatenate((force_z, np.linspace(force_z[-1], 0.0, 10), np.zeros(30))))
+    session = np.tile(np.concatenate(pieces), 20)
+
+    def per_frame():
+        # 逐帧判断状态切换并记录起压、峰值和松开帧
+        cycles, pressed, onset, peak = [], False, None, None
+        for i, value in enumerate(session):
+            if not pressed and value < CONFIG['PRESS_ONSET_FORCE']:
+                pressed, onset, peak = True, i, i
+            elif pressed:
+                if value < session[peak]:
+                    peak = i
+                if value > CONFIG['PRESS_RELEASE_FORCE']:
+                    pressed = False
+                    if i - onset >= CONFIG['PRESS_MIN_FRAMES']:
+                        cycles.append((onset, peak, i))
+        return cycles
+
+    expected = per_frame()
+    cycles = find_press_cycles(session)
+    assert [(c.onset, c.peak, c.release) for c in cycles] == expected
+
+    baseline = best_time(per_frame, repeat=3)
+    optimized = best_time(lambda: find_press_cycles(session), repeat=5)
+    report(f'{len(session)} 帧 / {len(cycles)} 次按压', baseline, optimized)
+
+    chunk = 16
+    def streaming():
+        segmenter = PressSegmenter()
+        for start in range(0, len(session), chunk):
+            segmenter.feed(session[start:start + chunk])
+    elapsed = best_time(streaming, repeat=3)
+    calls = -(-len(session) // chunk)
+    print(f"  流式分割（每次{chunk}帧）: {elapsed / calls * 1e6:.1f}us/次，{len(session) / elapsed:.0f} 帧/秒")
+
+
+@benchmark
+def bench_taxel_axis_features():
+    """触点法向力/切向力特征：逐触点按列号取分量 vs (帧数, 239, 3) 张量视图向量化"""
+    import math
+    from trial_data import load_trial
+    from taxel_features import taxel_axis_features
+
+    trial = load_trial(sample_files()[0])
+    frames = np.asarray(trial.frames)
+    num_points = CONFIG['PAXINI_NUM_POINTS']
+
+    def per_point(row):
+        # 逐触点按 13 + 3*i + 分量 计算列号
+        normal_sum = shear_sum = shear_x = shear_y = normal_max = shear_max = contact = 0.0
+        for i in range(num_points):
+            col = CONFIG['PAXINI_START_INDEX'] + 3 * i
+            x, y, z = row[col], row[col + 1], row[col + 2]
+            shear = math.hypot(x, y)
+            normal_sum += z
+            shear_sum += shear
+            shear_x += x
+            shear_y += y
+            normal_max = max(normal_max, z)
+            shear_max = max(shear_max, shear)
+            contact += z > CONFIG['TAXEL_CONTACT_THRESHOLD']
+        return normal_sum, normal_max, contact, shear_sum, shear_max, shear_x, shear_y
+
+    peak = trial.peak_index
+    expected = per_point(frames[peak])
+    features = taxel_axis_features(trial.peak_taxel_tensor())
+    assert np.allclose(expected, [features[name] for name in
+                                  ['normal_force_sum', 'normal_force_max', 'contact_points', 'shear_force_sum',
+                                   'shear_force_max', 'shear_x_sum', 'shear_y_sum']])
+
+    baseline = best_time(lambda: per_point(frames[peak]), number=10)
+    optimized = best_time(lambda: taxel_axis_features(trial.peak_taxel_tensor()), number=100)
+    report('峰值帧', baseline, optimized, unit='us')
+
+    baseline_all = best_time(lambda: [per_point(row) for row in frames], repeat=1)
+    optimized_all = best_time(lambda: taxel_axis_features(trial.taxel_tensor), number=10)
+    report(f'全部 {trial.num_frames} 帧', baseline_all, optimized_all)
+
+
+def corpus_files():
+    """data92下全部数据目录的CSV文件"""
+    data_root = os.path.dirname(CONFIG['DATA_DIR'])
+    return sorted(
+        os.path.join(root, f)
+        for root, _, files in os.walk(data_root) for f in files if f.endswith('.csv')
+    )
+
+
+@benchmark
+def bench_csv_engine():
+    """CSV解析：改动前的pandas解析 vs NumPy（np.loadtxt）（结果一致性见tests/test_csv_engine.py）"""
+    from trial_data import parse_csv_frames
+
+    def legacy_parse(file_path):
+        return pd.read_csv(file_path, header=None, names=[f'col_{i}' for i in range(CONFIG['NUM_COLUMNS'])],
+                           low_memory=False).to_numpy(dtype=np.float64)
+
+    files = corpus_files()
+    baseline = best_time(lambda: [legacy_parse(f) for f in files], repeat=3)
+    optimized = best_time(lambda: [parse_csv_frames(f, engine='numpy') for f in files], repeat=3)
+    report(f'解析 {len(files)} 个文件', baseline, optimized)
+    round_trip = best_time(lambda: [parse_csv_frames(f, engine='pandas') for f in files], repeat=3)
+    print(f"  pandas精确解析（回退路径）: {round_trip * 1000:.1f}ms")
+
+
+@benchmark
+def bench_import_time():
+    """启动耗时：菜单程序启动时导入全部依赖 vs 延迟导入（子进程冷启动，取多次最短）"""
+    import subprocess
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+
+    def run(code):
+        subprocess.run([sys.executable, '-c', code], cwd=base_dir, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    # 原main.py在显示菜单前导入的依赖
+    eager = ("import numpy, pandas, scipy.interpolate, scipy.sparse, sklearn.cluster, "
+             "sklearn.preprocessing, sklearn.metrics, matplotlib.pyplot, matplotlib.animation")
+    baseline = best_time(lambda: run(eager + "; import main"), repeat=3)
+    optimized = best_time(lambda: run("import main"), repeat=3)
+    report('import main', baseline, optimized)
+
+    check = "import sys; sys.argv = ['cli.py', 'check']; import cli; cli.main()"
+    baseline_check = best_time(lambda: run(eager + "; " + check), repeat=3)
+    optimized_check = best_time(lambda: run(check), repeat=3)
+    report('cli.py check', baseline_check, optimized_check)
+
+    heavy = subprocess.run(
+        [sys.executable, '-c', "import sys, cli; print(sorted(m for m in ('pandas', 'sklearn', 'scipy', 'matplotlib') if m in sys.modules))"],
+        cwd=base_dir, capture_output=True, text=True).stdout.strip()
+    print(f"  import cli 后已加载的重量级依赖: {heavy}")
+
+
+
+@benchmark
+def bench_model_format():
+    """模型加载：旧版pickle（sklearn对象）vs 目录格式（JSON + 内存映射数组），并校验两者预测一致"""
+    import logging
+    import subprocess
+    import tempfile
+    from core_processor import HardnessProcessor
+    from trial_data import load_trial
+    from model_format import LEGACY_MODEL_FILE
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    legacy_path = os.path.join(CONFIG['MODEL_DIR'], LEGACY_MODEL_FILE)
+    if not os.path.exists(legacy_path):
+        print(f"  未找到旧版模型 {legacy_path}，跳过")
+        return
+
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        bundle_path = os.path.join(tmp_dir, 'hardness_model')
+        legacy = HardnessProcessor()
+        legacy.load_model(legacy_path)
+        legacy.save_model(bundle_path)
+
+        bundle = HardnessProcessor()
+        baseline = best_time(lambda: HardnessProcessor().load_model(legacy_path))
+        optimized = best_time(lambda: bundle.load_model(bundle_path))
+        report('加载模型（进程内）', baseline, optimized)
+
+        def run(path):
+            code = f"import core_processor; core_processor.HardnessProcessor().load_model({path!r})"
+            subprocess.run([sys.executable, '-c', code], cwd=base_dir, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        baseline_cold = best_time(lambda: run(legacy_path), repeat=3)
+        optimized_cold = best_time(lambda: run(bundle_path), repeat=3)
+        report('导入并加载模型（子进程冷启动）', baseline_cold, optimized_cold)
+
+        code = (f"import sys, core_processor; core_processor.HardnessProcessor().load_model({bundle_path!r}); "
+                "print(sorted(m for m in ('sklearn', 'scipy', 'pandas') if m in sys.modules))")
+        heavy = subprocess.run([sys.executable, '-c', code], cwd=base_dir,
+                               capture_output=True, text=True).stdout.strip()
+        print(f"  加载目录格式模型后已导入的重量级依赖: {heavy}")
+
+        mismatched = 0
+        files = sample_files()
+        for file_path in files:
+            trial = load_trial(file_path)
+            label_a, grid_a, _ = legacy.predict_trial(trial)
+            label_b, grid_b, _ = bundle.predict_trial(trial)
+            if label_a != label_b or not np.allclose(grid_a, grid_b, rtol=0, atol=1e-9):
+                mismatched += 1
+        print(f"  等级映射: {bundle.label_map.tolist()}，{len(files)} 个文件中预测不一致 {mismatched} 个")
+        assert mismatched == 0
+    logging.disable(logging.NOTSET)
+
+
+@benchmark
+def bench_centroid_engine():
+    """聚类分配：逐样本 scaler.transform + KMeans.predict vs 整批向量化最近聚类中心，并校验标签完全一致"""
+    import logging
+    from core_processor import HardnessProcessor
+
+    logging.disable(logging.INFO)
+    processor = HardnessProcessor()
+    processor.process_all_files()
+    processor.train_clustering_model()
+    logging.disable(logging.NOTSET)
+
+    # 在训练样本附近扰动生成大批量特征
+    rng = np.random.default_rng(0)
+    base = processor.feature_matrix
+    features = (np.repeat(base, 1000, axis=0)
+                * rng.normal(1.0, 0.2, (len(base) * 1000, base.shape[1])))
+
+    def per_sample(rows):
+        return np.array([processor.cluster_model.predict(processor.scaler.transform([row]))[0]
+                         for row in rows])
+
+    subset = features[:2000]
+    baseline = best_time(lambda: per_sample(subset), repeat=1)
+    optimized = best_time(lambda: processor.engine.assign(subset))
+    report(f'{len(subset)} 个样本', baseline, optimized)
+
+    expected = processor.cluster_model.predict(processor.scaler.transform(features))
+    assignment = processor.engine.assign(features)
+    mismatched = int(np.sum(assignment.labels != expected))
+    print(f"  {len(features)} 个样本整批分配 {best_time(lambda: processor.engine.assign(features)) * 1000:.1f}ms，"
+          f"与KMeans.predict不一致 {mismatched} 个")
+    assert mismatched == 0
+    assert np.array_equal(per_sample(subset), assignment.labels[:len(subset)])
+
+
+@benchmark
+def bench_incremental_training():
+    """新增记录后的训练：全部文件重新训练 vs 从已有模型热启动只处理新文件（Welford统计量 + 小批量中心更新）"""
+    import copy
+    import logging
+    import tempfile
+    from core_processor import HardnessProcessor
+    from incremental_training import IncrementalTrainer
+
+    logging.disable(logging.WARNING)
+    data_dir = CONFIG['DATA_DIR']
+    file_paths = sorted(os.path.join(data_dir, f) for f in os.listdir(data_dir) if f.endswith('.csv'))
+
+    def full_retrain():
+        processor = HardnessProcessor()
+        processor.process_all_files()
+        processor.train_clustering_model()
+        return processor
+
+    full = full_retrain()
+    baseline = best_time(full_retrain, repeat=3)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # 先用除最后一个文件外的数据训练，再把最后一个文件作为新记录加入
+        for file_path in file_paths[:-1]:
+            os.symlink(file_path, os.path.join(tmp_dir, os.path.basename(file_path)))
+        CONFIG['DATA_DIR'] = tmp_dir
+        try:
+            base = full_retrain()
+            model_path = os.path.join(tmp_dir, 'hardness_model')
+            base.save_model(model_path)
+            os.symlink(file_paths[-1], os.path.join(tmp_dir, os.path.basename(file_paths[-1])))
+
+            warm = HardnessProcessor()
+            warm.load_model(model_path)
+            new_files = IncrementalTrainer(warm).new_files([tmp_dir])
+
+            def incremental():
+                processor = copy.deepcopy(warm)
+                trainer = IncrementalTrainer(processor)
+                trainer.update_from_files(new_files)
+                return processor, trainer
+
+            optimized = best_time(incremental, repeat=3)
+            updated, trainer = incremental()
+        finally:
+            CONFIG['DATA_DIR'] = data_dir
+    logging.disable(logging.NOTSET)
+
+    report(f'加入 {len(new_files)} 个新文件', baseline, optimized)
+    mean_error = np.max(np.abs(trainer.standardizer.mean - full.scaler.mean_))
+    scale_error = np.max(np.abs(trainer.standardizer.scale - full.scaler.scale_) / full.scaler.scale_)
+    print(f"  增量统计量与全量重新计算的差异: 均值 {mean_error:.2e}，标准差（相对） {scale_error:.2e}")
+    assert np.allclose(trainer.standardizer.mean, full.scaler.mean_)
+    assert np.allclose(trainer.standardizer.scale, full.scaler.scale_)
+
+    full_grades = full.engine.assign(full.feature_matrix).grades
+    updated_grades = updated.engine.assign(full.feature_matrix).grades
+    print(f"  {len(full_grades)} 个样本的等级与全量重新训练一致 {int(np.sum(full_grades == updated_grades))} 个")
+
+    # 更新代价只与新样本数有关，与已累计的样本数无关
+    rng = np.random.default_rng(0)
+    rows = full.feature_matrix[rng.integers(0, len(full.feature_matrix), 20000)]
+    rows = rows * rng.normal(1.0, 0.1, rows.shape)
+    for count in (2000, 20000):
+        seconds = best_time(lambda: IncrementalTrainer(copy.deepcopy(updated)).partial_fit(rows[:count]))
+        print(f"  增量更新 {count} 个样本: {seconds * 1000:.1f}ms")
+
+
+@benchmark
+def bench_model_selection():
+    """聚类数选择：全量轮廓系数 vs 抽样轮廓系数，以及k×种子扫描的串行 vs 多进程耗时（大样本量）"""
+    import logging
+    from sklearn.cluster import KMeans
+    from sklearn.metrics import silhouette_score
+    from sklearn.preprocessing import StandardScaler
+    from core_processor import HardnessProcessor
+    from model_selection import sweep_cluster_counts, choose_cluster_count, silhouette_sample_size
+
+    logging.disable(logging.INFO)
+    processor = HardnessProcessor()
+    processor.process_all_files()
+
+    # 在实际样本附近扰动生成两万次按压
+    rng = np.random.default_rng(0)
+    base = processor.feature_matrix
+    features = base[rng.integers(0, len(base), 20000)] * rng.normal(1.0, 0.05, (20000, base.shape[1]))
+    features_scaled = StandardScaler().fit_transform(features)
+    labels = KMeans(n_clusters=4, random_state=0, n_init=1).fit_predict(features_scaled)
+
+    sample_size = silhouette_sample_size(len(features_scaled))
+    full_score = silhouette_score(features_scaled, labels)
+    sampled_score = silhouette_score(features_scaled, labels, sample_size=sample_size, random_state=0)
+    baseline = best_time(lambda: silhouette_score(features_scaled, labels), repeat=1)
+    optimized = best_time(lambda: silhouette_score(features_scaled, labels, sample_size=sample_size,
+                                                   random_state=0), repeat=3)
+    report(f'{len(features_scaled)} 个样本的轮廓系数（抽样 {sample_size}）', baseline, optimized)
+    print(f"  全量 {full_score:.4f}，抽样 {sampled_score:.4f}")
+
+    options = dict(k_values=range(2, 7), seeds=[0, 1], bootstraps=2)
+    serial = best_time(lambda: sweep_cluster_counts(features_scaled, workers=1, **options), repeat=1)
+    workers = CONFIG['MODEL_SELECTION_WORKERS']
+    parallel = best_time(lambda: sweep_cluster_counts(features_scaled, workers=workers, **options), repeat=1)
+    report(f'扫描 k=2~6 × 2个种子 × 2次自助重采样（{workers} 进程，本机 {os.cpu_count()} 核）', serial, parallel)
+
+    scores = sweep_cluster_counts(features_scaled, workers=workers, **options)
+    logging.disable(logging.NOTSET)
+    for score in scores:
+        print(f"  k={score.k}: 轮廓系数 {score.silhouette:.4f}，稳定性 {score.stability:.3f}")
+    print(f"  选择 k={choose_cluster_count(scores)}")
+
+def main(argv):
+    selected = [b for b in BENCHMARKS if not argv or any(key in b.__name__ for key in argv)]
+    for bench in selected:
+        print(f"[{bench.__name__}] {bench.__doc__}")
+        bench()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
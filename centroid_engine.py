@@ -0,0 +1,87 @@
+"""最近聚类中心推理：整批特征一次标准化、一次距离计算，得到硬度等级、到各聚类中心的距离和置信度，不依赖sklearn"""
+from collections import namedtuple
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# labels: 最近聚类中心的原始聚类标签（与KMeans.predict相同）
+# grades: 经等级映射后的硬度等级（从0开始，刚度越大等级越高）
+# distances: 到每个聚类中心的欧氏距离 (样本数, 聚类数)
+# margins: 置信度 (d2 - d1) / d2，d1、d2为到最近和次近聚类中心的距离，取值0~1
+Assignment = namedtuple('Assignment', ['labels', 'grades', 'distances', 'margins'])
+
+
+def squared_distance_scores(X, centroids, centroid_sq=None):
+    """||c||² - 2x·c（省去与聚类中心无关的||x||²），与KMeans.predict的分配依据相同"""
+    if centroid_sq is None:
+        centroid_sq = np.einsum('ij,ij->i', centroids, centroids)
+    return centroid_sq - 2.0 * (X @ centroids.T)
+
+
+def nearest_centroid(X, centroids):
+    """最近聚类中心的标签；距离相同时取编号较小者（与KMeans.predict一致）"""
+    return np.argmin(squared_distance_scores(np.asarray(X, dtype=np.float64), centroids), axis=1)
+
+
+def centroid_distances(X, centroids):
+    """到每个聚类中心的欧氏距离 (样本数, 聚类数)"""
+    X = np.asarray(X, dtype=np.float64)
+    scores = squared_distance_scores(X, centroids)
+    return np.sqrt(np.maximum(scores + np.einsum('ij,ij->i', X, X)[:, np.newaxis], 0.0))
+
+
+class CentroidEngine:
+    """最近聚类中心推理引擎
+
+    标准化参数、聚类中心和等级映射在构造时转换为连续的float64数组，
+    assign()对 (样本数, 特征数) 的特征矩阵一次完成标准化和全部距离计算，
+    没有sklearn每次调用的输入检查开销。标签分配与 scaler.transform + KMeans.predict 完全一致。
+    """
+
+    def __init__(self, mean, scale, centroids, label_map=None):
+        self.mean = np.ascontiguousarray(mean, dtype=np.float64)
+        self.scale = np.ascontiguousarray(scale, dtype=np.float64)
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float64)
+        self.n_clusters = len(self.centroids)
+        if label_map is None:
+            label_map = np.arange(self.n_clusters)
+        self.label_map = np.asarray(label_map, dtype=np.int64)
+        self._centroid_sq = np.einsum('ij,ij->i', self.centroids, self.centroids)
+
+    @classmethod
+    def from_model(cls, scaler, cluster_model, label_map=None):
+        """由已训练的scaler（mean_/scale_）和聚类模型（cluster_centers_）构造"""
+        return cls(scaler.mean_, scaler.scale_, cluster_model.cluster_centers_, label_map)
+
+    def standardize(self, X):
+        """(X - mean) / scale，与StandardScaler.transform相同"""
+        X = np.array(X, dtype=np.float64, ndmin=2)
+        X -= self.mean
+        X /= self.scale
+        return X
+
+    def assign(self, X):
+        """对特征矩阵（未标准化）的每一行分配聚类，返回Assignment"""
+        X_scaled = self.standardize(X)
+        scores = squared_distance_scores(X_scaled, self.centroids, self._centroid_sq)
+        labels = np.argmin(scores, axis=1)
+
+        squared = scores + np.einsum('ij,ij->i', X_scaled, X_scaled)[:, np.newaxis]
+        distances = np.sqrt(np.maximum(squared, 0.0))
+
+        if self.n_clusters > 1:
+            nearest_two = np.partition(distances, 1, axis=1)
+            nearest, second = nearest_two[:, 0], nearest_two[:, 1]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                margins = np.where(second > 0, (second - nearest) / second, 0.0)
+        else:
+            margins = np.zeros(len(distances))
+
+        return Assignment(labels, self.label_map[labels], distances, margins)
+
+    def assign_one(self, feature_vector):
+        """单个样本：返回 (标签, 等级, 距离, 置信度)"""
+        result = self.assign(feature_vector)
+        return (int(result.labels[0]), int(result.grades[0]), result.distances[0],
+                float(result.margins[0]))
@@ -0,0 +1,150 @@
+"""非交互命令行入口，供调度系统按任务启动
+
+用法:
+    python cli.py train [--workers N] [--plot] [--select-k] [--sweep-workers N]
+    python cli.py update [数据目录 ...] [--workers N]
+    python cli.py predict 文件.csv [文件.csv ...]
+    python cli.py batch
+    python cli.py watch [--interval 秒]
+    python cli.py check
+    python cli.py migrate [旧模型.pkl]
+
+所有子命令都可以用 --data-dir 指定数据目录。除 train --plot 外均不加载绘图库，
+只有训练时才加载sklearn。
+"""
+import os
+import sys
+import argparse
+from config import CONFIG
+from model_format import default_model_path, find_model_path, LEGACY_MODEL_FILE
+
+
+def cmd_train(args):
+    from main import train_model, visualize_results
+
+    result = train_model(args.workers, args.select_k, args.sweep_workers)
+    if result is None:
+        return 1
+    if args.plot:
+        processor, hardness_scores, grid_scores_dict, clustering_info = result
+        visualize_results(processor, hardness_scores, grid_scores_dict, clustering_info)
+    print("离线训练完成！")
+    return 0
+
+
+def cmd_update(args):
+    from main import update_model
+
+    data_dirs = [os.path.abspath(d) for d in args.dirs] or None
+    return 1 if update_model(data_dirs, args.workers) is None else 0
+
+
+def cmd_predict(args):
+    from core_processor import HardnessProcessor
+    from trial_data import load_trial
+
+    processor = HardnessProcessor()
+    model_path = find_model_path()
+    if model_path is None or not processor.load_model(model_path):
+        print("模型加载失败，请先运行离线训练")
+        return 1
+
+    failed = 0
+    for file_path in args.files:
+        trial = load_trial(file_path)
+        if trial is None:
+            print(f"文件: {file_path} -> 预测失败")
+            failed += 1
+            continue
+        for sample_name, hardness_level, _, _ in processor.predict_cycles(trial):
+            if hardness_level is None:
+                print(f"文件: {sample_name} -> 预测失败")
+                failed += 1
+            else:
+                print(f"文件: {sample_name} -> 硬度等级: {hardness_level + 1}")
+    return 1 if failed else 0
+
+
+def cmd_batch(args):
+    from main import batch_prediction
+
+    return 1 if batch_prediction() is None else 0
+
+
+def cmd_watch(args):
+    from realtime_predictor import RealTimePredictor
+
+    return 0 if RealTimePredictor().run_headless(args.interval) else 1
+
+
+def cmd_check(args):
+    from main import check_data
+
+    return 0 if check_data() else 1
+
+
+def cmd_migrate(args):
+    from core_processor import HardnessProcessor
+
+    legacy_path = args.model or os.path.join(CONFIG['MODEL_DIR'], LEGACY_MODEL_FILE)
+    if not os.path.exists(legacy_path):
+        print(f"未找到旧版模型: {legacy_path}")
+        return 1
+
+    processor = HardnessProcessor()
+    if not processor.load_model(legacy_path) or not processor.save_model(default_model_path()):
+        print("模型转换失败")
+        return 1
+    print(f"已转换为新格式: {default_model_path()}")
+    print("旧版模型没有记录训练文件，增量训练（update）前需要先运行 train 重新训练")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="自动化硬度分级评估系统")
+    parser.add_argument('--data-dir', help="数据目录（默认CONFIG['DATA_DIR']）")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    train = subparsers.add_parser('train', help="离线训练模型并保存结果")
+    train.add_argument('--workers', type=int, help="特征提取进程数（默认CONFIG['FEATURE_WORKERS']）")
+    train.add_argument('--plot', action='store_true', help="训练完成后显示结果图")
+    train.add_argument('--select-k', action='store_true',
+                       help="按轮廓系数和稳定性从CONFIG['K_SWEEP_RANGE']中选择聚类数（替代NUM_CLUSTERS）")
+    train.add_argument('--sweep-workers', type=int,
+                       help="聚类数扫描进程数（默认CONFIG['MODEL_SELECTION_WORKERS']）")
+    train.set_defaults(func=cmd_train)
+
+    update = subparsers.add_parser('update', help="增量训练：从当前模型热启动，只处理新增的数据文件")
+    update.add_argument('dirs', nargs='*', help="数据目录（默认CONFIG['DATA_DIR']，可指定多个）")
+    update.add_argument('--workers', type=int, help="特征提取进程数（默认CONFIG['FEATURE_WORKERS']）")
+    update.set_defaults(func=cmd_update)
+
+    predict = subparsers.add_parser('predict', help="预测指定文件的硬度")
+    predict.add_argument('files', nargs='+', help="CSV文件路径")
+    predict.set_defaults(func=cmd_predict)
+
+    batch = subparsers.add_parser('batch', help="批量预测数据目录中的所有文件")
+    batch.set_defaults(func=cmd_batch)
+
+    watch = subparsers.add_parser('watch', help="无界面监控数据目录，新文件写入时输出预测结果")
+    watch.add_argument('--interval', type=float, help="轮询间隔（秒，默认CONFIG['REALTIME_UPDATE_INTERVAL']）")
+    watch.set_defaults(func=cmd_watch)
+
+    check = subparsers.add_parser('check', help="检查数据环境")
+    check.set_defaults(func=cmd_check)
+
+    migrate = subparsers.add_parser('migrate', help="将旧版pickle模型转换为新格式（需要sklearn）")
+    migrate.add_argument('model', nargs='?', help=f"旧版模型路径（默认MODEL_DIR下的{LEGACY_MODEL_FILE}）")
+    migrate.set_defaults(func=cmd_migrate)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.data_dir:
+        CONFIG['DATA_DIR'] = os.path.abspath(args.data_dir)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,27 +9,75 @@ CONFIG = {
     'COORDINATES_FILE': os.path.join(BASE_DIR, '指腹L5325 PX6AX-GEN3-CP-L5325-Omega PXSR-STDCP03A.xlsx'),
     'OUTPUT_DIR': os.path.join(BASE_DIR, 'results'),
     'MODEL_DIR': os.path.join(BASE_DIR, 'models'),
+    'MODEL_NAME': 'hardness_model',  # 模型目录名（MODEL_DIR下），旧版为hardness_model.pkl
+    
+    # 试验数据二进制缓存（位于各数据目录下的子目录）
+    'TRIAL_CACHE_ENABLED': True,
+    'TRIAL_CACHE_DIR_NAME': '.trial_cache',
+    
+    # CSV解析方式：'numpy'（默认，含非数值单元格时自动改用pandas）或 'pandas'
+    'CSV_ENGINE': 'numpy',
+    
+    # 特征提取并行进程数（1为串行）
+    'FEATURE_WORKERS': 1,
     
     # 聚类配置 - 由于只有12个样本，调整为4个等级
     'NUM_CLUSTERS': 4,
     'RANDOM_STATE': 42,
+    'INCREMENTAL_BATCH_SIZE': 256,  # 增量训练每批更新的样本数
+    'SILHOUETTE_SAMPLE_SIZE': 5000,  # 样本数超过该值时抽样计算轮廓系数（全量为O(n²)）
+    
+    # 聚类数选择（train --select-k）：在多个进程中扫描k和随机种子
+    'K_SWEEP_RANGE': (2, 8),         # 候选聚类数范围（含两端）
+    'K_SWEEP_SEEDS': 5,              # 每个k的随机种子数
+    'K_SWEEP_BOOTSTRAPS': 5,         # 每个种子的自助重采样次数（稳定性评分）
+    'K_SWEEP_MIN_STABILITY': 0.8,    # 入选所需的最低稳定性（调整兰德指数）
+    'MODEL_SELECTION_WORKERS': 4,    # 扫描使用的进程数
     
     # 数据列配置
+    'NUM_COLUMNS': 730,
     'FORCE_Z_INDEX': 2,
     'POSITION_Z_INDEX': 8,
     'TORQUE_INDICES': [3, 4, 5],
     'PAXINI_START_INDEX': 13,
     'PAXINI_NUM_POINTS': 239,
     
+    # 触点数据块（第13列起，239个触点 × 3个分量）
+    'TAXEL_LAYOUT': 'interleaved',  # 'interleaved': 每个触点依次x, y, z；'planar': 全部x、全部y、全部z
+    'PAXINI_AXIS': 2,               # 统计特征与硬度网格使用的分量（2为法向力），None为旧版的前239列
+    'TAXEL_CONTACT_THRESHOLD': 0,   # 法向力大于该值的触点计为接触点
+    
+    # 按压起点：Z向力首次低于该值（N）
+    'PRESS_ONSET_FORCE': -0.5,
+    
+    # 按压周期分割（一个文件包含多次按压时每次按压作为一个样本）
+    'PRESS_SEGMENTATION': True,
+    'PRESS_RELEASE_FORCE': -0.3,  # Z向力回升到该值以上视为松开（与起压阈值构成滞回区间）
+    'PRESS_MIN_FRAMES': 10,       # 短于该帧数的按压视为噪声
+    
     # 可视化配置
     'CHINESE_FONT': 'SimHei',
     'FIGURE_SIZE': (14, 10),
     
     # 网格配置
     'GRID_SHAPE': (9, 11),
+    'GRID_VIDEO_CHUNK_FRAMES': 1024,  # 逐帧网格分块处理的帧数
     
     # 实时预测配置
     'REALTIME_UPDATE_INTERVAL': 1000,
+    'REALTIME_RESULT_CACHE_SIZE': 256,  # 实时预测结果缓存条目数
+    'EARLY_EXIT_MARGIN': 0.4,         # 提前判定所需的置信度（最近/次近聚类中心距离差的比例）
+    'EARLY_EXIT_STABLE_UPDATES': 3,   # 置信度连续达标且等级不变的更新次数
+    
+    # GEN3高速通信集成板串口采集配置
+    'SENSOR_PORT': '/dev/ttyUSB0',
+    'SENSOR_BAUDRATE': 921600,
+    'SENSOR_READ_TIMEOUT': 0.05,   # 串口单次读取超时（秒）
+    'SENSOR_RESPONSE_TIMEOUT': 1.0,  # 指令响应等待上限（秒），响应到达即返回
+    'SENSOR_DATA_TYPE': 0x03,      # 自动回传数据类型：合力 + 分布力
+    'SENSOR_FORCE_LSB': 0.1,       # 合力Z向分辨率（N）
+    'SENSOR_RING_CAPACITY': 4096,  # 环形缓冲区帧数
+    'CAPTURE_INDEX_STRIDE': 256,   # 原始采集文件每隔多少条记录建立一项索引
 }
 
 # 创建必要的目录
@@ -44,6 +92,10 @@ FEATURE_NAMES = {
     'paxini_mean': 'Paxini均值',
     'paxini_std': 'Paxini标准差',
     'paxini_max': 'Paxini最大值',
+    'normal_force_sum': '法向力总和',
+    'shear_force_sum': '切向力总和',
+    'shear_ratio': '切向/法向力比',
+    'contact_points': '接触点数',
     'torque_x': 'X方向力矩',
     'torque_y': 'Y方向力矩', 
     'torque_z': 'Z方向力矩'
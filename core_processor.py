@@ -1,34 +1,52 @@
-import pandas as pd
 import numpy as np
 import os
 import pickle
-from scipy import stats
-from scipy.interpolate import griddata
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import silhouette_score
-import matplotlib.pyplot as plt
-from config import CONFIG, FEATURE_NAMES
+from concurrent.futures import ProcessPoolExecutor
+from config import CONFIG, BASE_DIR
+from trial_data import load_trial, as_trial
+from taxel_features import taxel_statistics, taxel_axis_features
+from press_segmentation import split_trial
+from grid_interpolation import build_grid_operator, apply_grid_operator
+from model_format import (ArrayScaler, CentroidModel, save_model_bundle, load_model_bundle,
+                          is_legacy_model, stiffness_label_map)
+from centroid_engine import CentroidEngine
 import logging
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# pandas、sklearn只在读取坐标表格、训练和保存结果时导入，预测路径不加载
+
+# numpy 2.0 起 trapz 更名为 trapezoid
+_trapz = getattr(np, 'trapezoid', None) or np.trapz
+
 class HardnessProcessor:
     def __init__(self):
         self.coordinates = None
         self.feature_matrix = None
         self.file_names = []
-        self.scaler = StandardScaler()
+        self.source_files = []
+        self.scaler = None
         self.cluster_model = None
+        self.label_map = None
+        self.engine = None
+        self.n_samples_seen = 0     # 标准化统计量对应的样本数（增量训练从此继续）
+        self.cluster_counts = None  # 各聚类的样本数
+        self.trained_files = []     # 已参与训练的文件（相对BASE_DIR的路径）
+        self.model_selection = None  # 聚类数选择结果（ModelSelection）
+        self.paxini_axis = CONFIG['PAXINI_AXIS']  # 特征提取使用的触点分量，加载模型时取模型中的值
         self.feature_names = []
+        self.failed_files = []
+        self.grid_operator = None
         
     def load_coordinates(self):
         """加载坐标数据"""
         try:
+            import pandas as pd
             df = pd.read_excel(CONFIG['COORDINATES_FILE'], sheet_name=0)
             self.coordinates = df[['X', 'Y', 'Z']].values
             logger.info(f"成功加载 {len(self.coordinates)} 个坐标点")
+            self.grid_operator = build_grid_operator(self.coordinates)
             return True
         except Exception as e:
             logger.error(f"加载坐标文件失败: {e}")
@@ -36,55 +54,80 @@ class HardnessProcessor:
     
     def extract_features_from_file(self, file_path):
         """从单个CSV文件提取特征 - 每个文件一个样本"""
+        trial = load_trial(file_path)
+        if trial is None:
+            return None
+        return self.extract_features_from_trial(trial)
+    
+    def extract_features_from_trial(self, trial):
+        """从已解析的试验数据提取特征"""
         try:
-            filename = os.path.basename(file_path)
-            df = pd.read_csv(file_path, header=None, 
-                           names=[f'col_{i}' for i in range(730)], 
-                           low_memory=False)
-            
             # 提取单个样本的特征
-            sample_features = self._extract_single_sample_features(df, filename)
+            sample_features = self._extract_single_sample_features(trial)
             return sample_features
             
         except Exception as e:
-            logger.error(f"处理文件 {file_path} 失败: {e}")
+            logger.error(f"处理文件 {trial.file_path} 失败: {e}")
             return None
     
-    def _extract_single_sample_features(self, df, filename):
+    def extract_cycle_features(self, trial):
+        """按按压周期提取特征，返回每次按压一个特征字典的列表（file_name为样本名）
+
+        CONFIG['PRESS_SEGMENTATION']关闭或只有一次按压时与extract_features_from_trial结果相同。
+        """
+        results = []
+        for name, sample in split_samples(trial):
+            features = self.extract_features_from_trial(sample)
+            if features:
+                features['file_name'] = name
+                results.append(features)
+        return results
+    
+    def extract_cycle_features_from_file(self, file_path):
+        """从单个CSV文件按按压周期提取特征"""
+        trial = load_trial(file_path)
+        if trial is None:
+            return []
+        return self.extract_cycle_features(trial)
+    
+    def sample_trials(self):
+        """按训练样本顺序依次返回 (样本名, TrialData)，与file_names一一对应"""
+        sample_names = set(self.file_names)
+        for filename in self.source_files:
+            trial = load_trial(os.path.join(CONFIG['DATA_DIR'], filename))
+            if trial is None:
+                continue
+            for name, sample in split_samples(trial):
+                if name in sample_names:
+                    yield name, sample
+    
+    def _extract_single_sample_features(self, trial):
         """为单个样本提取特征"""
         try:
-            # 基本列配置
-            fz_col = f'col_{CONFIG["FORCE_Z_INDEX"]}'
-            z_col = f'col_{CONFIG["POSITION_Z_INDEX"]}'
-            
-            # 数据清洗
-            if fz_col not in df.columns or z_col not in df.columns:
-                return None
-                
-            df[fz_col] = pd.to_numeric(df[fz_col], errors='coerce')
-            df[z_col] = pd.to_numeric(df[z_col], errors='coerce')
-            df.dropna(subset=[fz_col, z_col], inplace=True)
-            
-            if df.empty:
+            if trial.num_frames == 0:
                 return None
             
             # 提取全局特征
-            global_features = self._extract_global_features(df, fz_col, z_col)
+            global_features = self._extract_global_features(trial)
             if global_features is None:
                 return None
             
             # 提取Paxini统计特征
-            paxini_features = self._extract_paxini_statistical_features(df)
+            paxini_features = self._extract_paxini_statistical_features(trial)
+            
+            # 提取触点法向力/切向力特征
+            axis_features = self._extract_taxel_axis_features(trial)
             
             # 提取力矩特征
-            torque_features = self._extract_torque_features(df, global_features['peak_index'])
+            torque_features = self._extract_torque_features(trial, global_features['peak_index'])
             
             # 合并所有特征
             all_features = {}
             all_features.update(global_features)
             all_features.update(paxini_features)
+            all_features.update(axis_features)
             all_features.update(torque_features)
-            all_features['file_name'] = filename
+            all_features['file_name'] = trial.file_name
             
             return all_features
             
@@ -92,24 +135,21 @@ class HardnessProcessor:
             logger.error(f"提取样本特征失败: {e}")
             return None
     
-    def _extract_global_features(self, df, fz_col, z_col):
+    def _extract_global_features(self, trial):
         """提取全局特征"""
         try:
-            # 寻找峰值点
-            peak_index = df[fz_col].idxmin()
-            peak_point = df.loc[peak_index]
+            force_data = trial.force_z
+            position_data = trial.position_z
             
-            pre_peak_data = df.loc[:peak_index]
-            try:
-                start_index = pre_peak_data[pre_peak_data[fz_col] < -0.5].index[0]
-            except IndexError:
-                start_index = df.index[0]
+            # 寻找峰值点
+            peak_index = trial.peak_index
             
-            start_point = df.loc[start_index]
+            pre_peak_onset = np.flatnonzero(force_data[:peak_index + 1] < CONFIG['PRESS_ONSET_FORCE'])
+            start_index = pre_peak_onset[0] if len(pre_peak_onset) > 0 else 0
             
             # 计算刚度
-            delta_fz = peak_point[fz_col] - start_point[fz_col]
-            delta_z = start_point[z_col] - peak_point[z_col]
+            delta_fz = force_data[peak_index] - force_data[start_index]
+            delta_z = position_data[start_index] - position_data[peak_index]
             
             if abs(delta_z) < 1e-9:
                 return None
@@ -117,13 +157,10 @@ class HardnessProcessor:
             stiffness_K = abs(delta_fz / delta_z)
             
             # 提取力特征
-            force_data = df[fz_col].values
-            position_data = df[z_col].values
-            
             features = {
                 'stiffness': stiffness_K,
-                'start_force': start_point[fz_col],
-                'peak_force': peak_point[fz_col],
+                'start_force': force_data[start_index],
+                'peak_force': force_data[peak_index],
                 'max_force': np.max(force_data),
                 'min_force': np.min(force_data),
                 'mean_force': np.mean(force_data),
@@ -134,7 +171,7 @@ class HardnessProcessor:
             
             # 计算做功
             if len(force_data) > 1:
-                work_done = np.trapz(np.abs(force_data), position_data)
+                work_done = _trapz(np.abs(force_data), position_data)
                 features['work_done'] = work_done
             else:
                 features['work_done'] = 0
@@ -145,45 +182,22 @@ class HardnessProcessor:
             logger.error(f"提取全局特征失败: {e}")
             return None
     
-    def _extract_paxini_statistical_features(self, df):
+    def _extract_paxini_statistical_features(self, trial):
         """提取Paxini数据的统计特征"""
         try:
-            paxini_values = []
-            peak_index = df[f'col_{CONFIG["FORCE_Z_INDEX"]}'].idxmin()
-            
-            # 收集所有Paxini触点的峰值数据
-            for contact_idx in range(CONFIG['PAXINI_NUM_POINTS']):
-                paxini_col = f'col_{CONFIG["PAXINI_START_INDEX"] + contact_idx}'
-                if paxini_col in df.columns:
-                    value = pd.to_numeric(df.loc[peak_index, paxini_col], errors='coerce')
-                    if not np.isnan(value):
-                        paxini_values.append(value)
-            
-            if not paxini_values:
+            # 峰值时刻所有Paxini触点的数据
+            paxini_array = trial.peak_paxini(self.paxini_axis)
+            paxini_array = paxini_array[~np.isnan(paxini_array)]
+            
+            if len(paxini_array) == 0:
                 return {}
             
             # 计算统计特征
-            paxini_array = np.array(paxini_values)
+            features = taxel_statistics(paxini_array)
             
-            features = {
-                'paxini_mean': np.mean(paxini_array),
-                'paxini_std': np.std(paxini_array),
-                'paxini_max': np.max(paxini_array),
-                'paxini_min': np.min(paxini_array),
-                'paxini_range': np.ptp(paxini_array),
-                'paxini_median': np.median(paxini_array),
-                'paxini_q25': np.percentile(paxini_array, 25),
-                'paxini_q75': np.percentile(paxini_array, 75),
-            }
-            
-            # 添加分布特征
-            if len(paxini_array) > 1:
-                try:
-                    features['paxini_skew'] = stats.skew(paxini_array)
-                    features['paxini_kurtosis'] = stats.kurtosis(paxini_array)
-                except:
-                    features['paxini_skew'] = 0
-                    features['paxini_kurtosis'] = 0
+            # 分布特征至少需要两个触点
+            if len(paxini_array) < 2:
+                del features['paxini_skew'], features['paxini_kurtosis']
             
             return features
             
@@ -191,26 +205,33 @@ class HardnessProcessor:
             logger.error(f"提取Paxini统计特征失败: {e}")
             return {}
     
-    def _extract_torque_features(self, df, peak_index):
+    def _extract_taxel_axis_features(self, trial):
+        """提取峰值帧触点的法向力与切向力特征"""
+        try:
+            return taxel_axis_features(trial.peak_taxel_tensor())
+        except Exception as e:
+            logger.error(f"提取触点分量特征失败: {e}")
+            return {}
+    
+    def _extract_torque_features(self, trial, peak_index):
         """提取力矩特征"""
         try:
             torque_features = {}
-            torque_cols = [f'col_{i}' for i in CONFIG['TORQUE_INDICES']]
             
-            for i, col in enumerate(torque_cols):
-                if col in df.columns:
-                    torque_value = df.loc[peak_index, col]
-                    numeric_value = pd.to_numeric(torque_value, errors='coerce')
-                    if not np.isnan(numeric_value):
-                        torque_features[f'torque_{i}'] = numeric_value
+            for i, numeric_value in enumerate(trial.torque[peak_index]):
+                if not np.isnan(numeric_value):
+                    torque_features[f'torque_{i}'] = numeric_value
             
             return torque_features
         except Exception as e:
             logger.error(f"提取力矩特征失败: {e}")
             return {}
     
-    def process_all_files(self):
-        """处理所有数据文件"""
+    def process_all_files(self, workers=None):
+        """处理所有数据文件
+
+        workers > 1 时使用进程池并行提取特征，结果按文件顺序返回
+        """
         if not self.load_coordinates():
             return False
             
@@ -219,18 +240,28 @@ class HardnessProcessor:
         if not csv_files:
             logger.error(f"在 {CONFIG['DATA_DIR']} 中没有找到CSV文件")
             return False
-            
-        logger.info(f"找到 {len(csv_files)} 个CSV文件，开始处理...")
+        
+        file_paths = [os.path.join(CONFIG['DATA_DIR'], filename) for filename in csv_files]
+        results = self.extract_features_from_files(file_paths, workers)
         
         all_sample_features = []
+        self.file_names = []
+        self.source_files = []
+        self.trained_files = []
+        self.failed_files = []
         
-        for filename in csv_files:
-            file_path = os.path.join(CONFIG['DATA_DIR'], filename)
-            sample_features = self.extract_features_from_file(file_path)
-            
-            if sample_features:
-                all_sample_features.append(sample_features)
-                self.file_names.append(filename)
+        # 每次按压一个样本，一个文件可包含多个样本
+        for filename, file_features in zip(csv_files, results):
+            if file_features:
+                all_sample_features.extend(file_features)
+                self.file_names.extend(features['file_name'] for features in file_features)
+                self.source_files.append(filename)
+                self.trained_files.append(file_key(os.path.join(CONFIG['DATA_DIR'], filename)))
+            else:
+                self.failed_files.append(filename)
+        
+        if self.failed_files:
+            logger.warning(f"{len(self.failed_files)} 个文件特征提取失败: {self.failed_files}")
         
         if len(all_sample_features) == 0:
             logger.error("没有成功提取任何特征")
@@ -239,11 +270,36 @@ class HardnessProcessor:
         # 构建特征矩阵 - 每个文件一个样本
         self._build_feature_matrix(all_sample_features)
         
-        logger.info(f"成功处理 {len(all_sample_features)} 个样本，特征维度: {self.feature_matrix.shape}")
+        logger.info(f"成功处理 {len(all_sample_features)} 个样本（{len(self.source_files)} 个文件），特征维度: {self.feature_matrix.shape}")
         logger.info(f"特征列表: {self.feature_names}")
         
         return True
     
+    def extract_features_from_files(self, file_paths, workers=None):
+        """按按压周期提取多个文件的特征，返回与file_paths顺序一致的特征字典列表的列表
+
+        workers > 1 时使用进程池并行提取特征
+        """
+        if workers is None:
+            workers = CONFIG['FEATURE_WORKERS']
+        workers = min(workers, len(file_paths))
+        
+        logger.info(f"找到 {len(file_paths)} 个CSV文件，开始处理（进程数: {max(workers, 1)}）...")
+        if workers > 1:
+            return self._extract_features_parallel(file_paths, workers)
+        return [self.extract_cycle_features_from_file(file_path) for file_path in file_paths]
+    
+    def _extract_features_parallel(self, file_paths, workers):
+        """使用进程池提取特征，分块提交任务，结果顺序与file_paths一致"""
+        chunksize = max(1, len(file_paths) // (workers * 4))
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(_extract_features_task, file_paths,
+                                         [self.paxini_axis] * len(file_paths), chunksize=chunksize))
+        except Exception as e:
+            logger.error(f"并行特征提取失败，改为串行处理: {e}")
+            return [self.extract_cycle_features_from_file(file_path) for file_path in file_paths]
+    
     def _build_feature_matrix(self, all_sample_features):
         """构建特征矩阵"""
         # 找出所有特征键（排除非数值字段）
@@ -259,19 +315,39 @@ class HardnessProcessor:
         self.feature_matrix = np.array([[features.get(key, 0) for key in self.feature_names] 
                                       for features in all_sample_features])
     
-    def train_clustering_model(self):
-        """训练聚类模型"""
+    def train_clustering_model(self, n_clusters=None, select_k=False, sweep_workers=None):
+        """训练聚类模型
+
+        n_clusters默认取CONFIG['NUM_CLUSTERS']；select_k为True时先并行扫描候选聚类数
+        （见model_selection，进程数sweep_workers默认CONFIG['MODEL_SELECTION_WORKERS']），
+        使用选出的k并把评分记录到模型和结果中。
+        """
         if self.feature_matrix is None:
             logger.error("特征矩阵未构建")
             return None
         
         try:
+            from sklearn.cluster import KMeans
+            from sklearn.preprocessing import StandardScaler
+            from sklearn.metrics import silhouette_score
+            
             # 数据标准化
+            self.scaler = StandardScaler()
             features_scaled = self.scaler.fit_transform(self.feature_matrix)
             
-            # 调整聚类数量，确保不超过样本数
             n_samples = len(self.feature_matrix)
-            n_clusters = min(CONFIG['NUM_CLUSTERS'], n_samples - 1)
+            self.model_selection = None
+            if select_k:
+                from model_selection import select_cluster_count
+                self.model_selection = select_cluster_count(features_scaled, sweep_workers)
+                n_clusters = self.model_selection.k
+            elif n_clusters is None:
+                n_clusters = CONFIG['NUM_CLUSTERS']
+            
+            # 调整聚类数量，确保不超过样本数
+            if n_clusters > n_samples - 1:
+                logger.warning(f"聚类数 {n_clusters} 超过样本数-1，调整为 {n_samples - 1}")
+                n_clusters = n_samples - 1
             if n_clusters < 2:
                 logger.error("样本数量太少，无法进行聚类")
                 return None
@@ -286,7 +362,9 @@ class HardnessProcessor:
             
             # 计算轮廓系数
             if len(set(labels)) > 1:
-                score = silhouette_score(features_scaled, labels)
+                from model_selection import silhouette_sample_size
+                score = silhouette_score(features_scaled, labels, sample_size=silhouette_sample_size(n_samples),
+                                         random_state=CONFIG['RANDOM_STATE'])
             else:
                 score = -1
                 
@@ -294,13 +372,17 @@ class HardnessProcessor:
             
             # 根据刚度重新映射标签（刚度越大，硬度等级越高）
             remapped_labels = self._remap_labels_by_stiffness(labels)
+            self.n_samples_seen = n_samples
+            self.cluster_counts = np.bincount(labels, minlength=n_clusters)
+            self.engine = CentroidEngine.from_model(self.scaler, self.cluster_model, self.label_map)
             
             clustering_info = {
                 'algorithm': 'KMeans',
                 'optimal_clusters': n_clusters,
                 'silhouette_score': score,
                 'labels': remapped_labels,
-                'original_labels': labels
+                'original_labels': labels,
+                'model_selection': self.model_selection
             }
             
             return clustering_info
@@ -321,149 +403,251 @@ class HardnessProcessor:
             
             if stiffness_idx is None:
                 logger.warning("未找到刚度特征，使用原始标签")
+                self.label_map = np.arange(self.cluster_model.n_clusters)
                 return labels
             
-            # 计算每个聚类的平均刚度
-            cluster_stiffness = []
-            unique_labels = np.unique(labels)
-            
-            for label in unique_labels:
-                mask = (labels == label)
-                avg_stiffness = np.mean(self.feature_matrix[mask, stiffness_idx])
-                cluster_stiffness.append((label, avg_stiffness))
-            
-            # 按刚度排序（从低到高）
-            cluster_stiffness.sort(key=lambda x: x[1])
+            # 计算每个聚类的平均刚度（没有样本的聚类排在最后）
+            n_clusters = self.cluster_model.n_clusters
+            cluster_stiffness = np.full(n_clusters, np.inf)
+            for label in np.unique(labels):
+                cluster_stiffness[label] = np.mean(self.feature_matrix[labels == label, stiffness_idx])
             
-            # 创建映射：刚度最低的为1级，最高的为n_clusters级
-            label_mapping = {}
-            for hardness_level, (original_label, _) in enumerate(cluster_stiffness, 1):
-                label_mapping[original_label] = hardness_level - 1  # 从0开始
+            # 按刚度从低到高排序，得到 原始标签 -> 硬度等级（从0开始）的查找表，预测时使用同一张表
+            self.label_map = np.empty(n_clusters, dtype=np.int64)
+            self.label_map[np.argsort(cluster_stiffness, kind='stable')] = np.arange(n_clusters)
+            remapped_labels = self.label_map[labels]
             
-            # 应用映射
-            remapped_labels = np.array([label_mapping[label] for label in labels])
-            
-            logger.info(f"标签重映射完成: {dict(zip(unique_labels, remapped_labels[::len(unique_labels)]))}")
+            logger.info(f"标签重映射完成: {dict(enumerate(self.label_map.tolist()))}")
             return remapped_labels
             
         except Exception as e:
             logger.error(f"标签重映射失败: {e}")
+            self.label_map = np.arange(self.cluster_model.n_clusters)
             return labels
     
-    def create_hardness_grid_for_sample(self, file_path):
-        """为单个样本创建硬度分数网格"""
+    def create_hardness_grid_for_sample(self, trial):
+        """为单个样本创建硬度分数网格（接受文件路径或TrialData）"""
         if self.coordinates is None:
             logger.error("坐标数据未加载")
             return None
         
         try:
-            # 提取该样本的Paxini数据
-            df = pd.read_csv(file_path, header=None, 
-                           names=[f'col_{i}' for i in range(730)], 
-                           low_memory=False)
-            
-            # 获取峰值点的Paxini数据
-            peak_index = df[f'col_{CONFIG["FORCE_Z_INDEX"]}'].idxmin()
-            paxini_values = []
-            
-            for contact_idx in range(CONFIG['PAXINI_NUM_POINTS']):
-                paxini_col = f'col_{CONFIG["PAXINI_START_INDEX"] + contact_idx}'
-                if paxini_col in df.columns:
-                    value = pd.to_numeric(df.loc[peak_index, paxini_col], errors='coerce')
-                    if not np.isnan(value):
-                        paxini_values.append(value)
-                    else:
-                        paxini_values.append(0)
-                else:
-                    paxini_values.append(0)
-            
-            # 使用坐标数据进行网格插值
-            points = self.coordinates[:, :2]  # 只使用XY坐标
-            values = np.array(paxini_values)
-            
-            # 创建规则网格
-            x_min, x_max = points[:, 0].min(), points[:, 0].max()
-            y_min, y_max = points[:, 1].min(), points[:, 1].max()
-            
-            grid_x, grid_y = np.mgrid[x_min:x_max:CONFIG['GRID_SHAPE'][1]*1j, 
-                                      y_min:y_max:CONFIG['GRID_SHAPE'][0]*1j]
-            
-            # 插值到规则网格
-            grid_scores = griddata(
-                points, values, (grid_x, grid_y), 
-                method='linear', fill_value=np.mean(values)
-            )
+            trial = as_trial(trial)
+            
+            # 峰值点的Paxini数据（按模型记录的分量）经预计算的插值算子映射到规则网格（缺失值按0处理）
+            if self.grid_operator is None:
+                self.grid_operator = build_grid_operator(self.coordinates)
             
-            return grid_scores.T
+            return apply_grid_operator(self.grid_operator, trial.peak_paxini(self.paxini_axis))
             
         except Exception as e:
             logger.error(f"创建硬度网格失败: {e}")
             # 返回一个默认网格
             return np.full(CONFIG['GRID_SHAPE'], 128)  # 中性值
     
-    def predict_single_file(self, file_path):
-        """预测单个文件的硬度"""
-        if self.cluster_model is None or self.scaler is None:
-            logger.error("模型未训练")
-            return None, None, None
-            
+    def create_grid_video(self, trial, step=1, output_path=None):
+        """为整段记录逐帧生成硬度网格，分块写入 (帧数, 9, 11) 的.npy文件
+
+        每step帧取一帧，输出第i帧对应原记录第i*step帧。返回输出文件路径。
+        """
+        if self.coordinates is None:
+            logger.error("坐标数据未加载")
+            return None
+        
         try:
-            # 提取特征
-            sample_features = self.extract_features_from_file(file_path)
-            if not sample_features:
-                return None, None, None
-            
-            # 构建特征向量
-            feature_vector = [sample_features.get(key, 0) for key in self.feature_names]
+            trial = as_trial(trial)
+            if self.grid_operator is None:
+                self.grid_operator = build_grid_operator(self.coordinates)
+            
+            if output_path is None:
+                base_name = os.path.splitext(trial.file_name)[0]
+                output_path = os.path.join(CONFIG['OUTPUT_DIR'], f'{base_name}_grid_video.npy')
+            
+            frame_indices = np.arange(0, trial.num_frames, step)
+            paxini = trial.paxini_for(self.paxini_axis)
+            video = np.lib.format.open_memmap(
+                output_path, mode='w+', dtype=np.float32,
+                shape=(len(frame_indices),) + tuple(CONFIG['GRID_SHAPE'])
+            )
             
-            # 预测
-            features_scaled = self.scaler.transform([feature_vector])
-            label = self.cluster_model.predict(features_scaled)[0]
+            # 分块批量插值，避免整段记录同时驻留内存
+            chunk = CONFIG['GRID_VIDEO_CHUNK_FRAMES']
+            for start in range(0, len(frame_indices), chunk):
+                indices = frame_indices[start:start + chunk]
+                video[start:start + len(indices)] = apply_grid_operator(self.grid_operator, paxini[indices])
             
-            # 生成网格
-            grid_scores = self.create_hardness_grid_for_sample(file_path)
+            video.flush()
+            del video
             
-            return label, grid_scores, sample_features
+            logger.info(f"已生成 {len(frame_indices)} 帧硬度网格: {output_path}")
+            return output_path
             
         except Exception as e:
-            logger.error(f"预测失败: {e}")
+            logger.error(f"生成逐帧硬度网格失败: {e}")
+            return None
+    
+    def predict_single_file(self, file_path):
+        """预测单个文件的硬度"""
+        trial = load_trial(file_path)
+        if trial is None:
             return None, None, None
+        return self.predict_trial(trial)
+    
+    def predict_trial(self, trial):
+        """预测已解析试验数据的硬度等级（从0开始，与训练结果的等级顺序一致）- 特征提取与网格生成共用同一份解析结果"""
+        _, label, grid_scores, sample_features = self.predict_samples([(trial.file_name, trial)])[0]
+        return label, grid_scores, sample_features
+    
+    def predict_cycles(self, trial):
+        """按按压周期分别预测，返回 [(样本名, 硬度等级, 网格得分, 特征)]"""
+        return self.predict_samples(split_samples(trial))
+    
+    def predict_samples(self, samples):
+        """批量预测 [(样本名, TrialData)]（可为生成器），返回 [(样本名, 硬度等级, 网格得分, 特征)]
+        
+        特征与网格逐个样本生成（不保留TrialData），聚类分配对全部样本一次向量化完成，
+        再经模型中的等级映射表（label_map）转换为按刚度排序的硬度等级。
+        失败的样本对应 (样本名, None, None, None)。
+        """
+        if self.engine is None:
+            logger.error("模型未训练")
+            return [(name, None, None, None) for name, _ in samples]
+        
+        names, vectors, grids, features_list = [], [], [], []
+        for name, trial in samples:
+            sample_features = self.extract_features_from_trial(trial)
+            names.append(name)
+            features_list.append(sample_features or None)
+            if not sample_features:
+                vectors.append(None)
+                grids.append(None)
+                continue
+            vectors.append([sample_features.get(key, 0) for key in self.feature_names])
+            grids.append(self.create_hardness_grid_for_sample(trial))
+        
+        results = [(name, None, None, None) for name in names]
+        valid = []
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                continue
+            if np.all(np.isfinite(vector)):
+                valid.append(i)
+            else:
+                logger.error(f"预测失败: {names[i]} 的特征含有无效值")
+        if not valid:
+            return results
+        
+        try:
+            assignment = self.engine.assign([vectors[i] for i in valid])
+            for row, i in enumerate(valid):
+                results[i] = (names[i], int(assignment.grades[row]), grids[i], features_list[i])
+        except Exception as e:
+            logger.error(f"预测失败: {e}")
+        return results
     
     def save_model(self, model_path):
-        """保存模型"""
+        """保存模型（目录格式，见model_format）"""
         try:
-            with open(model_path, 'wb') as f:
-                pickle.dump({
-                    'scaler': self.scaler,
-                    'cluster_model': self.cluster_model,
-                    'feature_names': self.feature_names,
-                    'coordinates': self.coordinates
-                }, f)
+            grid_operator = self.grid_operator
+            if grid_operator is None:
+                grid_operator = build_grid_operator(self.coordinates)
+            if hasattr(grid_operator, 'toarray'):
+                grid_operator = grid_operator.toarray()
+            label_map = self.label_map
+            if label_map is None:
+                label_map = np.arange(self.cluster_model.n_clusters)
+            
+            arrays = {
+                'scaler_mean': np.asarray(self.scaler.mean_, dtype=np.float64),
+                'scaler_scale': np.asarray(self.scaler.scale_, dtype=np.float64),
+                'scaler_var': getattr(self.scaler, 'var_', None),
+                'centroids': np.asarray(self.cluster_model.cluster_centers_, dtype=np.float64),
+                'coordinates': np.asarray(self.coordinates, dtype=np.float64),
+                'grid_operator': np.asarray(grid_operator, dtype=np.float64),
+            }
+            meta = {
+                'feature_names': list(self.feature_names),
+                'n_clusters': int(self.cluster_model.n_clusters),
+                'label_map': [int(level) for level in label_map],
+                'paxini_axis': self.paxini_axis,
+                'grid_shape': list(CONFIG['GRID_SHAPE']),
+                'n_samples_seen': int(self.n_samples_seen),
+                'cluster_counts': None if self.cluster_counts is None else [int(c) for c in self.cluster_counts],
+                'trained_files': list(self.trained_files),
+                'model_selection': None if self.model_selection is None else {
+                    'k': int(self.model_selection.k),
+                    'scores': [score._asdict() for score in self.model_selection.scores],
+                },
+            }
+            save_model_bundle(model_path, arrays, meta)
             logger.info(f"模型已保存到: {model_path}")
             return True
         except Exception as e:
             logger.error(f"保存模型失败: {e}")
             return False
     
-    def load_model(self, model_path):
-        """加载模型"""
+    def load_model(self, model_path, mmap_mode='r'):
+        """加载模型：目录格式不需要sklearn；旧版.pkl文件按原方式读取
+
+        目录格式的数组默认内存映射；之后要覆盖同一模型目录时（增量训练）传入mmap_mode=None
+        读入内存，Windows下无法替换仍被映射的文件。
+        """
         try:
-            with open(model_path, 'rb') as f:
-                model_data = pickle.load(f)
-            
-            self.scaler = model_data['scaler']
-            self.cluster_model = model_data['cluster_model']
-            self.feature_names = model_data['feature_names']
-            self.coordinates = model_data['coordinates']
+            if is_legacy_model(model_path):
+                model_data = self._load_legacy_model(model_path)
+            else:
+                arrays, model_data = load_model_bundle(model_path, mmap_mode)
+                self.scaler = ArrayScaler(arrays['scaler_mean'], arrays['scaler_scale'], arrays['scaler_var'])
+                self.cluster_model = CentroidModel(arrays['centroids'])
+                self.label_map = np.asarray(model_data['label_map'])
+                self.n_samples_seen = model_data.get('n_samples_seen', 0)
+                self.cluster_counts = model_data.get('cluster_counts')
+                self.trained_files = model_data.get('trained_files', [])
+                self.feature_names = model_data['feature_names']
+                self.coordinates = arrays['coordinates']
+                self.grid_operator = arrays['grid_operator']
+                if tuple(model_data.get('grid_shape', ())) != tuple(CONFIG['GRID_SHAPE']):
+                    self.grid_operator = None
+            
+            # 特征提取与网格使用模型训练时的触点分量（旧模型为触点数据块前239列），而不是当前配置
+            self.paxini_axis = model_data.get('paxini_axis')
+            if self.paxini_axis != CONFIG['PAXINI_AXIS']:
+                logger.warning(f"模型训练时的触点分量({self.paxini_axis})与当前配置({CONFIG['PAXINI_AXIS']})不同，"
+                               f"按模型的分量提取特征；如需使用当前配置请重新训练")
+            
+            # 模型中没有插值算子或网格尺寸不同时重新生成
+            if self.grid_operator is None or self.grid_operator.shape[1] != len(self.coordinates):
+                self.grid_operator = build_grid_operator(self.coordinates)
+            self.engine = CentroidEngine.from_model(self.scaler, self.cluster_model, self.label_map)
             logger.info(f"模型已从 {model_path} 加载")
             return True
         except Exception as e:
             logger.error(f"加载模型失败: {e}")
             return False
     
+    def _load_legacy_model(self, model_path):
+        """读取旧版pickle模型（需要sklearn），等级映射由聚类中心刚度推算"""
+        with open(model_path, 'rb') as f:
+            model_data = pickle.load(f)
+        
+        self.scaler = model_data['scaler']
+        self.cluster_model = model_data['cluster_model']
+        self.feature_names = model_data['feature_names']
+        self.coordinates = model_data['coordinates']
+        self.grid_operator = model_data.get('grid_operator')
+        self.label_map = stiffness_label_map(self.cluster_model.cluster_centers_, self.scaler.mean_,
+                                             self.scaler.scale_, self.feature_names)
+        self.n_samples_seen = int(getattr(self.scaler, 'n_samples_seen_', 0))
+        labels = getattr(self.cluster_model, 'labels_', None)
+        if labels is not None:
+            self.cluster_counts = np.bincount(labels, minlength=self.cluster_model.n_clusters)
+        return model_data
+    
     def save_results(self, hardness_scores, grid_scores_dict, clustering_info):
         """保存结果"""
         try:
+            import pandas as pd
+            
             # 保存样本硬度分数
             results_df = pd.DataFrame({
                 'file_name': self.file_names,
@@ -495,10 +679,46 @@ class HardnessProcessor:
                 for level in range(clustering_info['optimal_clusters']):
                     count = np.sum(hardness_scores == level)
                     f.write(f"  硬度等级 {level + 1}: {count} 个样本\n")
+                
+                selection = clustering_info.get('model_selection')
+                if selection is not None:
+                    f.write(f"\n聚类数选择（选择 k={selection.k}）:\n")
+                    for score in selection.scores:
+                        f.write(f"  k={score.k}: 轮廓系数 {score.silhouette:.4f}±{score.silhouette_std:.4f}，"
+                                f"稳定性 {score.stability:.3f}\n")
+            
+            # 保存聚类数选择的评分
+            if clustering_info.get('model_selection') is not None:
+                selection_path = os.path.join(CONFIG['OUTPUT_DIR'], 'model_selection.csv')
+                pd.DataFrame(clustering_info['model_selection'].scores).to_csv(selection_path, index=False)
             
             logger.info(f"结果已保存到 {CONFIG['OUTPUT_DIR']}")
             return True
             
         except Exception as e:
             logger.error(f"保存结果失败: {e}")
-            return False
\ No newline at end of file
+            return False
+
+
+def file_key(file_path):
+    """模型中记录已训练文件所用的键：相对BASE_DIR的路径，无法表示为相对路径时为绝对路径"""
+    file_path = os.path.abspath(file_path)
+    try:
+        return os.path.relpath(file_path, BASE_DIR)
+    except ValueError:
+        # Windows下与BASE_DIR不在同一驱动器
+        return file_path
+
+
+def split_samples(trial):
+    """按配置拆分按压周期，返回 [(样本名, TrialData)]"""
+    if CONFIG['PRESS_SEGMENTATION']:
+        return split_trial(trial)
+    return [(trial.file_name, trial)]
+
+
+def _extract_features_task(file_path, paxini_axis):
+    """进程池任务：按按压周期提取单个文件的特征（paxini_axis与主进程的处理器一致）"""
+    processor = HardnessProcessor()
+    processor.paxini_axis = paxini_axis
+    return processor.extract_cycle_features_from_file(file_path)
@@ -0,0 +1,212 @@
+"""基于pty的GEN3高速通信集成板模拟器，用于在没有硬件时调试串口采集"""
+import os
+import pty
+import tty
+import time
+import select
+import threading
+import numpy as np
+from config import CONFIG
+from raw_capture import CaptureReader
+from gen3_protocol import (
+    REQ_HEAD, RESP_HEAD_GENERAL, FUNC_READ, FUNC_WRITE, VERSION_REG, SENSOR_COMBINATION_REG,
+    DATA_TYPE_REG, AUTO_PUSH_REG, POINT_COUNT_REG, DATA_TYPE_RESULTANT, DATA_TYPE_TAXELS,
+    encode_auto_push_frame, calc_lrc,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 请求帧固定部分：Head(2) + 预留(1) + 功能码(1) + 寄存器(2) + 长度(2) + LRC(1)
+_REQUEST_OVERHEAD = 9
+
+
+def encode_sensor_payload(taxels, resultant=None, data_type=None):
+    """将一帧触点数据（测点数*3，Fx/Fy/Fz交替）编码为自动回传有效数据"""
+    if data_type is None:
+        data_type = CONFIG['SENSOR_DATA_TYPE']
+
+    parts = []
+    if data_type & DATA_TYPE_RESULTANT:
+        if resultant is None:
+            points = np.asarray(taxels).reshape(-1, 3)
+            resultant = [points[:, 0].sum(), points[:, 1].sum(), points[:, 2].sum()]
+        parts.append(np.clip(np.rint(resultant), [-128, -128, 0], [127, 127, 255]))
+    if data_type & DATA_TYPE_TAXELS:
+        points = np.rint(np.asarray(taxels, dtype=np.float64)).reshape(-1, 3)
+        parts.append(np.clip(points, [-128, -128, 0], [127, 127, 255]).ravel())
+
+    values = np.concatenate(parts).astype(np.int16)
+    return (values & 0xFF).astype(np.uint8).tobytes()
+
+
+def frames_from_trial(trial, data_type=None):
+    """将记录的试验数据转换为自动回传帧序列（合力Z向取自记录的力传感器数据）"""
+    frames = []
+    taxels = np.nan_to_num(np.asarray(trial.taxels, dtype=np.float64))
+    force_z = np.nan_to_num(trial.force_z)
+    for row, fz in zip(taxels, force_z):
+        points = row.reshape(-1, 3)
+        resultant = [points[:, 0].sum(), points[:, 1].sum(), -fz / CONFIG['SENSOR_FORCE_LSB']]
+        frames.append(encode_auto_push_frame(encode_sensor_payload(row, resultant, data_type)))
+    return frames
+
+
+class FakeGen3Sensor:
+    """GEN3高速通信集成板模拟器
+
+    创建一对伪终端，从端路径（port）可像真实串口一样用pyserial打开。
+    模拟单个模组接入时的寄存器（版本号、模组组合、数据类型、分布力点数），应答读写请求；
+    收到开启自动回传指令后回放给定的帧（或任意字节块）：默认按串口波特率的传输时序
+    （每字节10位），给出timestamps（秒）时按记录的时间间隔；speed为N时N倍速，
+    为None时不等待、以最快速度写出。
+    """
+
+    def __init__(self, frames, baudrate=None, loop=True, num_points=None,
+                 timestamps=None, speed=1.0):
+        self.frames = list(frames)
+        self.baudrate = baudrate or CONFIG['SENSOR_BAUDRATE']
+        self.loop = loop
+        self.timestamps = timestamps
+        self.speed = speed
+        self.streaming = False
+        self.frames_sent = 0
+
+        self.registers = bytearray(0x10000)
+        self.registers[VERSION_REG:VERSION_REG + 6] = b"V1.0.0"
+        self.registers[SENSOR_COMBINATION_REG] = 0x01
+        self.registers[DATA_TYPE_REG] = CONFIG['SENSOR_DATA_TYPE']
+        num_points = num_points or CONFIG['PAXINI_NUM_POINTS']
+        self.registers[POINT_COUNT_REG:POINT_COUNT_REG + 2] = num_points.to_bytes(2, "little")
+
+        self._master, self._slave = pty.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+
+        self._requests = bytearray()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_capture(cls, file_path, speed=1.0, loop=False, num_points=None):
+        """以原始采集文件中的字节和时序作为回放内容"""
+        with CaptureReader(file_path) as capture:
+            records = list(capture.records())
+            baudrate = capture.baudrate
+        timestamps = [timestamp_ns / 1e9 for timestamp_ns, _ in records]
+        chunks = [data for _, data in records]
+        return cls(chunks, baudrate=baudrate, loop=loop, num_points=num_points,
+                   timestamps=timestamps, speed=speed)
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="fake-gen3-sensor", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        for fd in (self._master, self._slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def byte_time(self):
+        """单字节传输时间（起始位 + 8数据位 + 停止位）"""
+        return 10.0 / self.baudrate
+
+    def _run(self):
+        index = 0
+        next_send = time.monotonic()
+        while not self._stop_event.is_set():
+            timeout = 0.05
+            if self.streaming:
+                timeout = max(0.0, next_send - time.monotonic())
+
+            readable, _, _ = select.select([self._master], [], [], timeout)
+            if readable:
+                was_streaming = self.streaming
+                self._handle_requests(os.read(self._master, 4096))
+                if self.streaming and not was_streaming:
+                    next_send = time.monotonic()
+                continue
+
+            if not self.streaming or not self.frames:
+                continue
+            if index >= len(self.frames):
+                if not self.loop:
+                    self.streaming = False
+                    continue
+                index = 0
+
+            frame = self.frames[index]
+            os.write(self._master, frame)
+            next_send += self._interval(index, frame)
+            index += 1
+            self.frames_sent += 1
+
+    def _interval(self, index, frame):
+        """第index帧写出后到下一帧的等待时间"""
+        if not self.speed:
+            return 0.0
+        if self.timestamps is not None and index + 1 < len(self.timestamps):
+            return (self.timestamps[index + 1] - self.timestamps[index]) / self.speed
+        return len(frame) * self.byte_time() / self.speed
+
+    def _handle_requests(self, data):
+        self._requests += data
+        while True:
+            start = self._requests.find(REQ_HEAD)
+            if start < 0 or len(self._requests) - start < _REQUEST_OVERHEAD:
+                return
+            del self._requests[:start]
+
+            func_code = self._requests[3]
+            reg_addr = int.from_bytes(self._requests[4:6], "little")
+            data_len = int.from_bytes(self._requests[6:8], "little")
+            length = _REQUEST_OVERHEAD + (data_len if func_code == FUNC_WRITE else 0)
+            if len(self._requests) < length:
+                return
+
+            request = bytes(self._requests[:length])
+            del self._requests[:length]
+            if calc_lrc(request[:-1]) != request[-1]:
+                logger.warning("模拟传感器收到LRC校验错误的请求")
+                continue
+
+            if func_code == FUNC_WRITE:
+                self.registers[reg_addr:reg_addr + data_len] = request[8:8 + data_len]
+                if reg_addr == AUTO_PUSH_REG:
+                    self.streaming = request[8] == 1
+                    # 应答帧：不含有效数据，仅错误码
+                    self._respond(encode_auto_push_frame(b""))
+                else:
+                    self._respond(self._response_frame(func_code, reg_addr, b"\x00"))
+            elif func_code == FUNC_READ:
+                self._respond(self._response_frame(
+                    func_code, reg_addr, self.registers[reg_addr:reg_addr + data_len]))
+
+    def _response_frame(self, func_code, reg_addr, data):
+        frame = (
+            RESP_HEAD_GENERAL + b"\x00" + bytes([func_code]) +
+            reg_addr.to_bytes(2, "little") + len(data).to_bytes(2, "little") + bytes(data)
+        )
+        return frame + bytes([calc_lrc(frame)])
+
+    def _respond(self, frame):
+        # 模拟应答帧在串口上的传输时间
+        time.sleep(len(frame) * self.byte_time())
+        os.write(self._master, frame)
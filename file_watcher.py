@@ -0,0 +1,150 @@
+import os
+import sys
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+from collections import namedtuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 事件类型：文件新建 / 文件写入完成（写句柄关闭或整体移入目录）
+EVENT_CREATED = 'created'
+EVENT_COMPLETED = 'completed'
+
+FileEvent = namedtuple('FileEvent', ['kind', 'path'])
+
+# inotify常量（linux/inotify.h）
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    """基于inotify的目录监听（Linux），空闲时不产生任何目录扫描"""
+
+    def __init__(self, directory, suffix='.csv'):
+        self.directory = directory
+        self.suffix = suffix
+
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+
+        mask = _IN_CREATE | _IN_CLOSE_WRITE | _IN_MOVED_TO
+        if libc.inotify_add_watch(self._fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"inotify_add_watch 失败: {directory}")
+
+    def fileno(self):
+        return self._fd
+
+    def poll(self, timeout=0.0):
+        """返回自上次调用以来的文件事件列表，最多等待timeout秒"""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset < len(buffer):
+            _, mask, _, name_len = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = buffer[offset:offset + name_len].rstrip(b'\0')
+            offset += name_len
+
+            if mask & _IN_Q_OVERFLOW:
+                logger.warning("inotify事件队列溢出，部分文件事件丢失")
+                continue
+            if mask & _IN_ISDIR or not name:
+                continue
+
+            filename = os.fsdecode(name)
+            if not filename.endswith(self.suffix):
+                continue
+
+            kind = EVENT_CREATED if mask & _IN_CREATE else EVENT_COMPLETED
+            events.append(FileEvent(kind, os.path.join(self.directory, filename)))
+        return events
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher:
+    """基于stat轮询的目录监听（inotify不可用时的后备方案）
+
+    文件首次出现时产生新建事件；文件大小和修改时间在一个轮询周期内不再变化时视为写入完成。
+    """
+
+    def __init__(self, directory, suffix='.csv'):
+        self.directory = directory
+        self.suffix = suffix
+        self._snapshot = self._scan()
+        self._pending = {}
+
+    def _scan(self):
+        snapshot = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(self.suffix) and entry.is_file():
+                    stat = entry.stat()
+                    snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def fileno(self):
+        return None
+
+    def poll(self, timeout=0.0):
+        if timeout > 0:
+            time.sleep(timeout)
+
+        snapshot = self._scan()
+        events = []
+
+        # 上一轮发生变化、本轮保持不变的文件视为写入完成
+        pending = self._pending
+        self._pending = {}
+        for path, signature in pending.items():
+            if snapshot.get(path) == signature:
+                events.append(FileEvent(EVENT_COMPLETED, path))
+
+        for path, signature in snapshot.items():
+            previous = self._snapshot.get(path)
+            if previous is None:
+                events.append(FileEvent(EVENT_CREATED, path))
+            if previous != signature:
+                self._pending[path] = signature
+
+        self._snapshot = snapshot
+        return events
+
+    def close(self):
+        self._snapshot = {}
+        self._pending = {}
+
+
+def create_watcher(directory, suffix='.csv'):
+    """优先使用inotify，不可用时退回stat轮询"""
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(directory, suffix)
+        except (OSError, AttributeError) as e:
+            logger.warning(f"inotify不可用，改用轮询方式监听目录: {e}")
+    return PollingWatcher(directory, suffix)
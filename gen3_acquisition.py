@@ -0,0 +1,248 @@
+"""GEN3高速通信集成板串口采集：读取线程 + 环形缓冲区，直接为HardnessProcessor提供试验数据"""
+import threading
+import time
+from collections import deque
+import numpy as np
+from config import CONFIG
+from trial_data import TrialData
+from gen3_transport import Gen3Transport
+from raw_capture import CaptureWriter
+from press_segmentation import PressSegmenter
+import logging
+
+logger = logging.getLogger(__name__)
+
+class FrameRingBuffer:
+    """预分配的帧环形缓冲区
+
+    每帧按记录CSV的列布局存放：前13列为力/力矩/位置/四元数，其后为触点数据，
+    写满后覆盖最旧的帧。写入与快照均持锁，读取线程与预测线程可以并发访问。
+    """
+
+    def __init__(self, capacity=None):
+        if capacity is None:
+            capacity = CONFIG['SENSOR_RING_CAPACITY']
+        header_width = CONFIG['PAXINI_START_INDEX']
+
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.header = np.full((capacity, header_width), np.nan, dtype=np.float64)
+        self.taxels = np.zeros((capacity, CONFIG['NUM_COLUMNS'] - header_width), dtype=np.float32)
+
+        self.total_frames = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self.total_frames, self.capacity)
+
+    def append(self, timestamp, header, taxels):
+        """写入一帧（header可为None，此时力/位姿列保持NaN）"""
+        with self._lock:
+            slot = self.total_frames % self.capacity
+            self.timestamps[slot] = timestamp
+            if header is None:
+                self.header[slot] = np.nan
+            else:
+                self.header[slot] = header
+            self.taxels[slot, :len(taxels)] = taxels
+            self.total_frames += 1
+
+    def extend(self, timestamps, header, taxels):
+        """批量写入多帧：timestamps为标量或 (帧数,)，header为 (帧数, 13) 或None"""
+        count = len(taxels)
+        if count > self.capacity:
+            # 只保留最新的capacity帧
+            skip = count - self.capacity
+            taxels = taxels[skip:]
+            if header is not None:
+                header = header[skip:]
+            if np.ndim(timestamps):
+                timestamps = timestamps[skip:]
+            with self._lock:
+                self.total_frames += skip
+            count = self.capacity
+
+        with self._lock:
+            slots = (self.total_frames + np.arange(count)) % self.capacity
+            self.timestamps[slots] = timestamps
+            self.header[slots] = np.nan if header is None else header
+            self.taxels[slots, :taxels.shape[1]] = taxels
+            self.total_frames += count
+
+    def clear(self):
+        with self._lock:
+            self.total_frames = 0
+
+    def time_range(self):
+        """缓冲区中最早和最新一帧的时间戳，无数据时返回None"""
+        with self._lock:
+            count = len(self)
+            if count == 0:
+                return None
+            end = self.total_frames % self.capacity
+            return self.timestamps[(end - count) % self.capacity], self.timestamps[end - 1]
+
+    def snapshot(self, last_n=None, since=None, until=None):
+        """按时间顺序复制最近last_n帧（可再按时间戳范围筛选），返回 (时间戳, 力/位姿列, 触点数据)"""
+        with self._lock:
+            count = len(self)
+            if last_n is not None:
+                count = min(count, last_n)
+            end = self.total_frames % self.capacity
+            order = (np.arange(end - count, end) % self.capacity)
+            timestamps = self.timestamps[order]
+            if since is not None or until is not None:
+                # 时间戳按写入顺序递增，二分查找截取范围
+                lo = 0 if since is None else np.searchsorted(timestamps, since, side='left')
+                hi = count if until is None else np.searchsorted(timestamps, until, side='right')
+                order = order[lo:hi]
+                timestamps = timestamps[lo:hi]
+            return (timestamps, self.header[order], self.taxels[order])
+
+    def frames(self, start, stop):
+        """按写入以来的绝对帧号复制 [start, stop) 区间，返回 (时间戳, 力/位姿列, 触点数据)
+
+        区间中已被覆盖的帧不返回。
+        """
+        with self._lock:
+            start = max(start, self.total_frames - len(self))
+            stop = min(stop, self.total_frames)
+            order = np.arange(start, max(start, stop)) % self.capacity
+            return self.timestamps[order], self.header[order], self.taxels[order]
+
+
+class Gen3SensorReader:
+    """GEN3高速通信集成板读取器
+
+    通过Gen3Transport完成设备初始化并开启自动回传，传输层的读取线程解析出的
+    AA 56自动回传帧直接写入环形缓冲区。
+    header_source为可选的回调，每帧调用一次，返回与记录CSV前13列一致的力/位姿数据
+    （六维力传感器与机械臂位姿）；未提供时仅由传感器合力填充力列，位姿列为NaN，
+    此时刚度等依赖位移的特征无法计算。
+    收到的Z向力同时送入按压周期分割器，每完成一次按压就追加到press_cycles（帧号为绝对帧号），
+    可用cycle_trial()取出该次按压的数据单独评估。
+    指定capture_path时，串口收到的原始字节同时记录到采集文件，可用raw_capture回放。
+    """
+
+    def __init__(self, port=None, baudrate=None, capacity=None,
+                 num_points=None, header_source=None, capture_path=None, name=None):
+        self.port = port or CONFIG['SENSOR_PORT']
+        self.name = name or self.port
+        self.baudrate = baudrate or CONFIG['SENSOR_BAUDRATE']
+        self.num_points = num_points or CONFIG['PAXINI_NUM_POINTS']
+        self.header_source = header_source
+        self.ring = FrameRingBuffer(capacity)
+
+        self.frames_received = 0
+        self.device_info = None
+        self.segmenter = PressSegmenter()
+        self.press_cycles = deque(maxlen=CONFIG['SENSOR_RING_CAPACITY'])
+        self.capture_path = capture_path
+
+        self.transport = Gen3Transport(self.port, self.baudrate, self.num_points, on_frame=self._store)
+        self.decoder = self.transport.decoder
+        self.splitter = self.transport.splitter
+        self._header_rows = np.full((16, CONFIG['PAXINI_START_INDEX']), np.nan)
+
+    def start(self):
+        """打开串口、初始化设备并开启自动回传"""
+        if self.capture_path:
+            try:
+                self.transport.capture = CaptureWriter(self.capture_path, self.baudrate)
+            except Exception as e:
+                logger.error(f"创建采集文件 {self.capture_path} 失败: {e}")
+                return False
+
+        if not self.transport.open():
+            self._close_capture()
+            return False
+
+        self.device_info = self.transport.initialize()
+        if self.device_info is None:
+            self.transport.close()
+            self._close_capture()
+            return False
+
+        total_points = int(self.device_info['point_counts'].sum())
+        if total_points != self.num_points:
+            logger.warning(f"传感器分布力点数 {total_points} 与配置的 {self.num_points} 不符")
+
+        if not self.transport.set_auto_push(True):
+            logger.error("开启自动回传失败")
+            self.transport.close()
+            self._close_capture()
+            return False
+
+        logger.info(f"开始采集传感器数据: {self.port} @ {self.baudrate}")
+        return True
+
+    def stop(self):
+        """关闭自动回传并关闭串口"""
+        if self.transport.is_open and not self.transport.set_auto_push(False):
+            logger.warning("关闭自动回传失败")
+        self.transport.close()
+        self._close_capture()
+
+        counters = self.splitter.counters()
+        logger.info(f"停止采集 {self.port}: 接收 {counters['frames']} 帧, "
+                    f"重同步 {counters['resyncs']} 次, LRC错误 {counters['lrc_failures']} 次, "
+                    f"丢弃 {counters['bytes_discarded']} 字节")
+
+    def _close_capture(self):
+        if self.transport.capture is not None:
+            self.transport.capture.close()
+            self.transport.capture = None
+
+    def feed(self, data):
+        """处理收到的字节（不经过串口，用于回放和测试），返回本次解析出的完整帧数"""
+        return self.splitter.feed(data, self._store)
+
+    def _store(self, decoder):
+        """写入一批解码后的帧（同一次串口读取中收到的帧共用一个时间戳）"""
+        timestamp = time.monotonic()
+        count = decoder.count
+
+        if self.header_source is not None:
+            header = np.array([self.header_source() for _ in range(count)], dtype=np.float64)
+        elif decoder.has_resultant:
+            if count > len(self._header_rows):
+                self._header_rows = np.full((max(count, 2 * len(self._header_rows)),
+                                             CONFIG['PAXINI_START_INDEX']), np.nan)
+            header = self._header_rows[:count]
+            # 与记录数据一致：按压方向Z向力为负
+            np.multiply(decoder.resultant[:count], CONFIG['SENSOR_FORCE_LSB'], out=header[:, 0:3])
+            header[:, CONFIG['FORCE_Z_INDEX']] *= -1
+        else:
+            header = None
+
+        errors = decoder.error_codes[:count]
+        if errors.any():
+            logger.warning(f"传感器返回错误码: 0x{int(errors[np.argmax(errors != 0)]):02X}")
+        self.ring.extend(timestamp, header, decoder.taxels[:count].reshape(count, -1))
+        self.frames_received += count
+
+        if header is not None:
+            self.press_cycles.extend(self.segmenter.feed(header[:, CONFIG['FORCE_Z_INDEX']]))
+
+    def to_trial(self, last_n=None, since=None, until=None):
+        """将缓冲区中最近的帧（可按time.monotonic()时间戳范围截取）组装为TrialData，
+        可直接交给HardnessProcessor提取特征"""
+        timestamps, header, taxels = self.ring.snapshot(last_n, since, until)
+        if len(timestamps) == 0:
+            return None
+        return TrialData(self.name, header, taxels)
+
+    def cycle_trial(self, cycle):
+        """取出一次按压（PressCycle）的数据组装为TrialData，数据已被环形缓冲区覆盖时返回None"""
+        timestamps, header, taxels = self.ring.frames(cycle.start, cycle.end)
+        if len(timestamps) != cycle.end - cycle.start:
+            logger.warning(f"按压数据已被覆盖: 第 {cycle.start}-{cycle.end} 帧")
+            return None
+        return TrialData(self.name, header, taxels, peak_index=cycle.peak - cycle.start)
+
+    def predict(self, processor, last_n=None):
+        """用当前缓冲区数据进行硬度预测，返回 (硬度等级, 网格得分, 特征)"""
+        trial = self.to_trial(last_n)
+        if trial is None:
+            return None, None, None
+        return processor.predict_trial(trial)
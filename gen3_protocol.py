@@ -0,0 +1,349 @@
+"""GEN3高速通信集成板通信协议（请求响应模式与AA 56自动回传模式）"""
+import struct
+from collections import namedtuple
+import numpy as np
+from config import CONFIG
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 帧头
+REQ_HEAD = b"\x55\xAA"               # 请求帧头（主机→传感器）
+RESP_HEAD_GENERAL = b"\xAA\x55"      # 普通响应帧头（传感器→主机）
+AUTO_PUSH_HEAD = b"\xAA\x56"         # 自动回传帧头
+
+# 功能码
+FUNC_READ = 0x03
+FUNC_WRITE = 0x10
+
+# 寄存器
+VERSION_REG = 0x0000
+VERSION_DATA_LEN = 15
+SENSOR_COMBINATION_REG = 0x0010   # 0x0010-0x0013 传感器模组组合
+SENSOR_COMBINATION_LEN = 4
+DATA_TYPE_REG = 0x0016
+AUTO_PUSH_REG = 0x0017
+POINT_COUNT_REG = 0x0030          # 0x0030-0x0067 各模组分布力点数（uint16）
+POINT_COUNT_LEN = 0x38
+
+# 单次读写的最大字节数
+MAX_READ_BYTES = 512
+MAX_WRITE_BYTES = 10
+
+# 自动回传数据类型组合（0x0016）
+DATA_TYPE_RESULTANT = 0x01
+DATA_TYPE_TAXELS = 0x02
+
+# 自动回传帧：Head(2) + 预留(1) + 有效帧长度(2) + 总错误码(1) + 有效数据(M) + LRC(1)
+AUTO_PUSH_OVERHEAD = 7
+AUTO_PUSH_PAYLOAD_OFFSET = 6
+_AUTO_PUSH_HEADER = struct.Struct("<2sBHB")  # 帧头, 预留, 有效帧长度, 总错误码
+
+# 响应帧：Head(2) + 预留(1) + 功能码(1) + 寄存器地址(2) + 数据长度(2) + 数据(N) + LRC(1)
+RESPONSE_OVERHEAD = 9
+_RESPONSE_HEADER = struct.Struct("<2sBBHH")  # 帧头, 预留, 功能码, 寄存器地址, 数据长度
+
+# 解析后的响应帧；功能码最高位为1表示设备返回错误
+ResponseFrame = namedtuple('ResponseFrame', ['func_code', 'reg_addr', 'data'])
+
+
+def calc_lrc(data):
+    """计算LRC校验（累加→取反→加1→低8位），data可以是bytes/bytearray/memoryview"""
+    total = int(np.frombuffer(data, dtype=np.uint8).sum(dtype=np.uint64))
+    return -total & 0xFF
+
+
+def build_request_frame(func_code, reg_addr, data_len, write_data=b""):
+    """构建请求帧：Head+预留+功能码+寄存器地址+数据长度+数据+LRC（多字节字段小端）"""
+    frame = (
+        REQ_HEAD + b"\x00" + bytes([func_code]) +
+        reg_addr.to_bytes(2, "little") +
+        data_len.to_bytes(2, "little") +
+        bytes(write_data)
+    )
+    return frame + bytes([calc_lrc(frame)])
+
+
+def auto_push_command(enable):
+    """开启/关闭自动回传指令"""
+    return build_request_frame(FUNC_WRITE, AUTO_PUSH_REG, 1, b"\x01" if enable else b"\x00")
+
+
+def encode_auto_push_frame(payload, error_code=0):
+    """构建自动回传帧（用于模拟传感器与回放）"""
+    payload = bytes(payload)
+    frame = _AUTO_PUSH_HEADER.pack(AUTO_PUSH_HEAD, 0, len(payload) + 1, error_code) + payload
+    return frame + bytes([calc_lrc(frame)])
+
+
+def auto_push_frame_length(valid_frame_len):
+    """由有效帧长度字段计算整帧字节数"""
+    return valid_frame_len + AUTO_PUSH_OVERHEAD - 1
+
+
+def payload_length(num_points, data_type=None):
+    """单个模组自动回传有效数据的字节数：合力(3) + 分布力(测点数*3)"""
+    if data_type is None:
+        data_type = CONFIG['SENSOR_DATA_TYPE']
+    length = 0
+    if data_type & DATA_TYPE_RESULTANT:
+        length += 3
+    if data_type & DATA_TYPE_TAXELS:
+        length += num_points * 3
+    return length
+
+
+# 分布力单个测点：Fx(int8), Fy(int8), Fz(uint8)
+TAXEL_DTYPE = np.dtype([('x', 'i1'), ('y', 'i1'), ('z', 'u1')])
+
+
+def taxel_view(payload, num_points=None, offset=0):
+    """将分布力原始数据零拷贝地视为 (测点数,) 结构化数组，字段x/y为int8、z为uint8"""
+    if num_points is None:
+        num_points = CONFIG['PAXINI_NUM_POINTS']
+    return np.frombuffer(payload, dtype=TAXEL_DTYPE, count=num_points, offset=offset)
+
+
+def taxel_frames_view(buffer, frame_length, count, taxel_offset, num_points=None, offset=0):
+    """多帧首尾相接存放在同一缓冲区时，零拷贝地得到 (帧数, 测点数) 的结构化视图
+
+    taxel_offset为分布力数据在帧内的起始位置。
+    """
+    if num_points is None:
+        num_points = CONFIG['PAXINI_NUM_POINTS']
+    frames = np.frombuffer(buffer, dtype=np.uint8, count=count * frame_length, offset=offset)
+    frames = frames.reshape(count, frame_length)
+    return frames[:, taxel_offset:taxel_offset + num_points * 3].view(TAXEL_DTYPE)
+
+
+def taxel_values(records, out=None):
+    """结构化测点数据转换为数值数组 (..., 测点数, 3)，依次为Fx, Fy, Fz"""
+    if out is None:
+        out = np.empty(records.shape + (3,), dtype=np.int16)
+    out[..., 0] = records['x']
+    out[..., 1] = records['y']
+    out[..., 2] = records['z']
+    return out
+
+
+class AutoPushDecoder:
+    """自动回传帧解析器
+
+    在接收缓冲区上按偏移量原地解析：调用方每次读取后用np.frombuffer在memoryview上建立
+    一个uint8数组（与缓冲区共享内存），帧头字段用struct读取，LRC与有效数据均为该数组的
+    切片运算，不复制帧数据，也不为每帧构造字典或日志字符串。首尾相接的多帧可以一次
+    校验、一次解码。
+    最近一次解码的count帧写入预分配（按需扩容）的resultant (帧数, 3)、taxels (帧数, 测点数, 3)
+    和error_codes (帧数,)，每个测点依次为Fx, Fy, Fz，与记录CSV中触点数据的排列一致；
+    这些数组在下一次解码时被覆盖。
+    """
+
+    def __init__(self, num_points=None, data_type=None, capacity=16):
+        self.num_points = num_points or CONFIG['PAXINI_NUM_POINTS']
+        self.data_type = CONFIG['SENSOR_DATA_TYPE'] if data_type is None else data_type
+        self.payload_length = payload_length(self.num_points, self.data_type)
+        self.frame_length = self.payload_length + AUTO_PUSH_OVERHEAD
+
+        self.has_resultant = bool(self.data_type & DATA_TYPE_RESULTANT)
+        self.has_taxels = bool(self.data_type & DATA_TYPE_TAXELS)
+        self._taxel_offset = AUTO_PUSH_PAYLOAD_OFFSET + (3 if self.has_resultant else 0)
+
+        self.count = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.error_codes = np.zeros(capacity, dtype=np.uint8)
+        self.resultant = np.zeros((capacity, 3), dtype=np.int16)
+        self.taxels = np.zeros((capacity, self.num_points, 3), dtype=np.int16)
+
+    @staticmethod
+    def read_header(data, offset=0):
+        """读取帧头字段，返回 (整帧字节数, 总错误码)；帧头不匹配返回None"""
+        head, _, valid_frame_len, error_code = _AUTO_PUSH_HEADER.unpack_from(data, offset)
+        if head != AUTO_PUSH_HEAD:
+            return None
+        return auto_push_frame_length(valid_frame_len), error_code
+
+    @staticmethod
+    def check_lrc(data, offset, frame_length):
+        """校验从offset开始、长度为frame_length的整帧LRC"""
+        end = offset + frame_length - 1
+        return (-int(data[offset:end].sum(dtype=np.uint64)) & 0xFF) == data[end]
+
+    def valid_run(self, data, offset, max_count):
+        """从offset开始连续有效的数据帧数（帧头、长度字段与LRC均正确），最多max_count帧"""
+        frames = data[offset:offset + max_count * self.frame_length].reshape(max_count, self.frame_length)
+        length_field = self.frame_length - AUTO_PUSH_OVERHEAD + 1
+        valid = (
+            (frames[:, 0] == AUTO_PUSH_HEAD[0]) & (frames[:, 1] == AUTO_PUSH_HEAD[1]) &
+            (frames[:, 3] == (length_field & 0xFF)) & (frames[:, 4] == (length_field >> 8)) &
+            (((-frames[:, :-1].sum(axis=1, dtype=np.int64)) & 0xFF) == frames[:, -1])
+        )
+        return max_count if valid.all() else int(np.argmin(valid))
+
+    def decode(self, data, offset=0, count=1):
+        """解码从offset开始首尾相接、已通过校验的count个数据帧，返回首个非零错误码（无错误为0）"""
+        if count > len(self.error_codes):
+            self._allocate(max(count, 2 * len(self.error_codes)))
+        self.count = count
+
+        frames = data[offset:offset + count * self.frame_length].reshape(count, self.frame_length)
+        self.error_codes[:count] = frames[:, 5]
+
+        if self.has_resultant:
+            resultant = frames[:, AUTO_PUSH_PAYLOAD_OFFSET:AUTO_PUSH_PAYLOAD_OFFSET + 3]
+            self.resultant[:count, :2] = resultant[:, :2].view(np.int8)
+            self.resultant[:count, 2] = resultant[:, 2]
+
+        if self.has_taxels:
+            records = taxel_frames_view(data, self.frame_length, count, self._taxel_offset,
+                                        self.num_points, offset)
+            taxel_values(records, out=self.taxels[:count])
+
+        errors = self.error_codes[:count]
+        return int(errors[np.argmax(errors != 0)]) if errors.any() else 0
+
+    def parse(self, frame, offset=0):
+        """校验并解码一帧（bytes/bytearray/memoryview），成功返回True；帧头、长度或LRC不符返回False"""
+        data = np.frombuffer(frame, dtype=np.uint8)
+        if len(data) - offset < self.frame_length:
+            return False
+        if self.valid_run(data, offset, 1) != 1:
+            return False
+        self.decode(data, offset)
+        return True
+
+
+class AutoPushFrameSplitter:
+    """自动回传字节流的增量分帧器
+
+    串口每次读到的字节可能包含半帧或多帧。分帧器在内部缓冲区中搜索AA 56帧头，
+    按长度字段等待恰好一整帧的字节，LRC校验通过后交给解码器。长度字段只接受
+    不含数据的应答帧和配置的数据帧两种长度，因此长度字段损坏时不会长时间等待并吞掉
+    后续的正常帧；帧头或LRC校验失败时只跳过该帧头的第一个字节重新搜索，
+    紧随其后的完整帧仍能被识别。
+
+    提供on_response时同时识别AA 55请求响应帧（数据长度不超过单次最大读取字节数），
+    以ResponseFrame回调；自动回传开关指令的应答为不含数据的AA 56帧，
+    作为写0x0017寄存器的响应回调，数据为其错误码。
+
+    统计计数：
+        frames          解码的数据帧数
+        resyncs         失步（出现需丢弃的字节）后重新对齐的次数
+        lrc_failures    LRC校验失败次数
+        bytes_discarded 不属于任何有效帧而被丢弃的字节数
+    """
+
+    def __init__(self, decoder, on_response=None):
+        self.decoder = decoder
+        self.on_response = on_response
+        self._valid_lengths = {AUTO_PUSH_OVERHEAD, decoder.frame_length}
+        self._head_byte = AUTO_PUSH_HEAD[:1]
+        self._buffer = bytearray()
+        self._in_sync = True
+
+        self.frames = 0
+        self.resyncs = 0
+        self.lrc_failures = 0
+        self.bytes_discarded = 0
+
+    def counters(self):
+        return {
+            'frames': self.frames,
+            'resyncs': self.resyncs,
+            'lrc_failures': self.lrc_failures,
+            'bytes_discarded': self.bytes_discarded,
+        }
+
+    def reset(self):
+        """清空缓冲区（如重新打开串口后），保留统计计数"""
+        self._buffer.clear()
+        self._in_sync = True
+
+    def _discard(self, count):
+        if count <= 0:
+            return
+        self.bytes_discarded += count
+        if self._in_sync:
+            self.resyncs += 1
+            self._in_sync = False
+
+    def feed(self, data, on_frame):
+        """追加收到的字节并分帧，返回解码帧数
+
+        每解码一批首尾相接的数据帧调用一次on_frame(decoder)，本批帧数为decoder.count。
+        """
+        buffer = self._buffer
+        buffer += data
+        decoder = self.decoder
+        end = len(buffer)
+        pos = 0
+        count = 0
+
+        # 在缓冲区视图上按偏移量逐帧处理，结束后一次性移除已消费的字节
+        with memoryview(buffer) as view:
+            array = np.frombuffer(view, dtype=np.uint8)
+            while True:
+                start = buffer.find(self._head_byte, pos)
+                if start < 0:
+                    self._discard(end - pos)
+                    pos = end
+                    break
+                self._discard(start - pos)
+                pos = start
+
+                if end - pos < 2:
+                    # 末尾的0xAA可能是下一帧帧头的前半部分，保留到下次
+                    break
+                kind = buffer[pos + 1]
+                if kind == AUTO_PUSH_HEAD[1]:
+                    if end - pos < AUTO_PUSH_OVERHEAD:
+                        break
+                    frame_length, _ = decoder.read_header(array, pos)
+                    if frame_length not in self._valid_lengths:
+                        frame_length = None
+                elif kind == RESP_HEAD_GENERAL[1] and self.on_response is not None:
+                    if end - pos < RESPONSE_OVERHEAD:
+                        break
+                    data_len = _RESPONSE_HEADER.unpack_from(buffer, pos)[4]
+                    frame_length = RESPONSE_OVERHEAD + data_len if data_len <= MAX_READ_BYTES else None
+                else:
+                    frame_length = None
+
+                if frame_length is None:
+                    # 伪帧头或长度字段不可信
+                    self._discard(1)
+                    pos += 1
+                    continue
+                if end - pos < frame_length:
+                    break
+                if not decoder.check_lrc(array, pos, frame_length):
+                    self.lrc_failures += 1
+                    self._discard(1)
+                    pos += 1
+                    continue
+
+                self._in_sync = True
+                if kind == RESP_HEAD_GENERAL[1]:
+                    _, _, func_code, reg_addr, data_len = _RESPONSE_HEADER.unpack_from(buffer, pos)
+                    data = bytes(buffer[pos + RESPONSE_OVERHEAD - 1:pos + frame_length - 1])
+                    self.on_response(ResponseFrame(func_code, reg_addr, data))
+                elif frame_length == decoder.frame_length:
+                    # 首帧已校验，其后首尾相接的数据帧批量校验、批量解码
+                    run = 1
+                    available = (end - pos) // frame_length
+                    if available > 1:
+                        run += decoder.valid_run(array, pos + frame_length, available - 1)
+                    decoder.decode(array, pos, run)
+                    self.frames += run
+                    count += run
+                    on_frame(decoder)
+                    frame_length *= run
+                elif self.on_response is not None:
+                    # 自动回传开关指令的应答帧
+                    self.on_response(ResponseFrame(FUNC_WRITE, AUTO_PUSH_REG, bytes([buffer[pos + 5]])))
+                pos += frame_length
+            del array
+
+        del buffer[:pos]
+        return count
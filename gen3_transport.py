@@ -0,0 +1,253 @@
+"""GEN3高速通信集成板请求-响应传输层：响应帧到达即返回，支持多个寄存器读取流水线"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+import numpy as np
+import serial
+from config import CONFIG
+from gen3_protocol import (
+    FUNC_READ, FUNC_WRITE, VERSION_REG, VERSION_DATA_LEN, SENSOR_COMBINATION_REG,
+    SENSOR_COMBINATION_LEN, DATA_TYPE_REG, AUTO_PUSH_REG, POINT_COUNT_REG, POINT_COUNT_LEN,
+    MAX_READ_BYTES, MAX_WRITE_BYTES, AutoPushDecoder, AutoPushFrameSplitter, build_request_frame,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Gen3Transport:
+    """高速通信集成板传输层
+
+    专用读取线程持续读取串口并分帧：自动回传数据帧交给on_frame回调，响应帧按
+    (功能码, 寄存器地址) 匹配到等待中的请求并立即唤醒调用方，不再在每条指令后固定休眠。
+    每个请求都有自己的超时时间（默认CONFIG['SENSOR_RESPONSE_TIMEOUT']），超时只是等待上限。
+    多个读请求可以连续发出后再统一等待响应（流水线），总耗时约为一次往返加上传输时间。
+    响应帧不带序号，同一 (功能码, 寄存器地址) 的响应按先进先出匹配；请求超时后设备的迟到响应
+    会被丢弃，不会错配给之后的请求（见_wait）。
+    capture为可选的raw_capture.CaptureWriter，读取线程收到的原始字节会原样记录。
+    """
+
+    def __init__(self, port=None, baudrate=None, num_points=None, on_frame=None, capture=None):
+        self.port = port or CONFIG['SENSOR_PORT']
+        self.baudrate = baudrate or CONFIG['SENSOR_BAUDRATE']
+        self.on_frame = on_frame
+        self.capture = capture
+
+        self.decoder = AutoPushDecoder(num_points)
+        self.splitter = AutoPushFrameSplitter(self.decoder, on_response=self._on_response)
+        self.serial = None
+
+        # (功能码, 寄存器地址) -> deque[(Future, 提交时的已丢弃响应数)]
+        self._pending = {}
+        # 超时请求仍可能迟到的响应数，以及累计丢弃的迟到响应数
+        self._stale = {}
+        self._discarded = {}
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def open(self):
+        """打开串口并启动读取线程"""
+        try:
+            self.serial = serial.Serial(self.port, self.baudrate,
+                                        timeout=CONFIG['SENSOR_READ_TIMEOUT'])
+            self.serial.reset_input_buffer()
+            self.splitter.reset()
+
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name=f"gen3-transport-{self.port}",
+                                            daemon=True)
+            self._thread.start()
+            return True
+
+        except Exception as e:
+            logger.error(f"打开传感器串口 {self.port} 失败: {e}")
+            self.close()
+            return False
+
+    def close(self):
+        """停止读取线程、关闭串口，未完成的请求全部以失败结束"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.serial is not None:
+            self.serial.close()
+            self.serial = None
+
+        with self._pending_lock:
+            pending = [future for queue in self._pending.values() for future, _ in queue]
+            self._pending.clear()
+            self._stale.clear()
+            self._discarded.clear()
+        for future in pending:
+            future.cancel()
+
+    @property
+    def is_open(self):
+        return self.serial is not None
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                # 无数据时阻塞至读取超时，有数据时一次取走缓冲区内全部字节
+                chunk = self.serial.read(self.serial.in_waiting or 1)
+            except Exception as e:
+                logger.error(f"读取传感器串口失败: {e}")
+                break
+            if chunk:
+                if self.capture is not None:
+                    self.capture.write(chunk)
+                self.splitter.feed(chunk, self._on_frame)
+
+    def _on_frame(self, decoder):
+        if self.on_frame is not None:
+            self.on_frame(decoder)
+
+    def _on_response(self, response):
+        key = (response.func_code & 0x7F, response.reg_addr)
+        with self._pending_lock:
+            if self._stale.get(key):
+                # 先到的是已超时请求的迟到响应
+                self._stale[key] -= 1
+                self._discarded[key] = self._discarded.get(key, 0) + 1
+                logger.warning(f"丢弃超时请求的迟到响应: 功能码0x{response.func_code:02X} "
+                               f"地址0x{response.reg_addr:04X}")
+                return
+            queue = self._pending.get(key)
+            future = queue.popleft()[0] if queue else None
+        if future is None:
+            logger.debug(f"收到未匹配的响应: 功能码0x{response.func_code:02X} 地址0x{response.reg_addr:04X}")
+            return
+        future.set_result(response)
+
+    def submit(self, func_code, reg_addr, data_len, write_data=b""):
+        """发送请求并立即返回Future，响应到达时其结果为ResponseFrame"""
+        future = Future()
+        key = (func_code, reg_addr)
+        with self._pending_lock:
+            self._pending.setdefault(key, deque()).append((future, self._discarded.get(key, 0)))
+
+        frame = build_request_frame(func_code, reg_addr, data_len, write_data)
+        try:
+            with self._write_lock:
+                self.serial.write(frame)
+        except Exception as e:
+            self._forget(key, future)
+            future.set_exception(e)
+        return future
+
+    def _forget(self, key, future, timed_out=False):
+        """移除等待中的请求；timed_out为True时记录它的响应可能迟到
+
+        迟到响应会排在之后请求的响应前面，记录后由_on_response丢弃。若请求发出后已丢弃过
+        迟到响应，说明先前超时的请求实际没有响应、被丢弃的正是这个请求的响应，不再记录，
+        避免设备丢失一次响应后每个请求都错位失败。
+        """
+        with self._pending_lock:
+            queue = self._pending.get(key)
+            entry = next((entry for entry in queue or () if entry[0] is future), None)
+            if entry is None:
+                return
+            queue.remove(entry)
+            if timed_out and self._discarded.get(key, 0) == entry[1]:
+                self._stale[key] = self._stale.get(key, 0) + 1
+
+    def _wait(self, future, func_code, reg_addr, timeout):
+        """等待响应，超时或失败返回None"""
+        try:
+            response = future.result(timeout=max(0.0, timeout))
+        except FutureTimeoutError:
+            self._forget((func_code, reg_addr), future, timed_out=True)
+            logger.error(f"等待响应超时: 功能码0x{func_code:02X} 地址0x{reg_addr:04X}")
+            return None
+        except Exception as e:
+            logger.error(f"请求失败: 功能码0x{func_code:02X} 地址0x{reg_addr:04X}: {e}")
+            return None
+
+        if response.func_code & 0x80:
+            logger.error(f"设备返回错误: 0x{response.func_code & 0x7F:02X} 地址0x{reg_addr:04X}")
+            return None
+        return response
+
+    def read_register(self, reg_addr, read_len, timeout=None):
+        """读取寄存器（功能码0x03），返回数据字节，失败返回None"""
+        return self.read_registers([(reg_addr, read_len)], timeout)[0]
+
+    def read_registers(self, requests, timeout=None):
+        """流水线读取多个寄存器区间 [(地址, 字节数), ...]，按请求顺序返回数据（失败项为None）"""
+        if timeout is None:
+            timeout = CONFIG['SENSOR_RESPONSE_TIMEOUT']
+
+        futures = []
+        for reg_addr, read_len in requests:
+            if not 1 <= read_len <= MAX_READ_BYTES:
+                logger.error(f"无效读取长度: {read_len}字节（协议限制1-{MAX_READ_BYTES}字节）")
+                futures.append(None)
+                continue
+            futures.append(self.submit(FUNC_READ, reg_addr, read_len))
+
+        # 所有请求共享同一截止时间
+        deadline = time.monotonic() + timeout
+        results = []
+        for (reg_addr, read_len), future in zip(requests, futures):
+            if future is None:
+                results.append(None)
+                continue
+            response = self._wait(future, FUNC_READ, reg_addr, deadline - time.monotonic())
+            if response is not None and len(response.data) != read_len:
+                logger.error(f"读取长度不符: 地址0x{reg_addr:04X} 期望{read_len}字节，实际{len(response.data)}字节")
+                response = None
+            results.append(None if response is None else response.data)
+        return results
+
+    def write_register(self, reg_addr, write_data, timeout=None):
+        """写入寄存器（功能码0x10），写入状态为0时返回True"""
+        if not 1 <= len(write_data) <= MAX_WRITE_BYTES:
+            logger.error(f"无效写入长度: {len(write_data)}字节（协议限制1-{MAX_WRITE_BYTES}字节）")
+            return False
+        if timeout is None:
+            timeout = CONFIG['SENSOR_RESPONSE_TIMEOUT']
+
+        future = self.submit(FUNC_WRITE, reg_addr, len(write_data), write_data)
+        response = self._wait(future, FUNC_WRITE, reg_addr, timeout)
+        if response is None:
+            return False
+        if any(response.data):
+            logger.error(f"写入状态错误: 地址0x{reg_addr:04X} 状态{response.data.hex()}")
+            return False
+        return True
+
+    def set_auto_push(self, enable, timeout=None):
+        """开启/关闭自动回传"""
+        return self.write_register(AUTO_PUSH_REG, b"\x01" if enable else b"\x00", timeout)
+
+    def initialize(self, data_type=None, timeout=None):
+        """读取版本号、模组组合和分布力点数（流水线），并设置自动回传数据类型
+
+        返回 {'version', 'combination', 'point_counts'}，任一步失败返回None。
+        """
+        if data_type is None:
+            data_type = CONFIG['SENSOR_DATA_TYPE']
+
+        version, combination, point_counts = self.read_registers([
+            (VERSION_REG, VERSION_DATA_LEN),
+            (SENSOR_COMBINATION_REG, SENSOR_COMBINATION_LEN),
+            (POINT_COUNT_REG, POINT_COUNT_LEN),
+        ], timeout)
+        if version is None or combination is None or point_counts is None:
+            logger.error("读取传感器配置失败")
+            return None
+
+        if not self.write_register(DATA_TYPE_REG, bytes([data_type]), timeout):
+            logger.error("设置自动回传数据类型失败")
+            return None
+
+        info = {
+            'version': version.rstrip(b"\x00").decode('ascii', errors='replace'),
+            'combination': combination,
+            'point_counts': np.frombuffer(point_counts, dtype='<u2').astype(int),
+        }
+        logger.info(f"高速通信集成板版本: {info['version']}")
+        return info
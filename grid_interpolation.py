@@ -0,0 +1,56 @@
+import numpy as np
+from config import CONFIG
+import logging
+
+logger = logging.getLogger(__name__)
+
+def grid_sample_points(points, grid_shape=None):
+    """规则网格采样点，按 (行, 列) = (Y, X) 行优先排列"""
+    if grid_shape is None:
+        grid_shape = CONFIG['GRID_SHAPE']
+
+    x_min, x_max = points[:, 0].min(), points[:, 0].max()
+    y_min, y_max = points[:, 1].min(), points[:, 1].max()
+
+    grid_x, grid_y = np.mgrid[x_min:x_max:grid_shape[1]*1j,
+                              y_min:y_max:grid_shape[0]*1j]
+    return np.column_stack([grid_x.T.ravel(), grid_y.T.ravel()])
+
+
+def build_grid_operator(coordinates, grid_shape=None):
+    """预计算触点到规则网格的线性插值算子 (网格点数, 触点数)
+
+    与 griddata(method='linear', fill_value=np.mean(values)) 等价：
+    凸包内的网格点为所在三角形的重心坐标权重，凸包外的网格点取所有触点的均值。
+    Delaunay三角剖分只在此处执行一次。
+    """
+    from scipy import sparse
+    from scipy.interpolate import LinearNDInterpolator
+
+    points = np.asarray(coordinates, dtype=np.float64)[:, :2]
+    num_points = len(points)
+
+    # 对单位矩阵插值即得到每个触点对各网格点的权重
+    interpolator = LinearNDInterpolator(points, np.eye(num_points), fill_value=np.nan)
+    weights = interpolator(grid_sample_points(points, grid_shape))
+
+    outside = np.isnan(weights).any(axis=1)
+    weights[outside] = 1.0 / num_points
+    weights[np.abs(weights) < 1e-15] = 0.0
+
+    logger.info(f"网格插值算子已生成: {weights.shape}，凸包外网格点 {int(outside.sum())} 个")
+    return sparse.csr_matrix(weights)
+
+
+def apply_grid_operator(operator, values, grid_shape=None):
+    """将触点数据映射为硬度网格
+
+    values为单帧 (触点数,) 时返回 grid_shape；为多帧 (帧数, 触点数) 时返回 (帧数,) + grid_shape。
+    """
+    if grid_shape is None:
+        grid_shape = CONFIG['GRID_SHAPE']
+
+    values = np.nan_to_num(np.asarray(values, dtype=np.float64), nan=0.0)
+    if values.ndim == 1:
+        return (operator @ values).reshape(grid_shape)
+    return np.asarray((operator @ values.T).T).reshape((len(values),) + tuple(grid_shape))
@@ -0,0 +1,190 @@
+"""增量训练：新记录到达时只提取新文件的特征，在线更新标准化统计量和聚类中心，不重新训练整个数据集"""
+import os
+import numpy as np
+from config import CONFIG
+from centroid_engine import CentroidEngine, nearest_centroid
+from model_format import ArrayScaler, CentroidModel, stiffness_label_map
+from core_processor import file_key
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def safe_scale(var):
+    """标准差，接近0时取1（与StandardScaler一致）"""
+    scale = np.sqrt(var)
+    scale[scale < 10 * np.finfo(scale.dtype).eps] = 1.0
+    return scale
+
+
+class RunningStandardizer:
+    """逐批更新的标准化统计量（Welford算法的分批形式，Chan合并）
+
+    与对全部样本一次计算的均值和总体方差相同，每批的代价只与该批样本数有关。
+    """
+
+    def __init__(self, num_features):
+        self.count = 0
+        self.mean = np.zeros(num_features)
+        self.m2 = np.zeros(num_features)
+
+    @classmethod
+    def from_scaler(cls, scaler, count):
+        """由已训练模型的标准化参数和样本数继续累计（模型中没有方差时由标准差还原）"""
+        var = getattr(scaler, 'var_', None)
+        if var is None:
+            var = np.square(np.asarray(scaler.scale_, dtype=np.float64))
+        standardizer = cls(len(scaler.mean_))
+        standardizer.count = int(count)
+        standardizer.mean = np.array(scaler.mean_, dtype=np.float64)
+        standardizer.m2 = np.asarray(var, dtype=np.float64) * count
+        return standardizer
+
+    def partial_fit(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        count = len(X)
+        if count == 0:
+            return self
+        batch_mean = X.mean(axis=0)
+        batch_m2 = np.sum(np.square(X - batch_mean), axis=0)
+
+        total = self.count + count
+        delta = batch_mean - self.mean
+        self.mean = self.mean + delta * count / total
+        self.m2 = self.m2 + batch_m2 + np.square(delta) * self.count * count / total
+        self.count = total
+        return self
+
+    @property
+    def var(self):
+        return self.m2 / max(self.count, 1)
+
+    @property
+    def scale(self):
+        return safe_scale(self.var)
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.mean) / self.scale
+
+
+class MiniBatchCentroids:
+    """小批量聚类中心更新（逐中心学习率为 1/累计样本数）
+
+    聚类中心保存在原始特征空间：每个中心始终是分配给它的样本的累计均值，
+    标准化统计量变化后只需重新换算，不必回看旧样本。
+    """
+
+    def __init__(self, centroids, counts):
+        self.centroids = np.array(centroids, dtype=np.float64)
+        self.counts = np.array(counts, dtype=np.float64)
+
+    def partial_fit(self, X, standardizer):
+        """用当前标准化统计量把一批样本分配到最近中心，并更新中心，返回分配的原始标签"""
+        X = np.asarray(X, dtype=np.float64)
+        labels = nearest_centroid(standardizer.transform(X),
+                                  standardizer.transform(self.centroids))
+
+        n_clusters = len(self.centroids)
+        batch_counts = np.bincount(labels, minlength=n_clusters)
+        batch_sums = np.zeros_like(self.centroids)
+        np.add.at(batch_sums, labels, X)
+
+        updated = batch_counts > 0
+        self.counts[updated] += batch_counts[updated]
+        self.centroids[updated] += ((batch_sums[updated]
+                                     - batch_counts[updated, np.newaxis] * self.centroids[updated])
+                                    / self.counts[updated, np.newaxis])
+        return labels
+
+
+class IncrementalTrainer:
+    """从已加载的模型热启动，按新到达的样本增量更新并写回HardnessProcessor
+
+    模型必须记录已训练的文件（train保存的模型），否则无法区分新旧文件，训练集会被重复累计；
+    旧版pickle模型及由其转换的模型需先用train完整重新训练。
+    模型中没有记录各聚类样本数时，以每个聚类1个样本作为先验，新数据将很快主导统计量。
+    """
+
+    def __init__(self, processor, batch_size=None):
+        if processor.engine is None:
+            raise ValueError("增量训练需要先加载已训练的模型")
+        if not processor.trained_files:
+            raise ValueError("模型中没有已训练文件的记录（旧版模型或由旧版模型转换），请先运行 train 完整重新训练")
+        self.processor = processor
+        self.batch_size = batch_size or CONFIG['INCREMENTAL_BATCH_SIZE']
+
+        n_clusters = processor.cluster_model.n_clusters
+        counts = processor.cluster_counts
+        if counts is None or processor.n_samples_seen <= 0:
+            logger.warning("模型中没有训练样本数，按每个聚类1个样本热启动")
+            counts = np.ones(n_clusters)
+        n_samples_seen = processor.n_samples_seen or int(np.sum(counts))
+
+        mean = np.asarray(processor.scaler.mean_, dtype=np.float64)
+        scale = np.asarray(processor.scaler.scale_, dtype=np.float64)
+        self.standardizer = RunningStandardizer.from_scaler(processor.scaler, n_samples_seen)
+        centroids = np.asarray(processor.cluster_model.cluster_centers_, dtype=np.float64) * scale + mean
+        self.centroids = MiniBatchCentroids(centroids, counts)
+
+    def new_files(self, data_dirs=None):
+        """数据目录中尚未参与训练的CSV文件"""
+        data_dirs = data_dirs or [CONFIG['DATA_DIR']]
+        trained = set(self.processor.trained_files)
+        file_paths = []
+        for data_dir in data_dirs:
+            for filename in sorted(os.listdir(data_dir)):
+                file_path = os.path.join(data_dir, filename)
+                if filename.endswith('.csv') and file_key(file_path) not in trained:
+                    file_paths.append(file_path)
+        return file_paths
+
+    def partial_fit(self, feature_matrix):
+        """按CONFIG['INCREMENTAL_BATCH_SIZE']分批更新，返回各样本的硬度等级"""
+        feature_matrix = np.asarray(feature_matrix, dtype=np.float64)
+        labels = np.empty(len(feature_matrix), dtype=np.int64)
+        for start in range(0, len(feature_matrix), self.batch_size):
+            batch = feature_matrix[start:start + self.batch_size]
+            self.standardizer.partial_fit(batch)
+            labels[start:start + len(batch)] = self.centroids.partial_fit(batch, self.standardizer)
+        self._apply()
+        return self.processor.label_map[labels]
+
+    def update_from_files(self, file_paths, workers=None):
+        """提取新文件的特征并增量更新，返回新增样本数"""
+        processor = self.processor
+        if not file_paths:
+            return 0
+
+        rows = []
+        for file_path, file_features in zip(file_paths,
+                                            processor.extract_features_from_files(file_paths, workers)):
+            if not file_features:
+                logger.warning(f"文件特征提取失败，跳过: {file_path}")
+                continue
+            for features in file_features:
+                vector = [features.get(key, 0) for key in processor.feature_names]
+                if np.all(np.isfinite(vector)):
+                    rows.append(vector)
+                else:
+                    logger.warning(f"样本 {features['file_name']} 的特征含有无效值，跳过")
+            processor.trained_files.append(file_key(file_path))
+
+        if rows:
+            self.partial_fit(rows)
+        logger.info(f"增量训练完成: 新增 {len(rows)} 个样本（{len(file_paths)} 个文件），"
+                    f"累计 {self.standardizer.count} 个样本")
+        return len(rows)
+
+    def _apply(self):
+        """把当前统计量和聚类中心写回处理器，并按中心刚度重新排序等级"""
+        processor = self.processor
+        mean, scale = self.standardizer.mean, self.standardizer.scale
+        centroids = (self.centroids.centroids - mean) / scale
+
+        processor.scaler = ArrayScaler(mean, scale, self.standardizer.var)
+        processor.cluster_model = CentroidModel(centroids)
+        processor.label_map = stiffness_label_map(centroids, mean, scale, processor.feature_names)
+        processor.n_samples_seen = self.standardizer.count
+        processor.cluster_counts = self.centroids.counts.astype(np.int64)
+        processor.engine = CentroidEngine.from_model(processor.scaler, processor.cluster_model,
+                                                     processor.label_map)
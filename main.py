@@ -1,9 +1,9 @@
 import os
+import sys
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-from core_processor import HardnessProcessor
-from realtime_predictor import RealTimePredictor
+from core_processor import HardnessProcessor, split_samples
+from trial_data import load_trial
+from model_format import default_model_path, find_model_path, is_legacy_model
 from config import CONFIG
 import logging
 
@@ -14,50 +14,89 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def offline_training():
-    """离线训练模型"""
-    print("=== 离线硬度分级模型训练 ===")
-    
+def train_model(workers=None, select_k=False, sweep_workers=None):
+    """训练模型并保存模型和结果（不绘图），返回 (processor, 硬度等级, 网格字典, 聚类信息)，失败返回None
+
+    workers为特征提取进程数；select_k为True时先用sweep_workers个进程扫描候选聚类数，
+    按抽样轮廓系数和自助法稳定性选择k
+    """
     # 初始化处理器
     processor = HardnessProcessor()
     
     # 处理数据
-    if not processor.process_all_files():
+    if not processor.process_all_files(workers):
         print("数据处理失败，请检查数据和配置")
-        return
+        return None
     
     # 训练聚类模型
-    clustering_info = processor.train_clustering_model()
+    clustering_info = processor.train_clustering_model(select_k=select_k, sweep_workers=sweep_workers)
     if clustering_info is None:
         print("模型训练失败")
-        return
+        return None
     
     hardness_scores = clustering_info['labels']
     
-    # 为每个样本生成硬度网格
+    # 为每个样本（每次按压）生成硬度网格
     grid_scores_dict = {}
-    for filename in processor.file_names:
-        file_path = os.path.join(CONFIG['DATA_DIR'], filename)
-        grid_scores = processor.create_hardness_grid_for_sample(file_path)
+    for filename, trial in processor.sample_trials():
+        grid_scores = processor.create_hardness_grid_for_sample(trial)
         if grid_scores is not None:
             grid_scores_dict[filename] = grid_scores
     
     print(f"成功生成 {len(grid_scores_dict)} 个硬度网格")
     
     # 保存模型和结果
-    model_path = os.path.join(CONFIG['MODEL_DIR'], 'hardness_model.pkl')
-    processor.save_model(model_path)
+    processor.save_model(default_model_path())
     
     # 保存结果
     processor.save_results(hardness_scores, grid_scores_dict, clustering_info)
     
+    return processor, hardness_scores, grid_scores_dict, clustering_info
+
+def update_model(data_dirs=None, workers=None):
+    """增量训练：从当前模型热启动，只处理尚未训练过的文件，返回新增样本数，失败返回None"""
+    from incremental_training import IncrementalTrainer
+    
+    processor = HardnessProcessor()
+    model_path = find_model_path()
+    # 更新后写回同一模型目录，数组读入内存而不是内存映射
+    if model_path is None or not processor.load_model(model_path, mmap_mode=None):
+        print("模型加载失败，请先运行离线训练")
+        return None
+    
+    try:
+        trainer = IncrementalTrainer(processor)
+    except ValueError as e:
+        print(f"无法增量训练: {e}")
+        return None
+    file_paths = trainer.new_files(data_dirs)
+    if not file_paths:
+        print("没有新的数据文件")
+        return 0
+    
+    num_samples = trainer.update_from_files(file_paths, workers)
+    processor.save_model(default_model_path())
+    print(f"增量训练完成：{len(file_paths)} 个新文件，{num_samples} 个新样本，累计 {processor.n_samples_seen} 个样本")
+    return num_samples
+
+def offline_training():
+    """离线训练模型"""
+    print("=== 离线硬度分级模型训练 ===")
+    
+    result = train_model()
+    if result is None:
+        return
+    processor, hardness_scores, grid_scores_dict, clustering_info = result
+    
     # 可视化结果
-    visualize_results(processor, hardness_scores, grid_scores_dict)
+    visualize_results(processor, hardness_scores, grid_scores_dict, clustering_info)
     
     print("离线训练完成！")
 
-def visualize_results(processor, hardness_scores, grid_scores_dict):
+def visualize_results(processor, hardness_scores, grid_scores_dict, clustering_info):
     """可视化结果"""
+    import matplotlib.pyplot as plt
+    
     plt.rcParams['font.sans-serif'] = [CONFIG['CHINESE_FONT']]
     plt.rcParams['axes.unicode_minus'] = False
     
@@ -99,6 +138,8 @@ def visualize_results(processor, hardness_scores, grid_scores_dict):
 def visualize_feature_importance(processor, clustering_info):
     """可视化特征重要性"""
     try:
+        import matplotlib.pyplot as plt
+        
         # 计算特征对聚类中心的方差贡献
         cluster_centers = processor.cluster_model.cluster_centers_
         feature_importance = np.std(cluster_centers, axis=0)
@@ -133,6 +174,7 @@ def realtime_prediction():
     """实时预测"""
     print("=== 实时硬度预测 ===")
     
+    from realtime_predictor import RealTimePredictor
     predictor = RealTimePredictor()
     
     print("\n请选择预测模式:")
@@ -187,9 +229,11 @@ def check_data():
         print(f"[成功] 模型目录存在: {CONFIG['MODEL_DIR']}")
         
         # 检查是否有训练好的模型
-        model_path = os.path.join(CONFIG['MODEL_DIR'], 'hardness_model.pkl')
-        if os.path.exists(model_path):
+        model_path = find_model_path()
+        if model_path is not None:
             print(f"[成功] 找到训练好的模型: {model_path}")
+            if is_legacy_model(model_path):
+                print("[提示] 旧版pickle模型，可运行 python cli.py migrate 转换为新格式")
         else:
             print(f"[警告] 未找到训练好的模型，请先运行离线训练")
     
@@ -204,38 +248,47 @@ def check_data():
     return True
 
 def batch_prediction():
-    """批量预测所有文件"""
+    """批量预测所有文件，返回预测成功的样本结果列表，模型加载失败返回None"""
+    import pandas as pd
+    
     print("=== 批量预测所有文件 ===")
     
     processor = HardnessProcessor()
     
     # 加载模型
-    model_path = os.path.join(CONFIG['MODEL_DIR'], 'hardness_model.pkl')
-    if not processor.load_model(model_path):
+    model_path = find_model_path()
+    if model_path is None or not processor.load_model(model_path):
         print("模型加载失败，请先运行离线训练")
-        return
+        return None
     
     csv_files = [f for f in os.listdir(CONFIG['DATA_DIR']) if f.endswith('.csv')]
     
+    def samples():
+        # 一个文件包含多次按压时每次按压作为一个样本
+        for filename in csv_files:
+            trial = load_trial(os.path.join(CONFIG['DATA_DIR'], filename))
+            if trial is None:
+                print(f"文件: {filename} -> 预测失败")
+                continue
+            yield from split_samples(trial)
+    
+    # 全部样本的特征提取完成后一次完成聚类分配
     results = []
-    for filename in csv_files:
-        file_path = os.path.join(CONFIG['DATA_DIR'], filename)
-        hardness_level, grid_scores, features = processor.predict_single_file(file_path)
-        
+    for sample_name, hardness_level, grid_scores, features in processor.predict_samples(samples()):
         if hardness_level is not None:
             results.append({
-                'file_name': filename,
+                'file_name': sample_name,
                 'hardness_level': hardness_level + 1,
                 'grid_scores': grid_scores
             })
-            print(f"文件: {filename} -> 硬度等级: {hardness_level + 1}")
+            print(f"文件: {sample_name} -> 硬度等级: {hardness_level + 1}")
             
-            # 保存该文件的网格
-            base_name = os.path.splitext(filename)[0]
+            # 保存该样本的网格
+            base_name = os.path.splitext(sample_name)[0]
             grid_path = os.path.join(CONFIG['OUTPUT_DIR'], f'{base_name}_predicted_grid.csv')
             pd.DataFrame(grid_scores).to_csv(grid_path, index=False, header=False)
         else:
-            print(f"文件: {filename} -> 预测失败")
+            print(f"文件: {sample_name} -> 预测失败")
     
     # 保存批量预测结果
     if results:
@@ -246,6 +299,47 @@ def batch_prediction():
         results_path = os.path.join(CONFIG['OUTPUT_DIR'], 'batch_prediction_results.csv')
         results_df.to_csv(results_path, index=False, encoding='utf-8-sig')
         print(f"\n批量预测完成！结果已保存到: {results_path}")
+    
+    return results
+
+def grid_video():
+    """为单个文件逐帧生成硬度网格"""
+    print("=== 逐帧硬度网格生成 ===")
+    
+    processor = HardnessProcessor()
+    if not processor.load_coordinates():
+        print("坐标文件加载失败")
+        return
+    
+    csv_files = [f for f in os.listdir(CONFIG['DATA_DIR']) if f.endswith('.csv')]
+    if not csv_files:
+        print("没有找到CSV文件")
+        return
+    
+    print("\n可用的CSV文件:")
+    for i, filename in enumerate(csv_files):
+        print(f"{i+1}. {filename}")
+    
+    try:
+        choice = int(input("\n请选择文件编号: ")) - 1
+        if choice < 0 or choice >= len(csv_files):
+            print("无效的选择")
+            return
+        step_input = input("每隔几帧生成一次网格 (默认1): ").strip()
+        step = int(step_input) if step_input else 1
+        if step < 1:
+            print("无效的帧间隔")
+            return
+    except ValueError:
+        print("无效的输入")
+        return
+    
+    file_path = os.path.join(CONFIG['DATA_DIR'], csv_files[choice])
+    output_path = processor.create_grid_video(file_path, step=step)
+    if output_path:
+        print(f"逐帧硬度网格已保存到: {output_path}")
+    else:
+        print("逐帧硬度网格生成失败")
 
 def main():
     """主控制函数"""
@@ -257,10 +351,11 @@ def main():
         print("2. 实时预测")
         print("3. 批量预测所有文件")
         print("4. 检查数据")
-        print("5. 退出")
+        print("5. 逐帧硬度网格")
+        print("6. 退出")
         print("="*50)
         
-        choice = input("请选择操作 (1-5): ").strip()
+        choice = input("请选择操作 (1-6): ").strip()
         
         if choice == '1':
             print("\n开始离线训练...")
@@ -274,10 +369,17 @@ def main():
         elif choice == '4':
             check_data()
         elif choice == '5':
+            print("\n开始生成逐帧硬度网格...")
+            grid_video()
+        elif choice == '6':
             print("感谢使用！再见！")
             break
         else:
             print("无效选择，请重新输入")
 
 if __name__ == "__main__":
+    # 带参数运行时进入非交互命令行（见cli.py）
+    if len(sys.argv) > 1:
+        from cli import main as cli_main
+        sys.exit(cli_main())
     main()
\ No newline at end of file
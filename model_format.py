@@ -0,0 +1,127 @@
+"""硬度模型文件格式：JSON元数据 + NumPy数组（可内存映射），加载时不需要sklearn
+
+模型目录结构：
+    model.json          格式版本、特征名、聚类数、按刚度排序的等级映射、触点分量等
+    scaler_mean.npy     标准化均值 (特征数,)
+    scaler_scale.npy    标准化尺度 (特征数,)
+    scaler_var.npy      方差 (特征数,)，可选，增量训练继续累计统计量时使用
+    centroids.npy       聚类中心（标准化空间）(聚类数, 特征数)
+    coordinates.npy     触点坐标 (触点数, 3)
+    grid_operator.npy   触点到9x11网格的插值算子 (网格点数, 触点数)
+
+旧版pickle模型（hardness_model.pkl）仍可读取，可用 python cli.py migrate 转换。
+"""
+import os
+import json
+import numpy as np
+from config import CONFIG
+from centroid_engine import centroid_distances, nearest_centroid
+from atomic_io import atomic_save_array, atomic_save_json
+import logging
+
+logger = logging.getLogger(__name__)
+
+MODEL_FORMAT_VERSION = 1
+MODEL_META_FILE = 'model.json'
+MODEL_ARRAYS = ['scaler_mean', 'scaler_scale', 'centroids', 'coordinates', 'grid_operator']
+OPTIONAL_MODEL_ARRAYS = ['scaler_var']
+LEGACY_MODEL_FILE = 'hardness_model.pkl'
+
+
+class ArrayScaler:
+    """StandardScaler的推理部分：transform与sklearn相同，均为 (X - mean_) / scale_"""
+
+    def __init__(self, mean, scale, var=None):
+        self.mean_ = mean
+        self.scale_ = scale
+        self.var_ = var
+
+    def transform(self, X):
+        X = np.array(X, dtype=np.float64)
+        X -= self.mean_
+        X /= self.scale_
+        return X
+
+
+class CentroidModel:
+    """KMeans的推理部分：按到聚类中心的欧氏距离分配标签"""
+
+    def __init__(self, centroids):
+        self.cluster_centers_ = centroids
+        self.n_clusters = len(centroids)
+
+    def transform(self, X):
+        """到每个聚类中心的距离 (样本数, 聚类数)"""
+        return centroid_distances(X, self.cluster_centers_)
+
+    def predict(self, X):
+        return nearest_centroid(X, self.cluster_centers_)
+
+
+def default_model_path():
+    """新格式模型目录"""
+    return os.path.join(CONFIG['MODEL_DIR'], CONFIG['MODEL_NAME'])
+
+
+def find_model_path(model_dir=None):
+    """优先返回新格式模型目录，不存在时返回旧版pickle文件，都没有时返回None"""
+    model_dir = model_dir or CONFIG['MODEL_DIR']
+    bundle = os.path.join(model_dir, CONFIG['MODEL_NAME'])
+    if os.path.exists(os.path.join(bundle, MODEL_META_FILE)):
+        return bundle
+    legacy = os.path.join(model_dir, LEGACY_MODEL_FILE)
+    if os.path.exists(legacy):
+        return legacy
+    return None
+
+
+def is_legacy_model(model_path):
+    return model_path.endswith('.pkl')
+
+
+def save_model_bundle(model_path, arrays, meta):
+    """写入模型目录：先写数组，最后写model.json，读取时以model.json为准"""
+    os.makedirs(model_path, exist_ok=True)
+    for name in MODEL_ARRAYS:
+        atomic_save_array(os.path.join(model_path, name + '.npy'), np.asarray(arrays[name]))
+    for name in OPTIONAL_MODEL_ARRAYS:
+        if arrays.get(name) is not None:
+            atomic_save_array(os.path.join(model_path, name + '.npy'), np.asarray(arrays[name]))
+
+    meta = dict(meta, format_version=MODEL_FORMAT_VERSION)
+    atomic_save_json(os.path.join(model_path, MODEL_META_FILE), meta, ensure_ascii=False, indent=2)
+
+
+def load_model_bundle(model_path, mmap_mode='r'):
+    """读取模型目录，返回 (数组字典, 元数据)；格式版本不符或数据不完整时抛出ValueError"""
+    with open(os.path.join(model_path, MODEL_META_FILE), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('format_version') != MODEL_FORMAT_VERSION:
+        raise ValueError(f"不支持的模型格式版本: {meta.get('format_version')}")
+
+    arrays = {name: np.load(os.path.join(model_path, name + '.npy'), mmap_mode=mmap_mode)
+              for name in MODEL_ARRAYS}
+    for name in OPTIONAL_MODEL_ARRAYS:
+        path = os.path.join(model_path, name + '.npy')
+        arrays[name] = np.load(path, mmap_mode=mmap_mode) if os.path.exists(path) else None
+
+    num_features = len(meta['feature_names'])
+    if arrays['centroids'].shape != (meta['n_clusters'], num_features):
+        raise ValueError(f"聚类中心维度 {arrays['centroids'].shape} 与特征数 {num_features} 不符")
+    if len(arrays['scaler_mean']) != num_features or len(arrays['scaler_scale']) != num_features:
+        raise ValueError("标准化参数维度与特征数不符")
+    return arrays, meta
+
+
+def stiffness_label_map(centroids, scaler_mean, scaler_scale, feature_names):
+    """由聚类中心的刚度推算等级映射（原始标签 -> 刚度从低到高的等级），没有刚度特征时为恒等映射
+
+    聚类中心为各聚类样本的均值，按中心刚度排序与训练时按聚类平均刚度排序一致，用于旧版模型迁移。
+    """
+    stiffness_idx = next((i for i, name in enumerate(feature_names) if 'stiffness' in name), None)
+    if stiffness_idx is None:
+        return np.arange(len(centroids))
+    stiffness = centroids[:, stiffness_idx] * scaler_scale[stiffness_idx] + scaler_mean[stiffness_idx]
+    label_map = np.empty(len(centroids), dtype=np.int64)
+    label_map[np.argsort(stiffness, kind='stable')] = np.arange(len(centroids))
+    return label_map
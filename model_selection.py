@@ -0,0 +1,114 @@
+"""聚类数选择：在多个进程中对一组k和随机种子拟合KMeans，按抽样轮廓系数和自助法标签稳定性评分"""
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from config import CONFIG
+import logging
+
+logger = logging.getLogger(__name__)
+
+# silhouette: 各随机种子抽样轮廓系数的均值；stability: 自助法重拟合与全量拟合标签的调整兰德指数均值
+ClusterScore = namedtuple('ClusterScore', ['k', 'silhouette', 'silhouette_std', 'stability', 'inertia'])
+ModelSelection = namedtuple('ModelSelection', ['k', 'scores'])
+
+# 工作进程中的标准化特征矩阵，由进程池初始化函数设置一次，避免每个任务重复传输
+_sweep_features = None
+
+
+def _init_sweep_worker(features_scaled):
+    global _sweep_features
+    _sweep_features = features_scaled
+
+
+def silhouette_sample_size(n_samples):
+    """轮廓系数的计算量为O(n²)，样本数超过CONFIG['SILHOUETTE_SAMPLE_SIZE']时抽样计算"""
+    sample_size = CONFIG['SILHOUETTE_SAMPLE_SIZE']
+    return sample_size if n_samples > sample_size else None
+
+
+def _fit_and_score(k, seed, bootstraps):
+    """单个 (k, 随机种子) 任务：全量拟合一次，计算抽样轮廓系数，再做bootstrap次自助法重拟合"""
+    import warnings
+    from sklearn.cluster import KMeans
+    from sklearn.metrics import silhouette_score, adjusted_rand_score
+
+    X = _sweep_features
+    rng = np.random.default_rng(seed)
+    with warnings.catch_warnings():
+        # 自助样本的不同点数可能少于k
+        warnings.simplefilter('ignore')
+        model = KMeans(n_clusters=k, random_state=seed, n_init=1).fit(X)
+        labels = model.labels_
+        if len(np.unique(labels)) > 1:
+            silhouette = silhouette_score(X, labels, sample_size=silhouette_sample_size(len(X)),
+                                          random_state=seed)
+        else:
+            silhouette = -1.0
+
+        agreements = []
+        for _ in range(bootstraps):
+            indices = rng.integers(0, len(X), len(X))
+            resampled = KMeans(n_clusters=k, random_state=seed, n_init=1).fit(X[indices])
+            agreements.append(adjusted_rand_score(labels, resampled.predict(X)))
+
+    return k, seed, float(silhouette), float(np.mean(agreements)) if agreements else np.nan, float(model.inertia_)
+
+
+def sweep_cluster_counts(features_scaled, k_values=None, seeds=None, bootstraps=None, workers=None):
+    """对每个k和随机种子并行拟合并评分，返回按k排序的ClusterScore列表
+
+    只评估 2 <= k <= 样本数-1 的k（轮廓系数的定义范围）。
+    """
+    features_scaled = np.ascontiguousarray(features_scaled, dtype=np.float64)
+    n_samples = len(features_scaled)
+    if k_values is None:
+        k_min, k_max = CONFIG['K_SWEEP_RANGE']
+        k_values = range(k_min, k_max + 1)
+    k_values = [k for k in k_values if 2 <= k <= n_samples - 1]
+    if not k_values:
+        raise ValueError(f"样本数 {n_samples} 太少，无法进行聚类数选择")
+
+    seeds = seeds or [CONFIG['RANDOM_STATE'] + i for i in range(CONFIG['K_SWEEP_SEEDS'])]
+    bootstraps = CONFIG['K_SWEEP_BOOTSTRAPS'] if bootstraps is None else bootstraps
+    workers = workers or CONFIG['MODEL_SELECTION_WORKERS']
+    tasks = [(k, seed) for k in k_values for seed in seeds]
+    logger.info(f"聚类数选择: k={k_values}，每个k {len(seeds)} 个随机种子、{bootstraps} 次自助重采样，"
+                f"共 {len(tasks)} 个任务（进程数: {workers}）")
+
+    ks, task_seeds = zip(*tasks)
+    bootstrap_counts = [bootstraps] * len(tasks)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_init_sweep_worker,
+                                 initargs=(features_scaled,)) as executor:
+            results = list(executor.map(_fit_and_score, ks, task_seeds, bootstrap_counts))
+    else:
+        _init_sweep_worker(features_scaled)
+        results = list(map(_fit_and_score, ks, task_seeds, bootstrap_counts))
+
+    scores = []
+    for k in k_values:
+        rows = np.array([result[2:] for result in results if result[0] == k])
+        scores.append(ClusterScore(k, float(rows[:, 0].mean()), float(rows[:, 0].std()),
+                                   float(np.nanmean(rows[:, 1])) if bootstraps else np.nan,
+                                   float(rows[:, 2].mean())))
+    return scores
+
+
+def choose_cluster_count(scores, min_stability=None):
+    """稳定性不低于min_stability的k中取轮廓系数最高者；都不满足时取轮廓系数最高者"""
+    min_stability = CONFIG['K_SWEEP_MIN_STABILITY'] if min_stability is None else min_stability
+    stable = [score for score in scores if not score.stability < min_stability]
+    if not stable:
+        logger.warning(f"没有稳定性不低于 {min_stability} 的聚类数，按轮廓系数选择")
+        stable = scores
+    return max(stable, key=lambda score: score.silhouette).k
+
+
+def select_cluster_count(features_scaled, workers=None, **kwargs):
+    """聚类数扫描并选择，返回ModelSelection(k, scores)"""
+    scores = sweep_cluster_counts(features_scaled, workers=workers, **kwargs)
+    k = choose_cluster_count(scores)
+    for score in scores:
+        logger.info(f"  k={score.k}: 轮廓系数 {score.silhouette:.4f}±{score.silhouette_std:.4f}，"
+                    f"稳定性 {score.stability:.3f}{'  <- 选择' if score.k == k else ''}")
+    return ModelSelection(k, scores)
@@ -0,0 +1,91 @@
+"""多传感器并发采集：同时采集多个串口（如多根手指各接一块高速通信集成板），并行评估各自的硬度"""
+from concurrent.futures import ThreadPoolExecutor
+from gen3_acquisition import Gen3SensorReader
+import logging
+
+logger = logging.getLogger(__name__)
+
+class MultiSensorAcquisition:
+    """多传感器采集管理器
+
+    每个传感器由独立的Gen3SensorReader负责：各自的传输层读取线程、环形缓冲区和时间戳，
+    互不阻塞。所有读取器的时间戳都取自同一个单调时钟（time.monotonic()），
+    因此可以按公共时间窗口截取各传感器的数据，再并行评估每个传感器的硬度。
+
+    sensors为 {名称: 串口} 字典或串口列表（以串口名作为名称）；
+    header_sources可按名称为各传感器提供力/位姿数据回调。
+    """
+
+    def __init__(self, sensors, capacity=None, header_sources=None):
+        if not isinstance(sensors, dict):
+            sensors = {port: port for port in sensors}
+        header_sources = header_sources or {}
+
+        self.readers = {
+            name: Gen3SensorReader(port, capacity=capacity, name=name,
+                                   header_source=header_sources.get(name))
+            for name, port in sensors.items()
+        }
+
+    def _each(self, func):
+        """对所有读取器并行执行func，返回 {名称: 结果}"""
+        with ThreadPoolExecutor(max_workers=max(1, len(self.readers))) as executor:
+            results = executor.map(func, self.readers.values())
+            return dict(zip(self.readers, results))
+
+    def start(self):
+        """并行初始化并启动所有传感器，返回 {名称: 是否成功}"""
+        results = self._each(lambda reader: reader.start())
+
+        failed = [name for name, ok in results.items() if not ok]
+        if failed:
+            logger.error(f"以下传感器启动失败: {', '.join(failed)}")
+        logger.info(f"多传感器采集已启动: {len(results) - len(failed)}/{len(results)}")
+        return results
+
+    def stop(self):
+        """并行停止所有传感器"""
+        self._each(lambda reader: reader.stop())
+
+    def common_window(self):
+        """所有传感器缓冲区都覆盖的时间范围 (开始, 结束)（time.monotonic()时间戳），无重叠时返回None"""
+        ranges = [reader.ring.time_range() for reader in self.readers.values()]
+        if not ranges or any(r is None for r in ranges):
+            return None
+        start = max(r[0] for r in ranges)
+        end = min(r[1] for r in ranges)
+        if start > end:
+            return None
+        return start, end
+
+    def trials(self, window=None):
+        """按公共时间窗口截取各传感器的数据，返回 {名称: TrialData}（无数据为None）
+
+        window为 (开始, 结束) 时间戳，默认取common_window()。
+        """
+        if window is None:
+            window = self.common_window()
+        if window is None:
+            return {name: None for name in self.readers}
+        since, until = window
+        return {name: reader.to_trial(since=since, until=until)
+                for name, reader in self.readers.items()}
+
+    def predict_all(self, processor, window=None, workers=None):
+        """并行评估各传感器在同一时间窗口内的硬度，返回 {名称: (硬度等级, 网格得分, 特征)}"""
+        trials = self.trials(window)
+
+        def predict(item):
+            name, trial = item
+            if trial is None:
+                logger.warning(f"传感器 {name} 在时间窗口内没有数据")
+                return None, None, None
+            return processor.predict_trial(trial)
+
+        workers = workers or max(1, len(trials))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return dict(zip(trials, executor.map(predict, trials.items())))
+
+    def counters(self):
+        """各传感器的接收与分帧统计"""
+        return {name: reader.splitter.counters() for name, reader in self.readers.items()}
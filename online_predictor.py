@@ -0,0 +1,221 @@
+"""在线硬度预测：随新帧到达增量更新特征，给出临时硬度等级和置信度，判定稳定后提前结束"""
+from collections import namedtuple
+import numpy as np
+from config import CONFIG
+from taxel_features import taxel_statistics, taxel_axis_features, taxel_tensor, paxini_values
+import logging
+
+logger = logging.getLogger(__name__)
+
+# label: 最近聚类中心对应的硬度等级（从0开始，与predict_trial一致）
+# margin: 置信度 (d2 - d1) / d2，d1、d2为到最近和次近聚类中心的距离，取值0~1
+# decided: 是否已提前判定（判定后不再更新）
+OnlineEstimate = namedtuple('OnlineEstimate', ['label', 'margin', 'distances', 'features',
+                                               'num_frames', 'decided'])
+
+
+class OnlinePredictor:
+    """按压过程中的在线硬度预测器
+
+    与HardnessProcessor._extract_single_sample_features的特征定义一致，但不需要整段记录：
+    峰值（Z向力最小值）、力统计量（Chan合并的均值/方差）和做功（梯形积分）随新帧增量更新，
+    触点统计与力矩只在峰值帧变化时重新计算。数据完整时的特征与批量提取结果相同。
+
+    每次update()后按聚类中心距离给出临时等级和置信度，置信度连续
+    CONFIG['EARLY_EXIT_STABLE_UPDATES']次不低于CONFIG['EARLY_EXIT_MARGIN']且等级不变时提前判定。
+    """
+
+    def __init__(self, processor, margin_threshold=None, stable_updates=None):
+        self.processor = processor
+        self.margin_threshold = (CONFIG['EARLY_EXIT_MARGIN']
+                                 if margin_threshold is None else margin_threshold)
+        self.stable_updates = stable_updates or CONFIG['EARLY_EXIT_STABLE_UPDATES']
+        self.reset()
+
+    def reset(self):
+        """开始新的一次按压"""
+        self.num_frames = 0
+        self.estimate = None
+        self.decided = False
+        self._stable_count = 0
+        self._stable_label = None
+
+        self._force_count = 0
+        self._force_mean = 0.0
+        self._force_m2 = 0.0
+        self._force_max = -np.inf
+        self._force_min = np.inf
+        self._work_done = 0.0
+        self._last_force = None
+        self._last_position = None
+
+        self._onset_index = None
+        self._onset_force = None
+        self._onset_position = None
+        self._first_force = None
+        self._first_position = None
+
+        self._peak_index = None
+        self._peak_force = np.inf
+        self._peak_position = None
+        self._peak_features = {}
+
+    def update_trial(self, trial):
+        """传入持续增长的TrialData（如TailReader.trial()），只处理上次之后新增的帧"""
+        if trial is not None and trial.num_frames < self.num_frames:
+            # 文件被截断后从头读取
+            self.reset()
+        if trial is None or trial.num_frames <= self.num_frames:
+            return self.estimate
+        start = self.num_frames
+        return self.update(trial.header[start:], trial.taxels[start:])
+
+    def update(self, header, taxels):
+        """处理一批新帧：header为 (帧数, 13) 力/位姿列，taxels为对应的触点数据块
+
+        返回OnlineEstimate；已提前判定后直接返回判定结果。
+        """
+        if self.decided:
+            return self.estimate
+        if len(header) == 0:
+            return self.estimate
+
+        try:
+            self._update_force(header, taxels)
+            features = self.features()
+            if features is None:
+                return self.estimate
+
+            estimate = self._classify(features)
+            if estimate is None:
+                return self.estimate
+            self.estimate = estimate
+            self._check_early_exit()
+            return self.estimate
+
+        except Exception as e:
+            logger.error(f"在线预测失败: {e}")
+            return self.estimate
+
+    def _update_force(self, header, taxels):
+        force = np.asarray(header[:, CONFIG['FORCE_Z_INDEX']], dtype=np.float64)
+        position = np.asarray(header[:, CONFIG['POSITION_Z_INDEX']], dtype=np.float64)
+        start = self.num_frames
+
+        if self._first_force is None:
+            self._first_force = force[0]
+            self._first_position = position[0]
+
+        # 力统计量：按批合并均值与二阶中心矩（Chan算法）
+        count = len(force)
+        batch_mean = force.mean()
+        batch_m2 = np.sum((force - batch_mean) ** 2)
+        total = self._force_count + count
+        delta = batch_mean - self._force_mean
+        self._force_mean += delta * count / total
+        self._force_m2 += batch_m2 + delta * delta * self._force_count * count / total
+        self._force_count = total
+        self._force_max = max(self._force_max, force.max())
+        self._force_min = min(self._force_min, force.min())
+
+        # 做功：|F|对z的梯形积分，包含与上一批最后一帧之间的一段
+        abs_force = np.abs(force)
+        if self._last_force is not None:
+            abs_force = np.concatenate(([abs(self._last_force)], abs_force))
+            position_all = np.concatenate(([self._last_position], position))
+        else:
+            position_all = position
+        if len(abs_force) > 1:
+            self._work_done += np.sum(np.diff(position_all) * (abs_force[1:] + abs_force[:-1]) / 2.0)
+        self._last_force = force[-1]
+        self._last_position = position[-1]
+
+        # 按压起点：第一帧低于起压阈值的帧
+        if self._onset_index is None:
+            onset = np.flatnonzero(force < CONFIG['PRESS_ONSET_FORCE'])
+            if len(onset) > 0:
+                self._onset_index = start + int(onset[0])
+                self._onset_force = force[onset[0]]
+                self._onset_position = position[onset[0]]
+
+        # 峰值：Z向力最小值，取最早出现的位置；变化时重新计算峰值帧的触点统计与力矩
+        local_peak = int(np.argmin(force))
+        if force[local_peak] < self._peak_force:
+            self._peak_force = force[local_peak]
+            self._peak_position = position[local_peak]
+            self._peak_index = start + local_peak
+            self._peak_features = self._extract_peak_features(header[local_peak], taxels[local_peak])
+
+        self.num_frames += count
+
+    def _extract_peak_features(self, header_row, taxel_row):
+        features = {}
+
+        paxini = np.asarray(paxini_values(taxel_row, self.processor.paxini_axis), dtype=np.float64)
+        paxini = paxini[~np.isnan(paxini)]
+        if len(paxini) > 0:
+            features.update(taxel_statistics(paxini))
+            if len(paxini) < 2:
+                del features['paxini_skew'], features['paxini_kurtosis']
+        features.update(taxel_axis_features(taxel_tensor(taxel_row)))
+
+        for i, value in enumerate(header_row[CONFIG['TORQUE_INDICES']]):
+            if not np.isnan(value):
+                features[f'torque_{i}'] = value
+        return features
+
+    def features(self):
+        """当前已接收数据的特征字典（与批量特征提取的键一致），无法计算刚度时返回None"""
+        if self.num_frames == 0:
+            return None
+
+        # 与批量提取一致：起压点在峰值之后时以第一帧为起点
+        if self._onset_index is not None and self._onset_index <= self._peak_index:
+            start_force, start_position = self._onset_force, self._onset_position
+        else:
+            start_force, start_position = self._first_force, self._first_position
+
+        delta_fz = self._peak_force - start_force
+        delta_z = start_position - self._peak_position
+        if abs(delta_z) < 1e-9:
+            return None
+
+        features = {
+            'stiffness': abs(delta_fz / delta_z),
+            'start_force': start_force,
+            'peak_force': self._peak_force,
+            'max_force': self._force_max,
+            'min_force': self._force_min,
+            'mean_force': self._force_mean,
+            'force_range': self._force_max - self._force_min,
+            'force_std': np.sqrt(self._force_m2 / self._force_count),
+            'peak_index': self._peak_index,
+            'work_done': self._work_done if self.num_frames > 1 else 0,
+        }
+        features.update(self._peak_features)
+        return features
+
+    def _classify(self, features):
+        processor = self.processor
+        feature_vector = [features.get(key, 0) for key in processor.feature_names]
+        if not np.all(np.isfinite(feature_vector)):
+            # 接触前触点数据全为常数，偏度/峰度无定义
+            return None
+        _, grade, distances, margin = processor.engine.assign_one(feature_vector)
+        return OnlineEstimate(grade, margin, distances, features, self.num_frames, False)
+
+    def _check_early_exit(self):
+        # 尚未起压时不判定
+        if self._onset_index is None or self.estimate.margin < self.margin_threshold:
+            self._stable_count = 0
+        elif self.estimate.label == self._stable_label:
+            self._stable_count += 1
+        else:
+            self._stable_count = 1
+        self._stable_label = self.estimate.label
+
+        if self._stable_count >= self.stable_updates:
+            self.decided = True
+            self.estimate = self.estimate._replace(decided=True)
+            logger.info(f"提前判定硬度等级 {self.estimate.label + 1}（第 {self.num_frames} 帧，"
+                        f"置信度 {self.estimate.margin:.2f}）")
@@ -0,0 +1,160 @@
+"""按压周期分割：在连续记录的Z向力序列中找出每一次按压（起压、峰值、松开），每次按压作为一个样本"""
+import os
+from collections import namedtuple
+import numpy as np
+from config import CONFIG
+from trial_data import TrialData
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 帧号均为整段序列中的绝对位置，区间左闭右开
+# start/end: 该次按压所属的数据窗口（上一次松开 ~ 本次松开，最后一次按压延伸到序列末尾）
+# onset: 起压帧（Z向力低于PRESS_ONSET_FORCE），peak: Z向力最小值（最早出现的位置）
+# release: 松开帧（Z向力高于PRESS_RELEASE_FORCE），complete: 是否已松开
+PressCycle = namedtuple('PressCycle', ['start', 'onset', 'peak', 'release', 'end', 'complete'])
+
+
+def hysteresis_state(force_z, press_force=None, release_force=None, initial=False):
+    """滞回比较：低于press_force进入按压状态，高于release_force退出，两者之间保持原状态
+
+    返回每帧是否处于按压状态的布尔数组；initial为序列开始前的状态。NaN视为保持原状态。
+    """
+    if press_force is None:
+        press_force = CONFIG['PRESS_ONSET_FORCE']
+    if release_force is None:
+        release_force = CONFIG['PRESS_RELEASE_FORCE']
+
+    force_z = np.asarray(force_z, dtype=np.float64)
+    pressed = force_z < press_force
+    released = force_z > release_force
+
+    # 每帧取最近一次触发（按压或松开）的帧，向前填充
+    triggered = np.where(pressed | released, np.arange(len(force_z)), -1)
+    last = np.maximum.accumulate(triggered) if len(force_z) else triggered
+    return np.where(last >= 0, pressed[last], initial)
+
+
+class PressSegmenter:
+    """流式按压周期分割器
+
+    每次feed()传入新到达的一段Z向力数据，返回其中完成（已松开）的按压周期；
+    状态在调用之间保持，可直接用于实时采集。finish()结束数据流并返回未松开的最后一次按压。
+    持续时间不足PRESS_MIN_FRAMES帧的按压视为噪声丢弃。
+    """
+
+    def __init__(self, press_force=None, release_force=None, min_frames=None):
+        self.press_force = CONFIG['PRESS_ONSET_FORCE'] if press_force is None else press_force
+        self.release_force = CONFIG['PRESS_RELEASE_FORCE'] if release_force is None else release_force
+        self.min_frames = CONFIG['PRESS_MIN_FRAMES'] if min_frames is None else min_frames
+        self.reset()
+
+    def reset(self):
+        self.num_frames = 0
+        self._pressed = False
+        self._window_start = 0
+        self._onset = None
+        self._peak = None
+        self._peak_force = np.inf
+
+    def feed(self, force_z):
+        """处理新的一段Z向力数据，返回本段内完成的PressCycle列表"""
+        force_z = np.asarray(force_z, dtype=np.float64)
+        count = len(force_z)
+        if count == 0:
+            return []
+
+        state = hysteresis_state(force_z, self.press_force, self.release_force, self._pressed)
+        previous = np.concatenate(([self._pressed], state[:-1]))
+        run_starts = np.flatnonzero(state & ~previous)
+        run_ends = np.flatnonzero(~state & previous)
+        if self._pressed:
+            # 延续上一段的按压（可能在本段第0帧即松开）
+            run_starts = np.concatenate(([0], run_starts))
+        if state[-1]:
+            run_ends = np.concatenate((run_ends, [count]))
+
+        offset = self.num_frames
+        cycles = []
+        for run_start, run_end in zip(run_starts, run_ends):
+            if self._onset is None:
+                self._onset = offset + int(run_start)
+
+            if run_end > run_start:
+                local_peak = run_start + int(np.argmin(force_z[run_start:run_end]))
+                if force_z[local_peak] < self._peak_force:
+                    self._peak_force = force_z[local_peak]
+                    self._peak = offset + int(local_peak)
+
+            if run_end < count:
+                cycle = self._close(offset + int(run_end), complete=True)
+                if cycle is not None:
+                    cycles.append(cycle)
+
+        self._pressed = bool(state[-1])
+        self.num_frames += count
+        return cycles
+
+    def finish(self):
+        """数据结束：未松开的按压以序列末尾为终点返回，没有时返回None"""
+        if self._onset is None:
+            return None
+        cycle = self._close(self.num_frames, complete=False)
+        self._pressed = False
+        return cycle
+
+    def _close(self, release, complete):
+        onset, peak = self._onset, self._peak
+        self._onset = None
+        self._peak = None
+        self._peak_force = np.inf
+
+        if release - onset < self.min_frames:
+            return None
+        cycle = PressCycle(self._window_start, onset, peak, release, release, complete)
+        self._window_start = release
+        return cycle
+
+
+def find_press_cycles(force_z, press_force=None, release_force=None, min_frames=None):
+    """找出整段Z向力序列中的全部按压周期
+
+    各周期的数据窗口首尾相接覆盖整段序列：第一次按压从第0帧开始，最后一次按压延伸到序列末尾，
+    因此只有一次按压的记录得到的窗口就是整个文件。
+    """
+    segmenter = PressSegmenter(press_force, release_force, min_frames)
+    cycles = segmenter.feed(force_z)
+    last = segmenter.finish()
+    if last is not None:
+        cycles.append(last)
+    if cycles:
+        cycles[-1] = cycles[-1]._replace(end=len(force_z))
+    return cycles
+
+
+def cycle_name(file_name, number):
+    """第number次按压的样本名，如 '大椎.csv' -> '大椎#2.csv'"""
+    base, ext = os.path.splitext(file_name)
+    return f"{base}#{number}{ext}"
+
+
+def split_trial(trial, cycles=None):
+    """把试验数据按按压周期拆分为多个TrialData（数据为原数组的视图）
+
+    返回 [(样本名, TrialData)]；只有一次按压或未检测到按压时返回整个试验，样本名为原文件名。
+    """
+    if cycles is None:
+        cycles = find_press_cycles(trial.force_z)
+    if len(cycles) <= 1:
+        return [(trial.file_name, trial)]
+
+    samples = []
+    for number, cycle in enumerate(cycles, 1):
+        name = cycle_name(trial.file_name, number)
+        sub_trial = TrialData(trial.file_path,
+                              trial.header[cycle.start:cycle.end],
+                              trial.taxels[cycle.start:cycle.end],
+                              peak_index=cycle.peak - cycle.start)
+        sub_trial.file_name = name
+        samples.append((name, sub_trial))
+    return samples
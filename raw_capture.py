@@ -0,0 +1,183 @@
+"""传感器原始数据采集文件：记录串口收到的原始字节并按原始时序回放
+
+文件结构（小端）：
+    文件头  magic(8) 版本(2) 预留(2) 波特率(4) 开始时间(8, Unix纳秒)
+    记录    长度(4) 时间戳(8, 相对开始时间的单调时钟纳秒) 原始字节
+    ...
+    索引    每CAPTURE_INDEX_STRIDE条记录一项：(文件偏移量(8), 时间戳(8))
+    文件尾  magic(8) 索引偏移量(8) 记录数(8) 索引间隔(4)
+
+文件只追加写入，索引和文件尾在正常关闭时写入；未正常关闭的文件按顺序扫描读取。
+"""
+import os
+import time
+import struct
+import numpy as np
+from config import CONFIG
+import logging
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_MAGIC = b"GEN3CAP\x00"
+CAPTURE_INDEX_MAGIC = b"GEN3IDX\x00"
+CAPTURE_FORMAT_VERSION = 1
+
+_FILE_HEADER = struct.Struct("<8sHHIq")
+_RECORD_HEADER = struct.Struct("<IQ")
+_FOOTER = struct.Struct("<8sQQI")
+
+
+class CaptureWriter:
+    """原始数据采集写入器，每条记录为一次串口读取收到的字节（可能包含半帧或多帧）"""
+
+    def __init__(self, file_path, baudrate=None, index_stride=None):
+        self.file_path = file_path
+        self.baudrate = baudrate or CONFIG['SENSOR_BAUDRATE']
+        self.index_stride = index_stride or CONFIG['CAPTURE_INDEX_STRIDE']
+        self.record_count = 0
+        self.bytes_written = 0
+
+        self._index = []
+        self._start_ns = time.monotonic_ns()
+        self._file = open(file_path, 'wb')
+        self._file.write(_FILE_HEADER.pack(CAPTURE_MAGIC, CAPTURE_FORMAT_VERSION, 0,
+                                           self.baudrate, time.time_ns()))
+        self._offset = _FILE_HEADER.size
+
+    def write(self, data, timestamp_ns=None):
+        """追加一条记录，timestamp_ns为相对开始时间的纳秒数（默认取当前单调时钟）"""
+        if timestamp_ns is None:
+            timestamp_ns = time.monotonic_ns() - self._start_ns
+        if self.record_count % self.index_stride == 0:
+            self._index.append((self._offset, timestamp_ns))
+
+        self._file.write(_RECORD_HEADER.pack(len(data), timestamp_ns))
+        self._file.write(data)
+        self._offset += _RECORD_HEADER.size + len(data)
+        self.record_count += 1
+        self.bytes_written += len(data)
+
+    def close(self):
+        """写入索引和文件尾"""
+        if self._file is None:
+            return
+        index = np.array(self._index, dtype='<u8').reshape(-1, 2)
+        self._file.write(index.tobytes())
+        self._file.write(_FOOTER.pack(CAPTURE_INDEX_MAGIC, self._offset, self.record_count,
+                                      self.index_stride))
+        self._file.close()
+        self._file = None
+        logger.info(f"采集文件已保存: {self.file_path}（{self.record_count} 条记录, {self.bytes_written} 字节）")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CaptureReader:
+    """原始数据采集文件读取器"""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._file = open(file_path, 'rb')
+        try:
+            header = self._file.read(_FILE_HEADER.size)
+            if len(header) < _FILE_HEADER.size:
+                raise ValueError("文件过短")
+            magic, version, _, self.baudrate, self.start_time_ns = _FILE_HEADER.unpack(header)
+            if magic != CAPTURE_MAGIC:
+                raise ValueError("不是采集文件")
+            if version != CAPTURE_FORMAT_VERSION:
+                raise ValueError(f"不支持的采集文件版本: {version}")
+            self._load_index()
+        except Exception:
+            self._file.close()
+            raise
+
+    def _load_index(self):
+        size = os.fstat(self._file.fileno()).st_size
+        if size >= _FILE_HEADER.size + _FOOTER.size:
+            self._file.seek(size - _FOOTER.size)
+            magic, index_offset, record_count, stride = _FOOTER.unpack(self._file.read(_FOOTER.size))
+            if magic == CAPTURE_INDEX_MAGIC:
+                self._file.seek(index_offset)
+                raw = self._file.read(size - _FOOTER.size - index_offset)
+                self.index = np.frombuffer(raw, dtype='<u8').reshape(-1, 2)
+                self.record_count = record_count
+                self.index_stride = stride
+                self._data_end = index_offset
+                return
+
+        # 未正常关闭：顺序扫描完整记录并重建索引
+        logger.warning(f"采集文件未正常关闭，按顺序扫描: {self.file_path}")
+        self.index_stride = CONFIG['CAPTURE_INDEX_STRIDE']
+        entries = []
+        offset = _FILE_HEADER.size
+        count = 0
+        self._file.seek(offset)
+        while True:
+            header = self._file.read(_RECORD_HEADER.size)
+            if len(header) < _RECORD_HEADER.size:
+                break
+            length, timestamp_ns = _RECORD_HEADER.unpack(header)
+            if offset + _RECORD_HEADER.size + length > size:
+                break
+            if count % self.index_stride == 0:
+                entries.append((offset, timestamp_ns))
+            offset += _RECORD_HEADER.size + length
+            self._file.seek(offset)
+            count += 1
+        self.index = np.array(entries, dtype='<u8').reshape(-1, 2)
+        self.record_count = count
+        self._data_end = offset
+
+    def __len__(self):
+        return self.record_count
+
+    def records(self, start=0):
+        """从第start条记录开始依次返回 (时间戳纳秒, 原始字节)"""
+        if start >= self.record_count:
+            return
+        entry = start // self.index_stride
+        offset = int(self.index[entry, 0])
+        skip = start - entry * self.index_stride
+
+        self._file.seek(offset)
+        for _ in range(self.record_count - entry * self.index_stride):
+            length, timestamp_ns = _RECORD_HEADER.unpack(self._file.read(_RECORD_HEADER.size))
+            if skip > 0:
+                self._file.seek(length, os.SEEK_CUR)
+                skip -= 1
+                continue
+            yield timestamp_ns, self._file.read(length)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def replay_capture(file_path, sink, speed=1.0, start=0):
+    """按记录的时序把原始字节依次交给sink（如Gen3SensorReader.feed）
+
+    speed为1时按原始速度，为N时N倍速，为None时不等待、以最快速度回放。返回回放的记录数。
+    """
+    count = 0
+    with CaptureReader(file_path) as capture:
+        origin = None
+        for timestamp_ns, data in capture.records(start):
+            if speed:
+                if origin is None:
+                    origin = time.perf_counter() - timestamp_ns / 1e9 / speed
+                delay = origin + timestamp_ns / 1e9 / speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            sink(data)
+            count += 1
+    return count
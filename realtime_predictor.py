@@ -1,10 +1,13 @@
 import os
 import time
+from collections import OrderedDict
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
-from core_processor import HardnessProcessor
+from core_processor import HardnessProcessor, split_samples
+from trial_data import load_trial
+from file_watcher import create_watcher, EVENT_CREATED, EVENT_COMPLETED
+from tail_reader import TailReader
+from online_predictor import OnlinePredictor
+from model_format import find_model_path
 from config import CONFIG
 import logging
 
@@ -19,16 +22,22 @@ class RealTimePredictor:
         self.im = None
         self.current_hardness = None
         self.current_grid = None
+        self.watcher = None
+        self.pending_file = None
+        self.tail_reader = None
+        self.online_predictor = None
+        self.result_cache = OrderedDict()
         
     def load_model(self):
         """加载预训练模型"""
-        model_path = os.path.join(CONFIG['MODEL_DIR'], 'hardness_model.pkl')
-        if not os.path.exists(model_path):
+        model_path = find_model_path()
+        if model_path is None:
             print("未找到预训练模型，请先运行离线训练")
             return False
         
         if self.processor.load_model(model_path):
             self.model_loaded = True
+            self.online_predictor = OnlinePredictor(self.processor)
             print("模型加载成功")
             return True
         else:
@@ -37,6 +46,8 @@ class RealTimePredictor:
     
     def setup_visualization(self):
         """设置实时可视化"""
+        import matplotlib.pyplot as plt
+        
         plt.rcParams['font.sans-serif'] = [CONFIG['CHINESE_FONT']]
         plt.rcParams['axes.unicode_minus'] = False
         
@@ -66,7 +77,7 @@ class RealTimePredictor:
         plt.tight_layout()
     
     def get_latest_data_file(self):
-        """获取最新的数据文件（模拟实时数据）"""
+        """获取最新的数据文件（仅在启动监听时扫描一次目录）"""
         csv_files = [f for f in os.listdir(CONFIG['DATA_DIR']) if f.endswith('.csv')]
         if not csv_files:
             return None
@@ -75,43 +86,113 @@ class RealTimePredictor:
         latest_file = max(csv_files, key=lambda x: os.path.getctime(os.path.join(CONFIG['DATA_DIR'], x)))
         return os.path.join(CONFIG['DATA_DIR'], latest_file)
     
+    def predict_file_cached(self, file_path):
+        """预测文件硬度，结果按 (路径, 修改时间, 大小) 缓存，未变化的文件不会重复预测
+
+        与离线训练、批量预测相同，一个文件包含多次按压时每次按压作为一个样本分别预测，
+        返回 [(样本名, 硬度等级, 网格得分, 特征, 帧数)]（只含预测成功的样本），全部失败时返回None。
+        """
+        stat = os.stat(file_path)
+        key = (file_path, stat.st_mtime_ns, stat.st_size)
+        if key in self.result_cache:
+            self.result_cache.move_to_end(key)
+            return self.result_cache[key]
+        
+        # 解析一次，特征提取与网格生成共用
+        trial = load_trial(file_path)
+        if trial is None:
+            return None
+        
+        samples = split_samples(trial)
+        result = [(name, hardness_level, grid_scores, features, sample.num_frames)
+                  for (name, hardness_level, grid_scores, features), (_, sample)
+                  in zip(self.processor.predict_samples(samples), samples)
+                  if hardness_level is not None and grid_scores is not None]
+        if not result:
+            return None
+        
+        self.result_cache[key] = result
+        while len(self.result_cache) > CONFIG['REALTIME_RESULT_CACHE_SIZE']:
+            self.result_cache.popitem(last=False)
+        return result
+    
     def update_prediction(self, frame):
-        """更新预测结果"""
-        if not self.model_loaded:
+        """更新预测结果 - 采集中的文件增量读取，写入完成的文件完整预测"""
+        if not self.model_loaded or self.watcher is None:
             return
         
-        # 获取最新数据文件
-        file_path = self.get_latest_data_file()
-        if file_path is None:
-            return
+        # 处理目录事件，空闲时不扫描目录也不解析文件
+        for event in self.watcher.poll():
+            if event.kind == EVENT_CREATED:
+                self.tail_reader = TailReader(event.path)
+                self.online_predictor.reset()
+            elif event.kind == EVENT_COMPLETED:
+                self.pending_file = event.path
+                if self.tail_reader is not None and self.tail_reader.file_path == event.path:
+                    self.tail_reader = None
         
         try:
-            # 预测硬度
-            hardness_level, grid_scores, features = self.processor.predict_single_file(file_path)
-            if hardness_level is not None and grid_scores is not None:
-                self.current_hardness = hardness_level
-                self.current_grid = grid_scores
-                
-                # 更新网格图
-                self.im.set_data(grid_scores)
-                self.im.set_clim(0, 255)  # Paxini值范围
+            if self.pending_file is not None:
+                file_path = self.pending_file
+                self.pending_file = None
                 
-                # 更新信息
-                filename = os.path.basename(file_path)
-                self.info_text.set_text(f'文件: {filename}\n硬度等级: {hardness_level + 1}\n更新时间: {time.strftime("%H:%M:%S")}')
-                
-                print(f"实时更新 - 文件: {filename}, 硬度等级: {hardness_level + 1}")
+                result = self.predict_file_cached(file_path)
+                if result is not None:
+                    # 多次按压时依次输出，图中保留最后一次按压的结果
+                    for sample_name, hardness_level, grid_scores, features, num_frames in result:
+                        self.show_realtime_result(sample_name, hardness_level, grid_scores, num_frames)
+            
+            elif self.tail_reader is not None and self.tail_reader.read_new() > 0:
+                # 按压进行中：仅解析新追加的行，在线预测器增量更新特征并给出临时结果
+                trial = self.tail_reader.trial()
+                estimate = self.online_predictor.update_trial(trial)
+                if estimate is not None:
+                    grid_scores = self.processor.create_hardness_grid_for_sample(trial)
+                    status = '提前判定' if estimate.decided else '采集中'
+                    self.show_realtime_result(trial.file_name, estimate.label, grid_scores,
+                                              trial.num_frames, status=status, margin=estimate.margin)
+                    if estimate.decided:
+                        # 结果已稳定，不再读取该文件，写入完成后仍给出完整预测
+                        self.tail_reader = None
                 
+        except FileNotFoundError:
+            logger.warning(f"文件已被移除: {file_path}")
         except Exception as e:
             logger.error(f"实时更新失败: {e}")
     
+    def show_realtime_result(self, filename, hardness_level, grid_scores, num_frames, status='完成', margin=None):
+        """刷新实时网格图和信息，margin为在线预测的置信度"""
+        self.current_hardness = hardness_level
+        self.current_grid = grid_scores
+        
+        confidence = '' if margin is None else f'\n置信度: {margin:.2f}'
+        print(f"实时更新 - 文件: {filename}（{status}）, 硬度等级: {hardness_level + 1}")
+        
+        # 无界面运行时只输出文字结果
+        if self.im is None:
+            return
+        
+        # 更新网格图
+        self.im.set_data(grid_scores)
+        self.im.set_clim(0, 255)  # Paxini值范围
+        
+        # 更新信息
+        self.info_text.set_text(f'文件: {filename}（{status}）\n帧数: {num_frames}\n硬度等级: {hardness_level + 1}{confidence}\n更新时间: {time.strftime("%H:%M:%S")}')
+    
     def start_realtime_monitoring(self):
         """开始实时监控"""
         if not self.load_model():
             return
         
+        import matplotlib.pyplot as plt
+        from matplotlib.animation import FuncAnimation
+        
         self.setup_visualization()
         
+        # 启动目录监听，首帧显示当前最新的文件
+        self.watcher = create_watcher(CONFIG['DATA_DIR'])
+        self.pending_file = self.get_latest_data_file()
+        
         # 创建动画
         ani = FuncAnimation(
             self.fig, 
@@ -124,7 +205,36 @@ class RealTimePredictor:
         print("系统将自动检测数据目录中的新文件并更新预测结果")
         print("按Ctrl+C退出")
         
-        plt.show()
+        try:
+            plt.show()
+        finally:
+            self.watcher.close()
+            self.watcher = None
+    
+    def run_headless(self, interval=None):
+        """无界面实时监控：不加载绘图库，按固定间隔处理目录事件并在终端输出结果
+
+        模型加载失败返回False，Ctrl+C正常退出返回True
+        """
+        if not self.load_model():
+            return False
+        if interval is None:
+            interval = CONFIG['REALTIME_UPDATE_INTERVAL'] / 1000
+        
+        self.watcher = create_watcher(CONFIG['DATA_DIR'])
+        self.pending_file = self.get_latest_data_file()
+        print(f"开始监控 {CONFIG['DATA_DIR']}，按Ctrl+C退出")
+        
+        try:
+            while True:
+                self.update_prediction(None)
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.watcher.close()
+            self.watcher = None
+        return True
     
     def predict_single_file_interactive(self):
         """交互式单文件预测"""
@@ -147,21 +257,30 @@ class RealTimePredictor:
                 return
             
             file_path = os.path.join(CONFIG['DATA_DIR'], csv_files[choice])
+            trial = load_trial(file_path)
+            if trial is None:
+                print("文件解析失败")
+                return
             
-            # 预测硬度
-            hardness_level, grid_scores, features = self.processor.predict_single_file(file_path)
-            if hardness_level is not None and grid_scores is not None:
-                self.show_prediction_result(hardness_level, grid_scores, csv_files[choice], features)
-            else:
-                print("预测失败")
+            # 预测硬度，多次按压时与批量预测一样逐次给出结果
+            samples = split_samples(trial)
+            for (sample_name, hardness_level, grid_scores, features), (_, sample) in zip(
+                    self.processor.predict_samples(samples), samples):
+                if hardness_level is not None and grid_scores is not None:
+                    self.show_prediction_result(hardness_level, grid_scores, sample, features)
+                else:
+                    print(f"{sample_name} 预测失败")
                 
         except (ValueError, IndexError):
             print("无效的输入")
         except Exception as e:
             print(f"预测过程中出现错误: {e}")
     
-    def show_prediction_result(self, hardness_level, grid_scores, filename, features):
+    def show_prediction_result(self, hardness_level, grid_scores, trial, features):
         """显示预测结果"""
+        import matplotlib.pyplot as plt
+        
+        filename = trial.file_name
         plt.rcParams['font.sans-serif'] = [CONFIG['CHINESE_FONT']]
         plt.rcParams['axes.unicode_minus'] = False
         
@@ -177,7 +296,7 @@ class RealTimePredictor:
         
         # 右侧：特征信息
         ax2.axis('off')
-        info_text = f'文件: {filename}\n硬度等级: {hardness_level + 1}\n\n关键特征值:\n'
+        info_text = f'文件: {filename}\n帧数: {trial.num_frames}\n硬度等级: {hardness_level + 1}\n\n关键特征值:\n'
         
         # 显示最重要的几个特征
         important_features = [
@@ -0,0 +1,111 @@
+import io
+import os
+import numpy as np
+from config import CONFIG
+from trial_data import TrialData, parse_csv_frames
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TailReader:
+    """增量读取仍在写入中的记录文件
+
+    记录已读取的文件偏移量，每次只解析新追加的完整行，不完整的末行留到下次读取。
+    数据写入预分配、按需倍增的缓冲区，峰值帧随新数据增量更新。
+    """
+
+    def __init__(self, file_path, initial_capacity=1024):
+        self.file_path = file_path
+        self.offset = 0
+        self.num_frames = 0
+        self._partial = b''
+
+        header_width = CONFIG['PAXINI_START_INDEX']
+        self._header = np.empty((initial_capacity, header_width), dtype=np.float64)
+        self._taxels = np.empty((initial_capacity, CONFIG['NUM_COLUMNS'] - header_width), dtype=np.float64)
+
+        self.peak_index = None
+        self._peak_force = np.inf
+
+    def reset(self):
+        """文件被截断或重写时从头读取"""
+        self.offset = 0
+        self.num_frames = 0
+        self._partial = b''
+        self.peak_index = None
+        self._peak_force = np.inf
+
+    def read_new(self):
+        """读取新追加的完整行，返回新增帧数"""
+        try:
+            size = os.path.getsize(self.file_path)
+            if size < self.offset:
+                logger.warning(f"文件被截断，重新读取: {self.file_path}")
+                self.reset()
+            if size == self.offset:
+                return 0
+
+            with open(self.file_path, 'rb') as f:
+                f.seek(self.offset)
+                chunk = f.read(size - self.offset)
+            self.offset += len(chunk)
+
+            data = self._partial + chunk
+            last_newline = data.rfind(b'\n')
+            if last_newline < 0:
+                self._partial = data
+                return 0
+            self._partial = data[last_newline + 1:]
+
+            frames = self._parse_lines(data[:last_newline + 1])
+            if len(frames) == 0:
+                return 0
+
+            self._append(frames)
+            return len(frames)
+
+        except FileNotFoundError:
+            logger.warning(f"文件不存在: {self.file_path}")
+            return 0
+        except Exception as e:
+            logger.error(f"增量读取 {self.file_path} 失败: {e}")
+            return 0
+
+    def _parse_lines(self, lines):
+        """解析完整行，剔除力或位置缺失的行"""
+        return parse_csv_frames(io.BytesIO(lines))
+
+    def _append(self, frames):
+        needed = self.num_frames + len(frames)
+        if needed > len(self._header):
+            capacity = max(needed, 2 * len(self._header))
+            self._header = self._grow(self._header, capacity)
+            self._taxels = self._grow(self._taxels, capacity)
+
+        header_width = self._header.shape[1]
+        start = self.num_frames
+        self._header[start:needed] = frames[:, :header_width]
+        self._taxels[start:needed] = frames[:, header_width:]
+
+        # 增量更新峰值帧（Z向力最小值，取最早出现的位置）
+        new_force = frames[:, CONFIG['FORCE_Z_INDEX']]
+        local_peak = int(np.argmin(new_force))
+        if new_force[local_peak] < self._peak_force:
+            self._peak_force = new_force[local_peak]
+            self.peak_index = start + local_peak
+
+        self.num_frames = needed
+
+    def _grow(self, array, capacity):
+        grown = np.empty((capacity, array.shape[1]), dtype=array.dtype)
+        grown[:self.num_frames] = array[:self.num_frames]
+        return grown
+
+    def trial(self):
+        """当前已读取数据的TrialData视图（不复制数据）"""
+        if self.num_frames == 0:
+            return None
+        return TrialData(self.file_path,
+                         self._header[:self.num_frames],
+                         self._taxels[:self.num_frames],
+                         peak_index=self.peak_index)
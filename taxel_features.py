@@ -0,0 +1,150 @@
+import numpy as np
+from config import CONFIG
+import logging
+
+logger = logging.getLogger(__name__)
+
+PAXINI_STAT_NAMES = [
+    'paxini_mean', 'paxini_std', 'paxini_max', 'paxini_min', 'paxini_range',
+    'paxini_median', 'paxini_q25', 'paxini_q75', 'paxini_skew', 'paxini_kurtosis'
+]
+
+# 触点张量最后一维的分量顺序：两个切向分量和法向分量
+TAXEL_AXIS_X = 0
+TAXEL_AXIS_Y = 1
+TAXEL_AXIS_Z = 2
+
+TAXEL_AXIS_FEATURE_NAMES = [
+    'normal_force_sum', 'normal_force_max', 'contact_points',
+    'shear_force_sum', 'shear_force_max', 'shear_x_sum', 'shear_y_sum', 'shear_ratio'
+]
+
+# 与scipy.stats.skew/kurtosis一致的零方差判定精度
+_MOMENT_EPS = np.finfo(np.float64).resolution * 10
+
+def taxel_statistics(values):
+    """计算触点数据的统计特征，沿最后一维计算
+
+    values为单帧 (触点数,) 或多帧 (帧数, 触点数)，不含NaN。
+    返回 {特征名: 标量或(帧数,)数组}，偏度/峰度为有偏估计，与scipy.stats结果一致。
+    """
+    values = np.asarray(values, dtype=np.float64)
+
+    mean = values.mean(axis=-1, keepdims=True)
+    deviation = values - mean
+    squared = deviation * deviation
+    m2 = squared.mean(axis=-1)
+    m3 = (squared * deviation).mean(axis=-1)
+    m4 = (squared * squared).mean(axis=-1)
+
+    v_max = values.max(axis=-1)
+    v_min = values.min(axis=-1)
+    q25, q50, q75 = np.percentile(values, [25, 50, 75], axis=-1)
+    mean = mean[..., 0][()]
+
+    with np.errstate(all='ignore'):
+        zero_variance = m2 <= (_MOMENT_EPS * mean) ** 2
+        skew = np.where(zero_variance, np.nan, m3 / m2 ** 1.5)
+        kurtosis = np.where(zero_variance, np.nan, m4 / m2 ** 2 - 3.0)
+
+    return {
+        'paxini_mean': mean,
+        'paxini_std': np.sqrt(m2),
+        'paxini_max': v_max,
+        'paxini_min': v_min,
+        'paxini_range': v_max - v_min,
+        'paxini_median': q50,
+        'paxini_q25': q25,
+        'paxini_q75': q75,
+        'paxini_skew': skew[()],
+        'paxini_kurtosis': kurtosis[()],
+    }
+
+
+def frame_taxel_statistics(paxini):
+    """一次性计算所有帧的触点统计特征
+
+    paxini为 (帧数, 触点数)。含NaN的帧剔除NaN后单独计算，全为NaN的帧结果为NaN。
+    """
+    paxini = np.asarray(paxini, dtype=np.float64)
+    nan_rows = np.flatnonzero(np.isnan(paxini).any(axis=1))
+    if len(nan_rows) == 0:
+        return taxel_statistics(paxini)
+
+    filled = paxini.copy()
+    filled[nan_rows] = 0.0
+    result = {name: np.array(value, dtype=np.float64) for name, value in taxel_statistics(filled).items()}
+
+    for row in nan_rows:
+        valid = paxini[row][~np.isnan(paxini[row])]
+        row_stats = taxel_statistics(valid) if len(valid) > 0 else {}
+        for name in PAXINI_STAT_NAMES:
+            result[name][row] = row_stats.get(name, np.nan)
+
+    return result
+
+
+def taxel_tensor(taxels, layout=None):
+    """把触点数据块视为 (..., 触点数, 3) 的张量（不复制数据）
+
+    taxels为单帧 (717,) 或多帧 (帧数, 717)。layout为CONFIG['TAXEL_LAYOUT']：
+    'interleaved' 每个触点依次为x, y, z（与串口数据顺序一致）；'planar' 先是全部触点的x，再是y、z。
+    """
+    if layout is None:
+        layout = CONFIG['TAXEL_LAYOUT']
+    num_points = CONFIG['PAXINI_NUM_POINTS']
+    block = taxels[..., :3 * num_points]
+
+    if layout == 'interleaved':
+        return block.reshape(block.shape[:-1] + (num_points, 3))
+    if layout == 'planar':
+        return block.reshape(block.shape[:-1] + (3, num_points)).swapaxes(-1, -2)
+    raise ValueError(f"未知的触点数据布局: {layout}")
+
+
+# paxini_values的axis默认值：取CONFIG['PAXINI_AXIS']（None本身表示旧版取法，不能作为默认值）
+CONFIG_AXIS = 'config'
+
+
+def paxini_values(taxels, axis=CONFIG_AXIS):
+    """用于统计特征和硬度网格的触点数据 (..., 触点数)，为视图
+
+    axis为分量序号时取各触点的该分量（2为法向力）；为None时沿用旧版本的取法，
+    即触点数据块的前PAXINI_NUM_POINTS列。默认取CONFIG['PAXINI_AXIS']，
+    按已训练模型预测时应传入模型记录的分量。
+    """
+    if axis == CONFIG_AXIS:
+        axis = CONFIG['PAXINI_AXIS']
+    if axis is None:
+        return taxels[..., :CONFIG['PAXINI_NUM_POINTS']]
+    return taxel_tensor(taxels)[..., axis]
+
+
+def taxel_axis_features(tensor):
+    """按分量计算触点的法向力与切向力特征，沿最后两维 (触点数, 3) 计算
+
+    tensor为单帧 (触点数, 3) 或多帧 (帧数, 触点数, 3)，缺失值按0处理。
+    返回 {特征名: 标量或(帧数,)数组}：法向力总和/最大值、接触点数、
+    切向力（x, y合成）总和/最大值、切向力x/y分量总和以及切向力与法向力总和之比。
+    """
+    tensor = np.nan_to_num(np.asarray(tensor, dtype=np.float64))
+    normal = tensor[..., TAXEL_AXIS_Z]
+    shear_x = tensor[..., TAXEL_AXIS_X]
+    shear_y = tensor[..., TAXEL_AXIS_Y]
+    shear = np.hypot(shear_x, shear_y)
+
+    normal_sum = normal.sum(axis=-1)
+    shear_sum = shear.sum(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shear_ratio = np.where(normal_sum > 0, shear_sum / normal_sum, 0.0)
+
+    return {
+        'normal_force_sum': normal_sum,
+        'normal_force_max': normal.max(axis=-1),
+        'contact_points': (normal > CONFIG['TAXEL_CONTACT_THRESHOLD']).sum(axis=-1, dtype=np.float64),
+        'shear_force_sum': shear_sum,
+        'shear_force_max': shear.max(axis=-1),
+        'shear_x_sum': shear_x.sum(axis=-1),
+        'shear_y_sum': shear_y.sum(axis=-1),
+        'shear_ratio': shear_ratio[()],
+    }
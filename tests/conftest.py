@@ -0,0 +1,76 @@
+"""测试配置：项目模块位于仓库根目录（平铺结构），加入导入路径；训练、加载模型共用的fixture"""
+import os
+import pickle
+import shutil
+import sys
+from contextlib import contextmanager
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import BASE_DIR, CONFIG  # noqa: E402
+
+SAMPLE_DATA_DIR = os.path.join(BASE_DIR, 'data92', 'data926')
+
+
+@pytest.fixture(scope='session')
+def sample_files():
+    """仓库自带的样例记录（完整路径，按文件名排序）"""
+    return sorted(os.path.join(SAMPLE_DATA_DIR, f) for f in os.listdir(SAMPLE_DATA_DIR) if f.endswith('.csv'))
+
+
+@pytest.fixture(scope='session')
+def sample_workspace(sample_files):
+    """返回上下文管理器 workspace(root, file_paths=None)
+
+    在root下建立数据、模型和输出目录并复制记录（默认全部样例记录），期间CONFIG指向这些目录，
+    不读写仓库中的results/和models/。
+    """
+    @contextmanager
+    def workspace(root, file_paths=None):
+        data_dir = os.path.join(root, 'data')
+        os.makedirs(data_dir)
+        for file_path in sample_files if file_paths is None else file_paths:
+            shutil.copy(file_path, data_dir)
+
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setitem(CONFIG, 'DATA_DIR', data_dir)
+            mp.setitem(CONFIG, 'MODEL_DIR', os.path.join(root, 'models'))
+            mp.setitem(CONFIG, 'OUTPUT_DIR', os.path.join(root, 'results'))
+            mp.setitem(CONFIG, 'FEATURE_WORKERS', 1)
+            os.makedirs(CONFIG['MODEL_DIR'])
+            os.makedirs(CONFIG['OUTPUT_DIR'])
+            yield data_dir
+
+    return workspace
+
+
+@pytest.fixture(scope='session')
+def load_processor():
+    """返回 load(model_path)：加载模型并返回HardnessProcessor，加载失败时测试失败"""
+    from core_processor import HardnessProcessor
+
+    def load(model_path, **kwargs):
+        processor = HardnessProcessor()
+        assert processor.load_model(model_path, **kwargs)
+        return processor
+
+    return load
+
+
+@pytest.fixture(scope='session')
+def write_legacy_pickle():
+    """返回 write(processor, path)：按旧版save_model的字典格式保存pickle模型（另记录触点分量）"""
+    def write(processor, path):
+        with open(path, 'wb') as f:
+            pickle.dump({
+                'scaler': processor.scaler,
+                'cluster_model': processor.cluster_model,
+                'feature_names': processor.feature_names,
+                'coordinates': processor.coordinates,
+                'paxini_axis': processor.paxini_axis,
+            }, f)
+        return path
+
+    return write
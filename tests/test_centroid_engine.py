@@ -0,0 +1,67 @@
+"""最近聚类中心推理：标签与 scaler.transform + KMeans.predict 完全一致，距离与KMeans.transform一致，置信度在0~1"""
+import numpy as np
+import pytest
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+
+from centroid_engine import CentroidEngine
+from model_format import ArrayScaler, CentroidModel
+
+
+@pytest.fixture(scope='module')
+def fitted():
+    """在尺度差异很大的特征上拟合的StandardScaler和KMeans，以及加入扰动的待预测特征"""
+    rng = np.random.default_rng(0)
+    feature_scale = np.logspace(-3, 4, 22)
+    centers = rng.normal(0.0, 3.0, (4, 22))
+    train = np.vstack([center + rng.normal(0.0, 1.0, (50, 22)) for center in centers]) * feature_scale
+    scaler = StandardScaler().fit(train)
+    kmeans = KMeans(n_clusters=4, random_state=0, n_init=10).fit(scaler.transform(train))
+
+    # 扰动后的训练样本，再加上远离聚类和靠近两聚类中点（标签容易翻转）的样本
+    perturbed = train + rng.normal(0.0, 0.5, train.shape) * feature_scale
+    far = rng.normal(0.0, 50.0, (50, 22)) * feature_scale
+    centers_raw = scaler.inverse_transform(kmeans.cluster_centers_)
+    midpoints = (centers_raw[0] + centers_raw[1]) / 2 + rng.normal(0.0, 1e-3, (50, 22)) * feature_scale
+    return scaler, kmeans, np.vstack([perturbed, far, midpoints])
+
+
+def test_labels_match_kmeans_predict(fitted):
+    scaler, kmeans, features = fitted
+    engine = CentroidEngine.from_model(scaler, kmeans)
+    expected = kmeans.predict(scaler.transform(features))
+    assert np.array_equal(engine.assign(features).labels, expected)
+    assert [engine.assign_one(row)[0] for row in features[:20]] == expected[:20].tolist()
+
+
+def test_distances_match_kmeans_transform(fitted):
+    scaler, kmeans, features = fitted
+    assignment = CentroidEngine.from_model(scaler, kmeans).assign(features)
+    np.testing.assert_allclose(assignment.distances, kmeans.transform(scaler.transform(features)),
+                               rtol=1e-9, atol=1e-9)
+
+
+def test_margins_between_zero_and_one(fitted):
+    scaler, kmeans, features = fitted
+    margins = CentroidEngine.from_model(scaler, kmeans).assign(features).margins
+    assert np.all((margins >= 0.0) & (margins <= 1.0))
+    # 到最近中心距离为0时置信度为1
+    centers_raw = scaler.inverse_transform(kmeans.cluster_centers_)
+    assert np.allclose(CentroidEngine.from_model(scaler, kmeans).assign(centers_raw).margins, 1.0)
+
+
+def test_grades_follow_label_map(fitted):
+    scaler, kmeans, features = fitted
+    label_map = np.array([2, 0, 3, 1])
+    assignment = CentroidEngine.from_model(scaler, kmeans, label_map).assign(features)
+    assert np.array_equal(assignment.grades, label_map[assignment.labels])
+
+
+def test_array_model_matches_sklearn(fitted):
+    # 目录格式模型加载后的ArrayScaler/CentroidModel与sklearn对象的推理结果相同
+    scaler, kmeans, features = fitted
+    array_scaler = ArrayScaler(scaler.mean_, scaler.scale_)
+    centroid_model = CentroidModel(kmeans.cluster_centers_)
+    scaled = array_scaler.transform(features)
+    np.testing.assert_array_equal(scaled, scaler.transform(features))
+    assert np.array_equal(centroid_model.predict(scaled), kmeans.predict(scaled))
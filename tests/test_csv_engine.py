@@ -0,0 +1,155 @@
+"""CSV解析：NumPy解析与改动前的pandas解析结果一致，非数值单元格和列数不齐的行改用pandas解析
+
+data92下的全部记录分别按改动前的方式和NumPy解析，比较数值矩阵、特征、硬度等级和网格。
+"""
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks import corpus_files
+from config import CONFIG
+from core_processor import HardnessProcessor
+from trial_data import TrialData, parse_csv_frames, parse_trial_csv
+
+NUM_COLUMNS = CONFIG['NUM_COLUMNS']
+DATA_FILES = corpus_files()
+RTOL, ATOL = 1e-12, 1e-15
+
+
+def legacy_parse(source):
+    """改动前的解析方式：pandas默认精度读取，非数值单元格转为NaN，剔除力或位置缺失的行"""
+    df = pd.read_csv(source, header=None, names=[f'col_{i}' for i in range(NUM_COLUMNS)],
+                     low_memory=False)
+    df = df.apply(pd.to_numeric, errors='coerce')
+    frames = df.to_numpy(dtype=np.float64)
+    valid = ~np.isnan(frames[:, CONFIG['FORCE_Z_INDEX']]) & ~np.isnan(frames[:, CONFIG['POSITION_Z_INDEX']])
+    return frames[valid]
+
+
+def legacy_trial(file_path):
+    """改动前的解析结果构造的TrialData（全部列为float64）"""
+    frames = legacy_parse(file_path)
+    header_width = CONFIG['PAXINI_START_INDEX']
+    return TrialData(file_path, np.ascontiguousarray(frames[:, :header_width]),
+                     np.ascontiguousarray(frames[:, header_width:]))
+
+
+def assert_matches_legacy(frames, reference):
+    # pandas默认的快速浮点解析不保证精确舍入，与精确解析的差异在1e-12以内
+    assert frames.shape == reference.shape
+    np.testing.assert_allclose(frames, reference, rtol=RTOL, atol=ATOL, equal_nan=True)
+
+
+@pytest.fixture(scope='module')
+def trained(tmp_path_factory, sample_workspace):
+    """在临时目录中用样例记录训练的模型"""
+    with sample_workspace(str(tmp_path_factory.mktemp('csv_engine'))):
+        processor = HardnessProcessor()
+        assert processor.process_all_files()
+        assert processor.train_clustering_model() is not None
+        yield processor
+
+
+def write_rows(path, rows):
+    path.write_text('\n'.join(','.join(row) for row in rows) + '\n', encoding='utf-8')
+    return str(path)
+
+
+@pytest.fixture
+def numeric_rows():
+    """全数值的记录：力/位姿为多位小数，触点为整数，与采集文件一致"""
+    rng = np.random.default_rng(0)
+    rows = []
+    for _ in range(40):
+        header = [repr(float(v)) for v in rng.normal(0.0, 2.0, CONFIG['PAXINI_START_INDEX'])]
+        taxels = [str(int(v)) for v in rng.integers(-128, 256, NUM_COLUMNS - CONFIG['PAXINI_START_INDEX'])]
+        rows.append(header + taxels)
+    return rows
+
+
+@pytest.fixture
+def mixed_rows(numeric_rows):
+    """含非数值单元格（触点列、Z向力列）和列数不齐的行"""
+    rows = [list(row) for row in numeric_rows]
+    rows[3][100] = 'abc'
+    rows[5][CONFIG['FORCE_Z_INDEX']] = 'n/a'
+    rows[7] = rows[7][:NUM_COLUMNS - 50]
+    return rows
+
+
+def test_numpy_matches_legacy_parser(tmp_path, numeric_rows):
+    path = write_rows(tmp_path / 'numeric.csv', numeric_rows)
+    assert_matches_legacy(parse_csv_frames(path, engine='numpy'), legacy_parse(path))
+
+
+def test_numpy_matches_pandas_engine_bitwise(tmp_path, numeric_rows):
+    path = write_rows(tmp_path / 'numeric.csv', numeric_rows)
+    frames = parse_csv_frames(path, engine='numpy')
+    assert np.array_equal(frames, parse_csv_frames(path, engine='pandas'), equal_nan=True)
+
+
+@pytest.mark.parametrize('file_path', DATA_FILES, ids=os.path.basename)
+def test_recordings_match_legacy_parser(file_path):
+    assert_matches_legacy(parse_csv_frames(file_path, engine='numpy'), legacy_parse(file_path))
+    numpy_trial = parse_trial_csv(file_path, engine='numpy')
+    pandas_trial = parse_trial_csv(file_path, engine='pandas')
+    assert np.array_equal(numpy_trial.header, pandas_trial.header, equal_nan=True)
+    assert np.array_equal(numpy_trial.taxels, pandas_trial.taxels, equal_nan=True)
+    assert numpy_trial.taxels.dtype == pandas_trial.taxels.dtype
+
+
+@pytest.mark.parametrize('file_path', DATA_FILES, ids=os.path.basename)
+def test_recordings_predict_like_legacy_parser(trained, file_path):
+    reference = legacy_trial(file_path)
+    trial = parse_trial_csv(file_path, engine='numpy')
+
+    expected = trained.extract_features_from_trial(reference)
+    features = trained.extract_features_from_trial(trial)
+    assert expected is not None and features is not None
+    assert features.keys() == expected.keys()
+    for key, value in expected.items():
+        if isinstance(value, str):
+            assert features[key] == value
+        else:
+            np.testing.assert_allclose(features[key], value, rtol=RTOL, atol=ATOL, err_msg=key)
+
+    expected_level, expected_grid, _ = trained.predict_trial(reference)
+    level, grid, _ = trained.predict_trial(trial)
+    assert level == expected_level
+    np.testing.assert_allclose(grid, expected_grid, rtol=RTOL, atol=ATOL)
+
+
+def test_fallback_from_path(tmp_path, mixed_rows):
+    path = write_rows(tmp_path / 'mixed.csv', mixed_rows)
+    frames = parse_csv_frames(path, engine='numpy')
+    reference = legacy_parse(path)
+    assert_matches_legacy(frames, reference)
+    # Z向力非数值的行被剔除，其余非数值单元格和缺失的列为NaN
+    assert len(frames) == len(mixed_rows) - 1
+    assert np.isnan(frames[3, 100])
+    assert np.isnan(frames[6, NUM_COLUMNS - 50:]).all()
+
+
+@pytest.mark.parametrize('opener', ['binary_file', 'bytes_io'])
+def test_fallback_from_file_object(tmp_path, mixed_rows, opener):
+    path = write_rows(tmp_path / 'mixed.csv', mixed_rows)
+    expected = parse_csv_frames(path, engine='pandas')
+    if opener == 'binary_file':
+        with open(path, 'rb') as f:
+            frames = parse_csv_frames(f, engine='numpy')
+    else:
+        with open(path, 'rb') as f:
+            frames = parse_csv_frames(io.BytesIO(f.read()), engine='numpy')
+    # NumPy解析失败后回到文件开头，由pandas完整解析
+    assert np.array_equal(frames, expected, equal_nan=True)
+    assert_matches_legacy(frames, legacy_parse(path))
+
+
+def test_numeric_file_object(tmp_path, numeric_rows):
+    path = write_rows(tmp_path / 'numeric.csv', numeric_rows)
+    with open(path, 'rb') as f:
+        frames = parse_csv_frames(f, engine='numpy')
+    assert np.array_equal(frames, parse_csv_frames(path, engine='numpy'))
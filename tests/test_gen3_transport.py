@@ -0,0 +1,87 @@
+"""传输层响应匹配：超时请求的迟到响应被丢弃，不会错配给之后对同一寄存器的请求"""
+import pytest
+
+from gen3_protocol import FUNC_READ, ResponseFrame
+from gen3_transport import Gen3Transport
+
+REG = 0x1000
+
+
+class RecordingSerial:
+    """只记录写出的请求帧，响应由测试直接交给_on_response"""
+
+    def __init__(self):
+        self.written = []
+
+    def write(self, frame):
+        self.written.append(frame)
+
+
+@pytest.fixture
+def transport():
+    transport = Gen3Transport(port='test')
+    transport.serial = RecordingSerial()
+    return transport
+
+
+def reply(transport, data):
+    transport._on_response(ResponseFrame(FUNC_READ, REG, data))
+
+
+def read(transport, future, timeout=0.01):
+    response = transport._wait(future, FUNC_READ, REG, timeout)
+    return None if response is None else response.data
+
+
+def test_in_order_responses_resolve_requests(transport):
+    first = transport.submit(FUNC_READ, REG, 1)
+    second = transport.submit(FUNC_READ, REG, 1)
+    reply(transport, b'\x01')
+    reply(transport, b'\x02')
+    assert (read(transport, first), read(transport, second)) == (b'\x01', b'\x02')
+
+
+def test_late_response_is_discarded(transport):
+    first = transport.submit(FUNC_READ, REG, 1)
+    second = transport.submit(FUNC_READ, REG, 1)
+    assert read(transport, first) is None
+
+    # 第一个请求的迟到响应不能成为第二个请求的结果
+    reply(transport, b'\x01')
+    assert not second.done()
+    reply(transport, b'\x02')
+    assert read(transport, second) == b'\x02'
+
+    third = transport.submit(FUNC_READ, REG, 1)
+    reply(transport, b'\x03')
+    assert read(transport, third) == b'\x03'
+
+
+def test_pipelined_timeouts_discard_each_late_response(transport):
+    futures = [transport.submit(FUNC_READ, REG, 1) for _ in range(3)]
+    assert read(transport, futures[0]) is None
+    assert read(transport, futures[1]) is None
+    for data in (b'\x01', b'\x02', b'\x03'):
+        reply(transport, data)
+    assert read(transport, futures[2]) == b'\x03'
+
+
+def test_lost_response_costs_one_request(transport):
+    # 设备没有响应第一个请求：第二个请求的响应被当作迟到响应丢弃，之后恢复正常匹配
+    first = transport.submit(FUNC_READ, REG, 1)
+    assert read(transport, first) is None
+    second = transport.submit(FUNC_READ, REG, 1)
+    reply(transport, b'\x02')
+    assert read(transport, second) is None
+
+    third = transport.submit(FUNC_READ, REG, 1)
+    reply(transport, b'\x03')
+    assert read(transport, third) == b'\x03'
+
+
+def test_other_registers_unaffected(transport):
+    stale = transport.submit(FUNC_READ, REG, 1)
+    assert read(transport, stale) is None
+    other = transport.submit(FUNC_READ, REG + 1, 1)
+    transport._on_response(ResponseFrame(FUNC_READ, REG + 1, b'\x07'))
+    assert transport._wait(other, FUNC_READ, REG + 1, 0.01).data == b'\x07'
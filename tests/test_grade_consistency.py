@@ -0,0 +1,94 @@
+"""等级一致性：同一训练结果经新格式模型、旧版pickle模型，以及批量预测和实时预测路径得到的等级相同
+
+测试在临时目录中用仓库自带的样例记录训练一个小模型，不读取也不写入results/和models/。
+"""
+import os
+
+import pytest
+
+from config import CONFIG
+from core_processor import HardnessProcessor
+from model_format import LEGACY_MODEL_FILE
+
+
+@pytest.fixture(scope='module')
+def workspace(tmp_path_factory, sample_workspace):
+    """临时的数据、模型和输出目录，CONFIG在本模块的测试期间指向这些目录"""
+    with sample_workspace(str(tmp_path_factory.mktemp('grade_consistency'))) as data_dir:
+        yield data_dir
+
+
+@pytest.fixture(scope='module')
+def trained(workspace, write_legacy_pickle):
+    """训练并保存为新格式模型和旧版pickle模型，返回 (处理器, {样本名: 训练等级})"""
+    processor = HardnessProcessor()
+    assert processor.process_all_files()
+    clustering_info = processor.train_clustering_model()
+    assert clustering_info is not None
+
+    assert processor.save_model(os.path.join(CONFIG['MODEL_DIR'], CONFIG['MODEL_NAME']))
+    write_legacy_pickle(processor, os.path.join(CONFIG['MODEL_DIR'], LEGACY_MODEL_FILE))
+
+    grades = {name: int(grade) for name, grade in zip(processor.file_names, clustering_info['labels'])}
+    return processor, grades
+
+
+def model_path(kind):
+    if kind == 'legacy':
+        return os.path.join(CONFIG['MODEL_DIR'], LEGACY_MODEL_FILE)
+    return os.path.join(CONFIG['MODEL_DIR'], CONFIG['MODEL_NAME'])
+
+
+def test_training_grades_follow_stiffness(trained):
+    processor, grades = trained
+    stiffness = processor.feature_matrix[:, processor.feature_names.index('stiffness')]
+    levels = [grades[name] for name in processor.file_names]
+    by_level = {}
+    for level, value in zip(levels, stiffness):
+        by_level.setdefault(level, []).append(value)
+    means = [sum(values) / len(values) for _, values in sorted(by_level.items())]
+    assert means == sorted(means)
+
+
+@pytest.mark.parametrize('kind', ['bundle', 'legacy'])
+def test_label_map_matches_training(trained, kind, load_processor):
+    processor, _ = trained
+    loaded = load_processor(model_path(kind))
+    assert loaded.label_map.tolist() == processor.label_map.tolist()
+    assert loaded.paxini_axis == processor.paxini_axis
+
+
+@pytest.mark.parametrize('kind', ['bundle', 'legacy'])
+def test_predict_samples_matches_training(trained, kind, load_processor):
+    processor, grades = trained
+    results = load_processor(model_path(kind)).predict_samples(processor.sample_trials())
+    assert {name: grade for name, grade, _, _ in results} == grades
+
+
+@pytest.mark.parametrize('kind', ['bundle', 'legacy'])
+def test_batch_prediction_matches_training(trained, kind, monkeypatch):
+    from main import batch_prediction
+
+    _, grades = trained
+    if kind == 'legacy':
+        # 没有新格式模型时批量预测回退到旧版pickle模型
+        monkeypatch.setitem(CONFIG, 'MODEL_NAME', 'missing_model')
+    results = batch_prediction()
+    assert results is not None
+    assert {r['file_name']: r['hardness_level'] - 1 for r in results} == grades
+
+
+@pytest.mark.parametrize('kind', ['bundle', 'legacy'])
+def test_realtime_prediction_matches_training(trained, kind):
+    from realtime_predictor import RealTimePredictor
+
+    processor, grades = trained
+    predictor = RealTimePredictor()
+    assert predictor.processor.load_model(model_path(kind))
+
+    predicted = {}
+    for filename in processor.source_files:
+        result = predictor.predict_file_cached(os.path.join(CONFIG['DATA_DIR'], filename))
+        assert result is not None
+        predicted.update((name, level) for name, level, _, _, _ in result)
+    assert predicted == grades
@@ -0,0 +1,89 @@
+"""增量训练：数据目录没有新文件时update不改变模型，加入新文件时只累计新样本，旧版模型需先重新训练"""
+import glob
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+import core_processor
+from config import CONFIG
+from incremental_training import IncrementalTrainer
+from main import train_model, update_model
+from model_format import LEGACY_MODEL_FILE, MODEL_META_FILE, default_model_path
+
+
+@pytest.fixture
+def workspace(tmp_path, sample_files, sample_workspace):
+    """用除最后一个样例记录外的文件训练并保存模型，返回 (数据目录, 留作新记录的文件)"""
+    with sample_workspace(str(tmp_path), sample_files[:-1]) as data_dir:
+        assert train_model() is not None
+        yield data_dir, sample_files[-1]
+
+
+def read_meta():
+    with open(os.path.join(default_model_path(), MODEL_META_FILE), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_trained_model_records_files(workspace, load_processor):
+    data_dir, _ = workspace
+    meta = read_meta()
+    assert len(meta['trained_files']) == len(glob.glob(os.path.join(data_dir, '*.csv')))
+    assert IncrementalTrainer(load_processor(default_model_path())).new_files() == []
+
+
+def test_update_on_unchanged_data_dir_is_noop(workspace):
+    before = read_meta()
+    assert update_model() == 0
+    assert read_meta() == before
+
+
+def test_update_adds_only_new_files(workspace):
+    data_dir, new_file = workspace
+    before = read_meta()
+    shutil.copy(new_file, data_dir)
+
+    num_samples = update_model()
+    assert num_samples > 0
+    after = read_meta()
+    assert after['n_samples_seen'] == before['n_samples_seen'] + num_samples
+    assert len(after['trained_files']) == len(before['trained_files']) + 1
+
+    # 再次运行时新文件已记录在模型中
+    assert update_model() == 0
+    assert read_meta() == after
+
+
+def test_update_path_loads_arrays_into_memory(workspace, load_processor):
+    # 内存映射的数组所在文件在Windows下无法被保存模型时替换
+    mapped = load_processor(default_model_path())
+    loaded = load_processor(default_model_path(), mmap_mode=None)
+    assert isinstance(mapped.coordinates, np.memmap)
+    assert not isinstance(loaded.coordinates, np.memmap)
+    assert not isinstance(loaded.grid_operator, np.memmap)
+
+
+def test_legacy_model_requires_retrain(workspace, load_processor, write_legacy_pickle):
+    legacy_path = write_legacy_pickle(load_processor(default_model_path()),
+                                      os.path.join(CONFIG['MODEL_DIR'], LEGACY_MODEL_FILE))
+    shutil.rmtree(default_model_path())
+
+    legacy = load_processor(legacy_path)
+    assert legacy.trained_files == []
+    with pytest.raises(ValueError):
+        IncrementalTrainer(legacy)
+    assert update_model() is None
+    assert not os.path.exists(default_model_path())
+
+
+def test_file_key_falls_back_to_absolute_path(monkeypatch, tmp_path):
+    file_path = str(tmp_path / 'a.csv')
+    assert core_processor.file_key(file_path) == os.path.relpath(file_path, core_processor.BASE_DIR)
+
+    def relpath_other_drive(path, start=None):
+        raise ValueError("path is on mount 'D:', start on mount 'C:'")
+
+    monkeypatch.setattr(core_processor.os.path, 'relpath', relpath_other_drive)
+    assert core_processor.file_key(file_path) == file_path
@@ -0,0 +1,63 @@
+"""聚类数选择：分离明显的合成数据选出真实k，没有稳定的k时按轮廓系数选择，k不超过样本数-1"""
+import numpy as np
+import pytest
+
+import model_selection
+from config import CONFIG
+from core_processor import HardnessProcessor
+from model_selection import ClusterScore, choose_cluster_count, sweep_cluster_counts
+
+SWEEP_OPTIONS = dict(seeds=[0, 1], bootstraps=3, workers=1)
+
+
+def blobs(k, per_cluster=30, num_features=4, seed=0):
+    """k个相距很远的高斯团"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(0.0, 20.0, (k, num_features))
+    return np.vstack([center + rng.normal(0.0, 0.5, (per_cluster, num_features)) for center in centers])
+
+
+@pytest.mark.parametrize('true_k', [3, 4])
+def test_selects_true_k_on_separated_blobs(true_k):
+    scores = sweep_cluster_counts(blobs(true_k), k_values=range(2, 7), **SWEEP_OPTIONS)
+    assert [score.k for score in scores] == list(range(2, 7))
+    assert choose_cluster_count(scores) == true_k
+
+
+def test_prefers_stable_k_over_higher_silhouette():
+    scores = [ClusterScore(2, 0.9, 0.0, 0.5, 1.0), ClusterScore(3, 0.6, 0.0, 0.95, 1.0),
+              ClusterScore(4, 0.7, 0.0, 0.85, 1.0)]
+    assert choose_cluster_count(scores, min_stability=0.8) == 4
+
+
+def test_falls_back_to_silhouette_when_no_k_is_stable():
+    scores = [ClusterScore(2, 0.4, 0.0, 0.5, 1.0), ClusterScore(3, 0.7, 0.0, 0.6, 1.0),
+              ClusterScore(4, 0.6, 0.0, 0.7, 1.0)]
+    assert all(score.stability < CONFIG['K_SWEEP_MIN_STABILITY'] for score in scores)
+    assert choose_cluster_count(scores) == 3
+
+
+def test_sweep_drops_k_not_below_sample_count():
+    features = blobs(2, per_cluster=3)
+    scores = sweep_cluster_counts(features, k_values=range(2, 10), **SWEEP_OPTIONS)
+    assert [score.k for score in scores] == list(range(2, len(features)))
+
+    with pytest.raises(ValueError):
+        sweep_cluster_counts(features[:2], k_values=range(2, 10), **SWEEP_OPTIONS)
+
+
+def test_training_uses_sweep_workers(monkeypatch):
+    calls = []
+
+    def select(features_scaled, workers=None):
+        calls.append(workers)
+        return model_selection.ModelSelection(3, [])
+
+    monkeypatch.setattr(model_selection, 'select_cluster_count', select)
+    processor = HardnessProcessor()
+    processor.feature_names = ['stiffness', 'work_done']
+    processor.feature_matrix = blobs(3, num_features=2)
+
+    assert processor.train_clustering_model(select_k=True)['optimal_clusters'] == 3
+    assert processor.train_clustering_model(select_k=True, sweep_workers=2) is not None
+    assert calls == [None, 2]
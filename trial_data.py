@@ -0,0 +1,245 @@
+import os
+import json
+import hashlib
+import numpy as np
+from config import CONFIG
+from taxel_features import taxel_tensor, paxini_values, CONFIG_AXIS
+from atomic_io import atomic_save_array, atomic_save_json
+import logging
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 2
+
+class TrialData:
+    """单次按压试验数据 - 每个CSV文件只解析一次，由特征提取、网格生成和实时显示共享"""
+
+    def __init__(self, file_path, header, taxels, peak_index=None):
+        self.file_path = file_path
+        self.file_name = os.path.basename(file_path)
+
+        # 前13列（力/力矩/位置/四元数）与触点数据块分开存放，各数据块均为其视图
+        self.header = header
+        self.taxels = taxels
+        self.force = header[:, 0:3]
+        self.torque = header[:, CONFIG['TORQUE_INDICES']]
+        self.position = header[:, 6:9]
+        self.force_z = header[:, CONFIG['FORCE_Z_INDEX']]
+        self.position_z = header[:, CONFIG['POSITION_Z_INDEX']]
+
+        # 触点数据按 (帧数, 触点数, 3) 组织，paxini为统计特征与网格使用的分量
+        self.taxel_tensor = taxel_tensor(taxels)
+        self.paxini = paxini_values(taxels)
+
+        self._peak_index = peak_index
+
+    @property
+    def num_frames(self):
+        return len(self.header)
+
+    @property
+    def frames(self):
+        """完整数值矩阵 (帧数, 730)"""
+        return np.hstack([self.header, self.taxels])
+
+    @property
+    def peak_index(self):
+        """峰值帧（Z向力最小值）的行号"""
+        if self._peak_index is None:
+            self._peak_index = int(np.argmin(self.force_z))
+        return self._peak_index
+
+    def paxini_for(self, axis=CONFIG_AXIS):
+        """按指定分量取Paxini触点数据（见paxini_values），与当前配置相同时即为self.paxini"""
+        if axis == CONFIG_AXIS or axis == CONFIG['PAXINI_AXIS']:
+            return self.paxini
+        return paxini_values(self.taxels, axis)
+
+    def peak_paxini(self, axis=CONFIG_AXIS):
+        """峰值帧的Paxini触点数据（float64）"""
+        return np.asarray(self.paxini_for(axis)[self.peak_index], dtype=np.float64)
+
+    def peak_taxel_tensor(self):
+        """峰值帧的触点张量 (触点数, 3)"""
+        return self.taxel_tensor[self.peak_index]
+
+
+def _valid_frames(frames):
+    """剔除力或位置缺失的行"""
+    valid = ~np.isnan(frames[:, CONFIG['FORCE_Z_INDEX']]) & ~np.isnan(frames[:, CONFIG['POSITION_Z_INDEX']])
+    return frames[valid]
+
+
+def _frames_from_dataframe(df):
+    """将DataFrame转换为数值矩阵，并剔除力或位置缺失的行"""
+    import pandas as pd
+    text_cols = df.select_dtypes(exclude='number').columns
+    if len(text_cols) > 0:
+        df[text_cols] = df[text_cols].apply(pd.to_numeric, errors='coerce')
+
+    return _valid_frames(df.to_numpy(dtype=np.float64))
+
+
+def _read_csv_pandas(source):
+    """pandas解析，可处理非数值单元格和列数不齐的行；按round_trip精度解析，与NumPy结果逐位一致"""
+    import pandas as pd
+    df = pd.read_csv(source, header=None,
+                     names=range(CONFIG['NUM_COLUMNS']),
+                     low_memory=False, float_precision='round_trip')
+    return _frames_from_dataframe(df)
+
+
+def _read_csv_numpy(source):
+    """NumPy解析（C实现），只接受全部为数值且列数一致的文件"""
+    frames = np.loadtxt(source, delimiter=',', ndmin=2, dtype=np.float64)
+    if len(frames) == 0:
+        return np.empty((0, CONFIG['NUM_COLUMNS']))
+    if frames.shape[1] != CONFIG['NUM_COLUMNS']:
+        raise ValueError(f"列数 {frames.shape[1]} 与配置不符")
+    return _valid_frames(frames)
+
+
+def parse_csv_frames(source, engine=None):
+    """把CSV文本（文件路径或二进制文件对象）解析为数值矩阵 (帧数, 730)，剔除力或位置缺失的行
+
+    engine为CONFIG['CSV_ENGINE']：'numpy'时先用np.loadtxt解析，遇到非数值单元格或
+    列数不齐时改用pandas；'pandas'时直接使用pandas。两种方式结果逐位一致。
+    """
+    if engine is None:
+        engine = CONFIG['CSV_ENGINE']
+
+    if engine == 'numpy':
+        try:
+            return _read_csv_numpy(source)
+        except ValueError:
+            if hasattr(source, 'seek'):
+                source.seek(0)
+    return _read_csv_pandas(source)
+
+
+def _split_blocks(frames):
+    """拆分为力/位姿列（float64）和触点数据块（可无损表示时使用float32）"""
+    header_width = CONFIG['PAXINI_START_INDEX']
+    header = np.ascontiguousarray(frames[:, :header_width])
+    taxels = frames[:, header_width:]
+
+    taxels32 = taxels.astype(np.float32)
+    if np.array_equal(taxels32, taxels, equal_nan=True):
+        taxels = taxels32
+    return header, np.ascontiguousarray(taxels)
+
+
+def parse_trial_csv(file_path, engine=None):
+    """直接解析CSV文本（不经过缓存）"""
+    frames = parse_csv_frames(file_path, engine)
+    if len(frames) == 0:
+        raise ValueError("没有有效数据行")
+
+    header, taxels = _split_blocks(frames)
+    return TrialData(file_path, header, taxels)
+
+
+def _file_hash(file_path):
+    """计算文件内容哈希"""
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_paths(file_path):
+    """缓存文件位于CSV所在目录下的缓存子目录"""
+    data_dir, filename = os.path.split(os.path.abspath(file_path))
+    cache_dir = os.path.join(data_dir, CONFIG['TRIAL_CACHE_DIR_NAME'])
+    base = os.path.join(cache_dir, filename)
+    return cache_dir, {
+        'meta': base + '.json',
+        'header': base + '.header.npy',
+        'taxels': base + '.taxels.npy',
+    }
+
+
+def _write_meta(paths, stat, content_hash):
+    meta = {
+        'version': CACHE_FORMAT_VERSION,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha1': content_hash,
+    }
+    atomic_save_json(paths['meta'], meta)
+
+
+def _write_cache(file_path, trial, stat, content_hash):
+    """写入二进制缓存"""
+    try:
+        cache_dir, paths = _cache_paths(file_path)
+        os.makedirs(cache_dir, exist_ok=True)
+
+        atomic_save_array(paths['header'], trial.header)
+        atomic_save_array(paths['taxels'], trial.taxels)
+        _write_meta(paths, stat, content_hash)
+    except Exception as e:
+        logger.warning(f"写入缓存失败 {file_path}: {e}")
+
+
+def _load_cached_trial(file_path):
+    """从缓存加载试验数据（内存映射，零拷贝）；缓存失效时重新解析并更新缓存"""
+    stat = os.stat(file_path)
+    _, paths = _cache_paths(file_path)
+
+    meta = None
+    if os.path.exists(paths['meta']):
+        try:
+            with open(paths['meta'], 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('version') != CACHE_FORMAT_VERSION:
+                meta = None
+        except Exception:
+            meta = None
+
+    content_hash = None
+    if meta is not None:
+        # 大小和修改时间一致时直接命中；仅修改时间变化时再比较内容哈希
+        hit = meta['size'] == stat.st_size and meta['mtime_ns'] == stat.st_mtime_ns
+        if not hit and meta['size'] == stat.st_size:
+            content_hash = _file_hash(file_path)
+            hit = meta['sha1'] == content_hash
+
+        if hit:
+            try:
+                header = np.load(paths['header'], mmap_mode='r')
+                taxels = np.load(paths['taxels'], mmap_mode='r')
+                if meta['mtime_ns'] != stat.st_mtime_ns:
+                    _write_meta(paths, stat, content_hash)
+                return TrialData(file_path, header, taxels)
+            except Exception as e:
+                logger.warning(f"读取缓存失败 {file_path}: {e}")
+
+    trial = parse_trial_csv(file_path)
+    if content_hash is None:
+        content_hash = _file_hash(file_path)
+    _write_cache(file_path, trial, stat, content_hash)
+    return trial
+
+
+def load_trial(file_path, use_cache=None):
+    """解析单个CSV文件为TrialData（默认经过二进制缓存）"""
+    if use_cache is None:
+        use_cache = CONFIG['TRIAL_CACHE_ENABLED']
+
+    try:
+        if use_cache:
+            return _load_cached_trial(file_path)
+        return parse_trial_csv(file_path)
+
+    except Exception as e:
+        logger.error(f"解析文件 {file_path} 失败: {e}")
+        return None
+
+
+def as_trial(source):
+    """接受文件路径或TrialData，统一返回TrialData"""
+    if isinstance(source, TrialData):
+        return source
+    return load_trial(source)